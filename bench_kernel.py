@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Parity check and speedup report for the compiled simulation kernel.
+
+Parity: for a spread of (r, N, i0, key), the plain-Python kernel and the
+numba-jitted kernel must produce identical trace columns, and the compiled
+engine's fixation frequency must agree with the exact rho_i.
+
+Speed: events per second of the reference, indexed and compiled engines on
+the same parameters.
+
+Usage:
+    python bench_kernel.py
+    python bench_kernel.py --N 200 --r 1.05 --i0 100 --runs 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+import random
+import sys
+import time
+
+from moran_grid import rho_i
+from simulation.engines import ENGINES
+from simulation.kernel import HAVE_NUMBA, kernel_chunks
+
+PARITY_CASES = [
+    (1.0, 2, 1),
+    (1.75, 15, 13),
+    (0.6, 25, 3),
+    (1.25, 100, 50),
+    (0.95, 500, 250),
+]
+
+
+def run_columns(r: float, N: int, i0: int, key: int, jit: bool) -> list[list]:
+    columns: list[list] = [[], [], [], [], []]
+    last = i0
+    for *chunk, last in kernel_chunks(r, N, i0, key, jit=jit, chunk_steps=4096):
+        for col, part in zip(columns, chunk):
+            col.extend(part)
+    columns.append([last])
+    return columns
+
+
+def check_parity(keys: int) -> bool:
+    if not HAVE_NUMBA:
+        print("numba is not installed: skipping pure/jit parity (the pure kernel is what runs).")
+        return True
+    ok = True
+    for r, N, i0 in PARITY_CASES:
+        for key in range(keys):
+            key = (key * 0x9E3779B1) & 0xFFFFFFFF
+            pure = run_columns(r, N, i0, key, jit=False)
+            jit = run_columns(r, N, i0, key, jit=True)
+            if pure != jit:
+                print(f"  MISMATCH r={r} N={N} i0={i0} key={key}")
+                ok = False
+        print(f"  r={r:<5} N={N:<4} i0={i0:<4} {keys} keys: {'identical' if ok else 'DIFFERENT'}")
+    return ok
+
+
+def check_fixation(r: float, N: int, i0: int, runs: int) -> bool:
+    rng = random.Random(0)
+    simulate = ENGINES["compiled"]
+    fixed = sum(
+        simulate(r=r, N=N, i0=i0, run_id="bench", rng=rng).absorbed_type == "A" for _ in range(runs)
+    )
+    rho = rho_i(i0, N, r)
+    freq = fixed / runs
+    se = math.sqrt(rho * (1 - rho) / runs)
+    ok = abs(freq - rho) < 4 * se + 1e-12
+    print(f"  r={r} N={N} i0={i0}: fixation {freq:.4f} vs rho {rho:.4f} (4 SE = {4 * se:.4f}) -> {'ok' if ok else 'FAIL'}")
+    return ok
+
+
+def time_engine(engine: str, r: float, N: int, i0: int, runs: int) -> float:
+    simulate = ENGINES[engine]
+    rng = random.Random(1)
+    events = 0
+    start = time.perf_counter()
+    for _ in range(runs):
+        events += simulate(r=r, N=N, i0=i0, run_id="bench", rng=rng).num_events
+    return events / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compiled kernel parity and speedup report")
+    parser.add_argument("--N", type=int, default=100)
+    parser.add_argument("--r", type=float, default=1.1)
+    parser.add_argument("--i0", type=int, default=50)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--keys", type=int, default=20, help="Keys per parity case")
+    args = parser.parse_args()
+
+    print(f"numba installed: {HAVE_NUMBA}")
+    print("Parity (pure Python vs numba kernel):")
+    parity_ok = check_parity(args.keys)
+    print("Fixation frequency of the compiled engine:")
+    fixation_ok = check_fixation(1.5, 10, 2, 4000)
+
+    if HAVE_NUMBA:
+        # Compile outside the timed region.
+        ENGINES["compiled"](r=args.r, N=args.N, i0=args.i0, run_id="warmup", rng=random.Random(0))
+
+    print(f"Speed (events/s, r={args.r}, N={args.N}, i0={args.i0}, {args.runs} runs):")
+    rates = {engine: time_engine(engine, args.r, args.N, args.i0, args.runs) for engine in ("reference", "indexed", "compiled")}
+    for engine, rate in rates.items():
+        print(f"  {engine:<10} {rate:>14,.0f}   x{rate / rates['reference']:.1f} vs reference")
+
+    sys.exit(0 if parity_ok and fixation_ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,8 @@ import argparse
 import shutil
 from pathlib import Path
 
+from simulation.io import stored_variants
+
 
 def remove_file(path: Path, verbose: bool = True) -> None:
     if path.exists() and path.is_file():
@@ -23,14 +25,14 @@ def cleanup_classify(
     outputs_dir = batches_dir / "outputs"
     results_dir = base / "results"
 
-    # Intermediate files cleared between every batch
+    # Intermediate files cleared between every batch (gzip/zstd copies included)
     files_to_remove = [
         results_dir / "classify_parsed.csv",
-        batches_dir / "classify_batch.jsonl",
+        *stored_variants(batches_dir / "classify_batch.jsonl"),
     ]
 
     # Output JSONLs from previous classify fetch
-    classify_output_files = list(outputs_dir.glob("*_classify_output.jsonl")) if outputs_dir.exists() else []
+    classify_output_files = list(outputs_dir.glob("*_classify_output.jsonl*")) if outputs_dir.exists() else []
 
     # Only cleared if explicitly requested
     voted_csv = results_dir / "classify_voted.csv"
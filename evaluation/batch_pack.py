@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+import csv
+from dataclasses import dataclass
+import json
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, Mapping
+
+from simulation.io import compressed_path, open_text, plain_path
+
+# Packing combines the requests of many grid points (from one or several
+# groups) into as few batch files as the Batch API allows. Each request's
+# custom_id names its point, ``kind__point__run_id``, so a packed output is
+# split back into one parsed file per point before voting or scoring. Single
+# point batches keep the older ``kind__run_id`` form. Nothing here needs
+# openai, so the parsers can import the custom_id helpers without it.
+MAX_BATCH_REQUESTS = 50_000
+MAX_BATCH_BYTES = 200 * 1024 * 1024
+CUSTOM_ID_SEP = "__"
+
+
+@dataclass(frozen=True)
+class PackPoint:
+    label: str              # point name carried in custom_id
+    summary_csv: Path
+    batch_ids_jsonl: Path   # job log of the point's group
+    run_ids: tuple[str, ...] | None = None   # runs to send; None sends every run of the summary
+
+
+def point_label(group: str, summary_csv: str | Path) -> str:
+    """``group.r1.25_i4`` for a ``summaries/summary_r1.25_i4.csv`` file."""
+    return f"{group}.{Path(summary_csv).stem.removeprefix('summary_')}"
+
+
+def make_custom_id(prefix: str, run_id: str, point: str | None = None) -> str:
+    return CUSTOM_ID_SEP.join([prefix, point, run_id] if point else [prefix, run_id])
+
+
+def split_custom_id(custom_id: str) -> tuple[str, str]:
+    """(point, run_id) of a custom_id; the point is "" for single-point batches."""
+    _, _, rest = custom_id.partition(CUSTOM_ID_SEP)
+    point, _, run_id = rest.rpartition(CUSTOM_ID_SEP)
+    return point, run_id
+
+
+def shard_points(
+    points: Iterable[tuple[PackPoint, list[str]]], *, max_requests: int, max_bytes: int
+) -> Iterator[list[tuple[PackPoint, str]]]:
+    """Group each point's JSONL lines into shards under both limits, keeping their order.
+
+    A point's runs stay in one shard, since its majority vote needs all of
+    them; only a point too large for a shard on its own is split.
+    """
+    if max_requests < 1:
+        raise ValueError("max_requests must be at least 1.")
+    shard: list[tuple[PackPoint, str]] = []
+    size = 0
+    for point, lines in points:
+        sizes = [len(line.encode("utf-8")) + 1 for line in lines]
+        if max(sizes, default=0) > max_bytes:
+            raise ValueError(f"A request for {point.label} is {max(sizes)} bytes, over the {max_bytes}-byte shard limit.")
+        if shard and (len(shard) + len(lines) > max_requests or size + sum(sizes) > max_bytes):
+            yield shard
+            shard, size = [], 0
+        for line, n in zip(lines, sizes):
+            if shard and (len(shard) >= max_requests or size + n > max_bytes):
+                yield shard
+                shard, size = [], 0
+            shard.append((point, line))
+            size += n
+    if shard:
+        yield shard
+
+
+def send_packed_batches(
+    points: Iterable[PackPoint],
+    batch_jsonl: str | Path,
+    make_task: Callable[..., dict[str, Any]],
+    submit: Callable[[Path], str],
+    *,
+    kind: str,
+    model_name: str,
+    max_requests: int = MAX_BATCH_REQUESTS,
+    max_bytes: int = MAX_BATCH_BYTES,
+    compression: str = "none",
+    crop: str = "full",
+    on_submitted: Callable[[Path, str, list[str]], None] | None = None,
+) -> list[str]:
+    """Submit every run of ``points`` in as few batches as the limits allow.
+
+    Shards are written next to ``batch_jsonl`` as ``<stem>_000.jsonl``, ...
+    and handed to ``submit``, which uploads one and returns its batch id.
+    Each batch is recorded in the job log of every group it covers, listing
+    only that group's points, so each group fetches and demultiplexes its own
+    share, and then reported to ``on_submitted(shard, batch_id, labels)``.
+    A point whose requests cannot be built, or a shard that fails to submit,
+    is reported and skipped; its points are simply not in any batch. Lower
+    ``max_requests`` for smaller batches that finish sooner.
+    """
+    batch_jsonl = Path(batch_jsonl)
+    batch_jsonl.parent.mkdir(parents=True, exist_ok=True)
+    stem = plain_path(batch_jsonl).stem
+
+    def point_lines() -> Iterator[tuple[PackPoint, list[str]]]:
+        for point in points:
+            try:
+                with point.summary_csv.open("r", newline="", encoding="utf-8") as handle:
+                    rows = [row for row in csv.DictReader(handle) if point.run_ids is None or row["run_id"] in point.run_ids]
+                lines = [json.dumps(make_task(row, model_name=model_name, crop=crop, point=point.label)) for row in rows]
+            except Exception as exc:
+                print(f"   WARNING: building {kind} requests for {point.label} failed: {exc}")
+                continue
+            yield point, lines
+
+    batch_ids: list[str] = []
+    for index, shard in enumerate(shard_points(point_lines(), max_requests=max_requests, max_bytes=max_bytes)):
+        shard_path = compressed_path(batch_jsonl.with_name(f"{stem}_{index:03d}.jsonl"), compression)
+        with open_text(shard_path, "w") as handle:
+            for _, line in shard:
+                handle.write(line + "\n")
+        labels = list(dict.fromkeys(point.label for point, _ in shard))
+        try:
+            batch_id = submit(shard_path)
+        except Exception as exc:
+            print(f"   WARNING: submitting {shard_path.name} ({len(labels)} point(s)) failed: {exc}")
+            continue
+        batch_ids.append(batch_id)
+
+        by_log: dict[Path, dict[str, str]] = {}
+        for point, _ in shard:
+            by_log.setdefault(point.batch_ids_jsonl, {})[point.label] = str(point.summary_csv)
+        for log, log_points in by_log.items():
+            log.parent.mkdir(parents=True, exist_ok=True)
+            with log.open("a", encoding="utf-8") as handle:
+                handle.write(json.dumps({
+                    "batch_job_id": batch_id,
+                    "model": model_name,
+                    "kind": kind,
+                    "crop": crop,
+                    "requests": len(shard),
+                    "points": log_points,
+                }) + "\n")
+        print(f"   Submitted {kind} batch {batch_id}: {len(shard)} requests from {len(labels)} point(s)")
+        if on_submitted is not None:
+            on_submitted(shard_path, batch_id, labels)
+    return batch_ids
+
+
+def demux_parsed(parsed_csv: str | Path, points: Mapping[str, Path]) -> dict[str, Path]:
+    """Split a parsed output CSV into one file per point, by its ``point`` column.
+
+    ``points`` maps the labels to keep to their summaries; rows of other
+    points (another group's share of a packed batch) are dropped. A
+    single-point batch (label "") is returned unchanged.
+    """
+    parsed_csv = Path(parsed_csv)
+    if set(points) == {""}:
+        return {"": parsed_csv}
+    with parsed_csv.open("r", newline="", encoding="utf-8") as handle:
+        reader = csv.DictReader(handle)
+        fieldnames = list(reader.fieldnames or [])
+        by_point: dict[str, list[dict[str, str]]] = {}
+        for row in reader:
+            if row["point"] in points:
+                by_point.setdefault(row["point"], []).append(row)
+    outputs: dict[str, Path] = {}
+    for label, rows in by_point.items():
+        out = parsed_csv.with_name(f"{parsed_csv.stem}__{label}.csv")
+        with out.open("w", newline="", encoding="utf-8") as handle:
+            writer = csv.DictWriter(handle, fieldnames=fieldnames)
+            writer.writeheader()
+            writer.writerows(rows)
+        outputs[label] = out
+    return outputs
+
+
+def group_pack_points(group_dir: str | Path, batch_ids_name: str) -> list[PackPoint]:
+    """Every summary of a group, with batches recorded in its ``batches/<batch_ids_name>`` log."""
+    group_dir = Path(group_dir)
+    log = group_dir / "batches" / batch_ids_name
+    summaries = sorted((group_dir / "summaries").glob("summary_*.csv"))
+    return [PackPoint(point_label(group_dir.name, summary), summary, log) for summary in summaries]
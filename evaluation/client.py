@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+import dotenv
+from openai import OpenAI
+
+from simulation.io import plain_path, read_plain_bytes
+
+
+def make_client() -> OpenAI:
+    """OpenAI client from OPENAI_API_KEY (a .env file is loaded first)."""
+    dotenv.load_dotenv()
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        raise RuntimeError("OPENAI_API_KEY is not set.")
+    return OpenAI(api_key=api_key)
+
+
+def upload_batch_file(client: OpenAI, batch_jsonl: Path) -> str:
+    """Upload a batch JSONL file (decompressed in memory if stored compressed); returns the file id."""
+    uploaded = client.files.create(file=(plain_path(batch_jsonl).name, read_plain_bytes(batch_jsonl)), purpose="batch")
+    return uploaded.id
+
+
+def create_batch(client: OpenAI, input_file_id: str) -> str:
+    batch_job = client.batches.create(
+        input_file_id=input_file_id,
+        endpoint="/v1/chat/completions",
+        completion_window="24h",
+    )
+    return batch_job.id
+
+
+def submit_batch(client: OpenAI, batch_jsonl: Path) -> str:
+    """Upload a batch JSONL file and start the batch; returns the batch id."""
+    return create_batch(client, upload_batch_file(client, batch_jsonl))
@@ -1,24 +1,24 @@
 from __future__ import annotations
 
 import json
-import os
 from pathlib import Path
 
-import dotenv
 from openai import OpenAI
 
+from simulation.io import compressed_path, open_text, stored_variants
+
+from .client import make_client
+
 
 def fetch_estimation_batches(
     batch_ids_jsonl: str | Path,
     output_dir: str | Path,
     *,
     verbose: bool = True,
+    compression: str = "none",
+    client: OpenAI | None = None,
 ) -> list[Path]:
-    dotenv.load_dotenv()
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        raise RuntimeError("OPENAI_API_KEY is not set.")
-    client = OpenAI(api_key=api_key)
+    client = client or make_client()
 
     batch_ids_jsonl = Path(batch_ids_jsonl)
     output_dir = Path(output_dir)
@@ -33,6 +33,15 @@ def fetch_estimation_batches(
 
     for row in rows:
         batch_id = row["batch_job_id"]
+        plain = output_dir / f"{batch_id}_estimation_output.jsonl"
+        stored = stored_variants(plain)
+        if stored:
+            # Completed outputs never change; skip the API round trip. Any
+            # stored form counts, so changing --compress does not download a
+            # second copy that would then be parsed (and voted) twice.
+            outputs.append(stored[0])
+            continue
+        out_path = compressed_path(plain, compression)
         batch = client.batches.retrieve(batch_id)
         if verbose:
             print(
@@ -41,10 +50,11 @@ def fetch_estimation_batches(
             )
         if batch.status == "completed" and getattr(batch, "output_file_id", None):
             content = client.files.content(batch.output_file_id)
-            out_path = output_dir / f"{batch_id}_estimation_output.jsonl"
-            out_path.write_bytes(content.content)
+            with open_text(out_path, "w", newline="") as handle:
+                handle.write(content.content.decode("utf-8"))
             outputs.append(out_path)
-        elif batch.status in {"failed", "expired", "cancelled"} and getattr(batch, "error_file_id", None):
+        elif batch.status in {"completed", "failed", "expired", "cancelled"} and getattr(batch, "error_file_id", None):
+            # Includes completed batches whose requests all failed: they have no output file
             err = client.files.content(batch.error_file_id)
             (output_dir / f"{batch_id}_estimation_errors.jsonl").write_bytes(err.content)
 
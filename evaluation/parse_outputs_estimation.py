@@ -5,6 +5,10 @@ import json
 from pathlib import Path
 from typing import Any
 
+from simulation.io import open_text
+
+from .batch_pack import split_custom_id
+
 
 def parse_estimation_outputs(output_jsonl: str | Path, parsed_csv: str | Path) -> Path:
     output_jsonl = Path(output_jsonl)
@@ -12,7 +16,7 @@ def parse_estimation_outputs(output_jsonl: str | Path, parsed_csv: str | Path) -
     parsed_csv.parent.mkdir(parents=True, exist_ok=True)
 
     rows: list[dict[str, Any]] = []
-    with output_jsonl.open("r", encoding="utf-8") as handle:
+    with open_text(output_jsonl) as handle:
         for line in handle:
             line = line.strip()
             if not line:
@@ -31,7 +35,7 @@ def parse_estimation_outputs(output_jsonl: str | Path, parsed_csv: str | Path) -
                     parsed = {}
 
             custom_id = record.get("custom_id", "")
-            run_id = custom_id.removeprefix("estimate__")
+            point, run_id = split_custom_id(custom_id)
             exp_id = "_".join(run_id.split("_")[:-1]) if "_run" in run_id else run_id
 
             r_raw = parsed.get("estimated_r")
@@ -42,13 +46,14 @@ def parse_estimation_outputs(output_jsonl: str | Path, parsed_csv: str | Path) -
 
             rows.append({
                 "custom_id": custom_id,
+                "point": point,
                 "run_id": run_id,
                 "exp_id": exp_id,
                 "estimated_r": estimated_r,
                 "raw_content": content,
             })
 
-    fieldnames = ["custom_id", "run_id", "exp_id", "estimated_r", "raw_content"]
+    fieldnames = ["custom_id", "point", "run_id", "exp_id", "estimated_r", "raw_content"]
     with parsed_csv.open("w", newline="", encoding="utf-8") as handle:
         writer = csv.DictWriter(handle, fieldnames=fieldnames)
         writer.writeheader()
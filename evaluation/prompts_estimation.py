@@ -1,8 +1,9 @@
 from __future__ import annotations
 
-import csv
 from pathlib import Path
 
+from simulation.views import read_view_rows, view_display_name
+
 ALLOWED_COLUMNS = [
     "step",
     "event",
@@ -35,16 +36,14 @@ def build_system_prompt() -> str:
     )
 
 
-def _observable_csv_text(csv_path: Path) -> str:
-    with csv_path.open("r", newline="", encoding="utf-8") as handle:
-        reader = csv.DictReader(handle)
-        rows = list(reader)
+def _observable_csv_text(csv_path: str | Path) -> str:
+    fieldnames, rows = read_view_rows(csv_path)
 
     for forbidden in ("true_i0", "true_r", "true_N", "meta_json"):
-        if forbidden in (reader.fieldnames or []):
+        if forbidden in fieldnames:
             raise ValueError(f"Forbidden ground-truth column found in trace CSV: {forbidden}")
 
-    present_columns = [c for c in ALLOWED_COLUMNS if c in (reader.fieldnames or [])]
+    present_columns = [c for c in ALLOWED_COLUMNS if c in fieldnames]
     output_lines = [",".join(present_columns)]
     for row in rows:
         output_lines.append(",".join(str(row[col]) for col in present_columns))
@@ -52,9 +51,8 @@ def _observable_csv_text(csv_path: Path) -> str:
 
 
 def build_user_prompt_from_csv(csv_path: str | Path) -> str:
-    csv_path = Path(csv_path)
     return (
-        f"Trace file: {csv_path.name}\n"
+        f"Trace file: {view_display_name(csv_path)}\n"
         "Below is the observable Moran-process event history in CSV format. "
         "Estimate the relative fitness r of the mutant type from this trace alone.\n\n"
         f"{_observable_csv_text(csv_path)}"
@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import csv
+from pathlib import Path
+
+from moran_grid import rho_i, solve_r_for_target
+
+# Adaptive refinement maps where the majority vote flips between O and X
+# without spending replicates on points far from it. Within each i0 column the
+# voted points are ordered by r (rho increases with r); a new point is placed
+# at the rho midpoint of every adjacent pair whose votes differ, or where
+# either vote disagrees with the analytic label (rho > 0.5 is X). A column
+# edge whose vote disagrees with its label is extended one bracket outward,
+# since the flip then lies beyond the points voted so far.
+MIN_RHO_GAP = 0.01
+
+
+def coarse_grid(N: int, delta: float = 0.2, i0_step: int = 1, decimals: int = 4) -> list[tuple[float, int]]:
+    """(r, i0) pairs at rho = 0.5 -/+ delta, as moran_grid prints them, for every i0_step-th i0.
+
+    The last i0 (N - 1) is always included so the columns span the whole range.
+    """
+    if not 0.0 < delta < 0.5:
+        raise ValueError("delta must satisfy 0 < delta < 0.5.")
+    i0s = list(range(1, N, max(i0_step, 1)))
+    if i0s[-1] != N - 1:
+        i0s.append(N - 1)
+    points = []
+    for i0 in i0s:
+        for target in (0.5 - delta, 0.5 + delta):
+            r = solve_r_for_target(i0, N, target)
+            if r is not None:
+                points.append((round(r, decimals), i0))
+    return points
+
+
+def read_votes(voted_csv: str | Path, decimals: int = 4) -> dict[tuple[float, int], tuple[str, str]]:
+    """(majority_vote, true_label) per (r, i0) point of a classify_voted.csv; later rows win."""
+    voted_csv = Path(voted_csv)
+    votes: dict[tuple[float, int], tuple[str, str]] = {}
+    if not voted_csv.exists():
+        return votes
+    with voted_csv.open("r", newline="", encoding="utf-8") as handle:
+        for row in csv.DictReader(handle):
+            key = (round(float(row["true_r"]), decimals), int(row["true_i0"]))
+            votes[key] = (row["majority_vote"], row["true_label"])
+    return votes
+
+
+def _point_at(i0: int, N: int, rho: float, decimals: int) -> tuple[float, int] | None:
+    if not MIN_RHO_GAP <= rho <= 1.0 - MIN_RHO_GAP:
+        return None
+    r = solve_r_for_target(i0, N, rho)
+    return None if r is None else (round(r, decimals), i0)
+
+
+def refine_points(
+    votes: dict[tuple[float, int], tuple[str, str]],
+    N: int,
+    existing: set[tuple[float, int]] | None = None,
+    decimals: int = 4,
+    min_gap: float = MIN_RHO_GAP,
+    r_range: tuple[float, float] | None = None,
+) -> list[tuple[float, int]]:
+    """New points around disagreeing votes, widest rho bracket first.
+
+    ``existing`` holds points already on the grid (voted or still pending);
+    they are never proposed again. Brackets narrower than ``min_gap`` in rho
+    are left alone, which bounds how far a boundary is refined. Points with r
+    outside ``r_range`` (inclusive; by default the span of the voted points)
+    are not proposed, so edge extension cannot run off into grid corners
+    where rho is far from 0.5. New points always reuse a voted i0.
+    """
+    existing = existing or set()
+    if r_range is None and votes:
+        r_range = (min(r for r, _ in votes), max(r for r, _ in votes))
+    columns: dict[int, list[tuple[float, float, str, str]]] = {}
+    for (r, i0), (vote, label) in votes.items():
+        columns.setdefault(i0, []).append((rho_i(i0, N, r), r, vote, label))
+
+    proposals: dict[tuple[float, int], float] = {}
+
+    def propose(point: tuple[float, int] | None, gap: float) -> None:
+        if point is None or (r_range is not None and not r_range[0] <= point[0] <= r_range[1]):
+            return
+        if point not in existing and point not in votes:
+            proposals[point] = max(gap, proposals.get(point, 0.0))
+
+    for i0, column in columns.items():
+        column.sort()
+        for (rho_a, _, vote_a, label_a), (rho_b, _, vote_b, label_b) in zip(column, column[1:]):
+            gap = rho_b - rho_a
+            if gap >= 2 * min_gap and (vote_a != vote_b or vote_a != label_a or vote_b != label_b):
+                propose(_point_at(i0, N, (rho_a + rho_b) / 2, decimals), gap)
+
+        # Flip beyond the column's ends: step outward by the nearest bracket
+        rho_low, _, vote_low, label_low = column[0]
+        rho_high, _, vote_high, label_high = column[-1]
+        low_step = max(column[1][0] - rho_low if len(column) > 1 else 0.0, 2 * min_gap)
+        high_step = max(rho_high - column[-2][0] if len(column) > 1 else 0.0, 2 * min_gap)
+        if vote_low != label_low and vote_low != "O":
+            propose(_point_at(i0, N, rho_low - low_step, decimals), low_step)
+        if vote_high != label_high and vote_high != "X":
+            propose(_point_at(i0, N, rho_high + high_step, decimals), high_step)
+
+    return sorted(proposals, key=lambda point: (-proposals[point], point[1], point[0]))
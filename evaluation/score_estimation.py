@@ -4,11 +4,14 @@ import csv
 from pathlib import Path
 from typing import Any
 
+from simulation.registry import Registry
+
 
 def score_estimation(
     parsed_csv: str | Path,
     summary_csv: str | Path,
     scored_csv: str | Path,
+    registry: str | Path | None = None,
 ) -> Path:
     parsed_csv = Path(parsed_csv)
     summary_csv = Path(summary_csv)
@@ -17,9 +20,14 @@ def score_estimation(
 
     # Load ground truth keyed by run_id
     truth: dict[str, dict[str, str]] = {}
-    with summary_csv.open("r", newline="", encoding="utf-8") as handle:
-        for row in csv.DictReader(handle):
-            truth[row["run_id"]] = row
+    if registry is not None:
+        # Indexed lookup of this point's runs instead of re-reading the summary.
+        with Registry(registry) as reg:
+            truth = reg.truth(summary_csv)
+    else:
+        with summary_csv.open("r", newline="", encoding="utf-8") as handle:
+            for row in csv.DictReader(handle):
+                truth[row["run_id"]] = row
 
     file_exists = scored_csv.exists()
     scored_rows: list[dict[str, Any]] = []
@@ -4,16 +4,22 @@ import csv
 import json
 import os
 from pathlib import Path
+from typing import Callable, Iterable
 
-import dotenv
 from openai import OpenAI
 
+from simulation.io import compressed_path, open_text
+from simulation.registry import Registry
+from simulation.views import view_ref
+
+from .batch_pack import MAX_BATCH_BYTES, MAX_BATCH_REQUESTS, PackPoint, make_custom_id, send_packed_batches
+from .client import create_batch, make_client, submit_batch, upload_batch_file
 from .prompts_fixation_probability import build_system_prompt, build_user_prompt_from_csv
 
 
-def make_task(row: dict[str, str], model_name: str) -> dict:
+def make_task(row: dict[str, str], model_name: str, crop: str = "full", point: str | None = None) -> dict:
     return {
-        "custom_id": f"classify__{row['run_id']}",
+        "custom_id": make_custom_id("classify", row["run_id"], point),
         "method": "POST",
         "url": "/v1/chat/completions",
         "body": {
@@ -22,52 +28,139 @@ def make_task(row: dict[str, str], model_name: str) -> dict:
             "response_format": {"type": "json_object"},
             "messages": [
                 {"role": "system", "content": build_system_prompt()},
-                {"role": "user", "content": build_user_prompt_from_csv(row["trace_csv"])},
+                {"role": "user", "content": build_user_prompt_from_csv(view_ref(row["trace_csv"], crop))},
             ],
         },
     }
 
 
-def send_classify_batch(
+def write_classify_batch_jsonl(
     summary_csv: str | Path,
     batch_jsonl: str | Path,
-    model_name: str | None = None,
-) -> str:
-    dotenv.load_dotenv()
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        raise RuntimeError("OPENAI_API_KEY is not set.")
-    client = OpenAI(api_key=api_key)
-    model_name = model_name or os.getenv("OPENAI_MODEL_NAME", "gpt-4o-mini")
-
+    model_name: str,
+    compression: str = "none",
+    crop: str = "full",
+) -> Path:
+    """Build the prompt of every run in a summary into a batch JSONL; returns the path written."""
     summary_csv = Path(summary_csv)
-    batch_jsonl = Path(batch_jsonl)
+    batch_jsonl = compressed_path(batch_jsonl, compression)
     batch_jsonl.parent.mkdir(parents=True, exist_ok=True)
 
     tasks: list[dict] = []
     with summary_csv.open("r", newline="", encoding="utf-8") as handle:
         for row in csv.DictReader(handle):
-            tasks.append(make_task(row, model_name=model_name))
+            tasks.append(make_task(row, model_name=model_name, crop=crop))
 
-    with batch_jsonl.open("w", encoding="utf-8") as handle:
+    with open_text(batch_jsonl, "w") as handle:
         for task in tasks:
             handle.write(json.dumps(task) + "\n")
+    return batch_jsonl
 
-    uploaded = client.files.create(file=batch_jsonl.open("rb"), purpose="batch")
-    batch_job = client.batches.create(
-        input_file_id=uploaded.id,
-        endpoint="/v1/chat/completions",
-        completion_window="24h",
-    )
 
-    job_record = batch_jsonl.with_name(f"classify_batch_job_ids_{model_name}.jsonl")
+def record_classify_batch(
+    batch_jsonl: str | Path, batch_id: str, model_name: str, summary_csv: str | Path, crop: str = "full"
+) -> None:
+    """Append a submitted batch to the job log next to its batch JSONL."""
+    job_record = Path(batch_jsonl).with_name(f"classify_batch_job_ids_{model_name}.jsonl")
     with job_record.open("a", encoding="utf-8") as handle:
-        handle.write(
-            json.dumps({
-                "batch_job_id": batch_job.id,
-                "model": model_name,
-                "summary_csv": str(summary_csv),
-            }) + "\n"
-        )
-
-    return batch_job.id
+        handle.write(json.dumps({
+            "batch_job_id": batch_id,
+            "model": model_name,
+            "summary_csv": str(summary_csv),
+            "crop": crop,
+        }) + "\n")
+
+
+def send_classify_batch(
+    summary_csv: str | Path,
+    batch_jsonl: str | Path,
+    model_name: str | None = None,
+    compression: str = "none",
+    crop: str = "full",
+    client: OpenAI | None = None,
+) -> str:
+    """Write the batch JSONL (compressed if asked) and submit it.
+
+    The Batch API only takes plain JSONL, so a compressed file is
+    decompressed in memory just before the upload. ``crop`` is a crop view
+    (see simulation.views) applied to every trace as its prompt is built, so
+    crop policies can be compared without writing cropped trace files.
+    Pass ``client`` to reuse one OpenAI client across many batches.
+    """
+    client = client or make_client()
+    model_name = model_name or os.getenv("OPENAI_MODEL_NAME", "gpt-4o-mini")
+
+    batch_jsonl = write_classify_batch_jsonl(summary_csv, batch_jsonl, model_name, compression, crop)
+    batch_id = submit_batch(client, batch_jsonl)
+    record_classify_batch(batch_jsonl, batch_id, model_name, summary_csv, crop)
+    return batch_id
+
+
+def send_classify_point(
+    registry: Registry,
+    point_id: int,
+    summary_csv: str | Path,
+    batch_jsonl: str | Path,
+    model_name: str,
+    compression: str = "none",
+    client: OpenAI | None = None,
+) -> str:
+    """Like send_classify_batch for one grid point, resuming after its last registry checkpoint.
+
+    Prompts already built (and still on disk) are not rebuilt, and a file
+    already uploaded is not uploaded again.
+    """
+    client = client or make_client()
+    done = registry.stages(point_id)
+    built = done.get("prompts_built")
+    if built is None or not Path(built).exists():
+        batch_jsonl = write_classify_batch_jsonl(summary_csv, batch_jsonl, model_name, compression)
+        registry.mark_stage(point_id, "prompts_built", batch_jsonl)
+        done = {}
+    else:
+        batch_jsonl = Path(built)
+    file_id = done.get("uploaded")
+    if file_id is None:
+        file_id = upload_batch_file(client, batch_jsonl)
+        registry.mark_stage(point_id, "uploaded", file_id)
+    batch_id = create_batch(client, file_id)
+    record_classify_batch(batch_jsonl, batch_id, model_name, summary_csv)
+    registry.add_batch(batch_id, kind="classify", model=model_name, summary_csv=summary_csv)
+    registry.mark_stage(point_id, "batch_created", batch_id)
+    return batch_id
+
+
+def send_packed_classify_batches(
+    points: Iterable[PackPoint],
+    batch_jsonl: str | Path,
+    model_name: str | None = None,
+    *,
+    max_requests: int = MAX_BATCH_REQUESTS,
+    max_bytes: int = MAX_BATCH_BYTES,
+    compression: str = "none",
+    crop: str = "full",
+    client: OpenAI | None = None,
+    on_submitted: Callable[[Path, str, str, list[str]], None] | None = None,
+) -> list[str]:
+    """Submit the runs of many points in packed, sharded batches (see evaluation.batch_pack).
+
+    ``on_submitted(shard, file_id, batch_id, labels)`` is called for each
+    shard once its batch exists, e.g. to checkpoint its points.
+    """
+    client = client or make_client()
+    model_name = model_name or os.getenv("OPENAI_MODEL_NAME", "gpt-4o-mini")
+    file_ids: dict[Path, str] = {}
+
+    def submit(path: Path) -> str:
+        file_ids[path] = upload_batch_file(client, path)
+        return create_batch(client, file_ids[path])
+
+    def submitted(path: Path, batch_id: str, labels: list[str]) -> None:
+        if on_submitted is not None:
+            on_submitted(path, file_ids[path], batch_id, labels)
+
+    return send_packed_batches(
+        points, batch_jsonl, make_task, submit, kind="classify", model_name=model_name,
+        max_requests=max_requests, max_bytes=max_bytes, compression=compression, crop=crop,
+        on_submitted=submitted,
+    )
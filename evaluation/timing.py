@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+import time
+from typing import Iterator
+
+
+class StageTimer:
+    """Wall-clock time and call count per pipeline stage, in first-use order."""
+
+    def __init__(self) -> None:
+        self.seconds: dict[str, float] = {}
+        self.calls: dict[str, int] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[name] = self.seconds.get(name, 0.0) + time.perf_counter() - start
+            self.calls[name] = self.calls.get(name, 0) + 1
+
+    def merge(self, other: StageTimer) -> None:
+        """Add another timer's stages, e.g. one returned by a worker process."""
+        for name, seconds in other.seconds.items():
+            self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+            self.calls[name] = self.calls.get(name, 0) + other.calls[name]
+
+    def report(self) -> str:
+        total = sum(self.seconds.values())
+        lines = [f"{'stage':<12} {'calls':>6} {'total s':>10} {'mean s':>10} {'share':>7}"]
+        for name, seconds in self.seconds.items():
+            calls = self.calls[name]
+            share = seconds / total if total else 0.0
+            lines.append(f"{name:<12} {calls:>6} {seconds:>10.2f} {seconds / calls:>10.3f} {share:>7.1%}")
+        lines.append(f"{'total':<12} {sum(self.calls.values()):>6} {total:>10.2f}")
+        return "\n".join(lines)
@@ -2,8 +2,11 @@ from __future__ import annotations
 
 import csv
 from collections import Counter
+import math
 from pathlib import Path
 
+from simulation.registry import Registry
+
 
 def compute_true_rho(r: float, i0: int, N: int) -> float:
     """Moran fixation probability: rho = (1 - (1/r)^i0) / (1 - (1/r)^N)."""
@@ -26,10 +29,35 @@ def majority_vote(labels: list[str]) -> str:
         return "T"  # tie
 
 
+def sprt_lead(error: float = 0.05, margin: float = 0.25) -> int:
+    """How far one label must lead the other for sprt_decision to settle."""
+    if not 0.0 < error < 0.5 or not 0.0 < margin < 0.5:
+        raise ValueError("error and margin must lie strictly between 0 and 0.5.")
+    return math.ceil(math.log((1.0 - error) / error) / math.log((0.5 + margin) / (0.5 - margin)))
+
+
+def sprt_decision(x_count: int, o_count: int, error: float = 0.05, margin: float = 0.25) -> str | None:
+    """Wald's sequential test on replicate labels: X or O once settled, None while open.
+
+    Tests P(X) = 0.5 + margin against P(X) = 0.5 - margin with both error
+    rates equal to ``error``. The log-likelihood ratio is then
+    (x - o) * log((0.5 + margin) / (0.5 - margin)), so the test stops as soon
+    as one label leads by sprt_lead(error, margin), and always agrees with
+    majority_vote when it does.
+    """
+    lead = sprt_lead(error, margin)
+    if x_count - o_count >= lead:
+        return "X"
+    if o_count - x_count >= lead:
+        return "O"
+    return None
+
+
 def run_vote(
     parsed_csv: str | Path,
     summary_csv: str | Path,
     voted_csv: str | Path,
+    registry: str | Path | None = None,
 ) -> Path:
     parsed_csv = Path(parsed_csv)
     summary_csv = Path(summary_csv)
@@ -37,9 +65,14 @@ def run_vote(
     voted_csv.parent.mkdir(parents=True, exist_ok=True)
 
     truth: dict[str, dict[str, str]] = {}
-    with summary_csv.open("r", newline="", encoding="utf-8") as handle:
-        for row in csv.DictReader(handle):
-            truth[row["run_id"]] = row
+    if registry is not None:
+        # Indexed lookup of this point's runs instead of re-reading the summary.
+        with Registry(registry) as reg:
+            truth = reg.truth(summary_csv)
+    else:
+        with summary_csv.open("r", newline="", encoding="utf-8") as handle:
+            for row in csv.DictReader(handle):
+                truth[row["run_id"]] = row
 
     exp_labels: dict[str, list[str]] = {}
     exp_run_ids: dict[str, list[str]] = {}
@@ -17,6 +17,62 @@ def build_parser() -> argparse.ArgumentParser:
     sim.add_argument("--N", type=int, default=None, help="Fix the population size N for every experiment")
     sim.add_argument("--r", type=float, default=None, help="Fix the relative fitness r for every experiment")
     sim.add_argument("--i0", type=int, default=None, help="Fix the initial mutant count i0 for every experiment")
+    sim.add_argument("--engine", choices=["auto", "reference", "indexed", "skip", "compiled", "batch", "graph"],
+                     default="reference",
+                     help="Simulation engine (indexed is O(1) per step, compiled (or auto) is the indexed model "
+                          "on a counter-based RNG, numba-jitted when available with identical traces either way, "
+                          "skip jumps over null events and expands "
+                          "them lazily, batch runs all replicates in lockstep with NumPy, graph runs on the "
+                          "structured population given by --graph; all give different traces from reference "
+                          "for the same seed)")
+    sim.add_argument("--graph", default=None,
+                     help="Population structure for --engine graph: cycle, star, lattice (square N) or "
+                          "regular<d> (random d-regular, fixed per N)")
+    sim.add_argument("--counts-only", action="store_true",
+                     help="Write count-level traces (null-event runs + count changes) instead of full event tables")
+    sim.add_argument("--stream", action="store_true",
+                     help="Write each trace while simulating it, keeping memory bounded for very long runs")
+    sim.add_argument("--workers", type=int, default=None,
+                     help="Simulate runs in this many processes. Each run gets its own seed stream derived from "
+                          "--seed and its run_id, so output is identical for any worker count (but differs from "
+                          "the default single-stream seeding)")
+    sim.add_argument("--storage", choices=["csv", "seed"], default="csv",
+                     help="seed: write no trace files; the summary holds per-run seed references that are "
+                          "regenerated on demand (implies per-run seed streams)")
+    sim.add_argument("--crops", nargs="+", default=None, metavar="CROP",
+                     help="Write crop variants (e.g. full prefix10 suffix10 stride3) to data/cropped in one pass "
+                          "instead of full traces, plus one dataset_summary__<crop>.csv per crop")
+    sim.add_argument("--crop-stop-early", action="store_true",
+                     help="With prefix-only --crops, stop each run as soon as its prefixes are filled")
+    sim.add_argument("--compress", choices=["none", "gzip", "zstd"], default="none",
+                     help="Write trace and crop CSVs compressed (.csv.gz / .csv.zst); readers detect it (zstd needs zstandard)")
+    sim.add_argument("--exact-max-N", type=int, default=10_000,
+                     help="Above this N, switch to the approximate tau-leaping engine (recorded in run metadata); "
+                          "graph runs always stay exact")
+
+    mc = sub.add_parser("mc-rho", help="Monte Carlo fixation probability from the count-only chain, with CIs")
+    mc.add_argument("--r", type=float, default=None)
+    mc.add_argument("--N", type=int, default=None)
+    mc.add_argument("--i0", type=int, default=None)
+    mc.add_argument("--grid", choices=["classify", "estimation"], default=None,
+                    help="Sweep every (r, i0) of the runner grid in simulation/grids.py at its N instead")
+    mc.add_argument("--model", choices=["Bd", "dB"], default="Bd",
+                    help="Bd runs antithetic pairs and is checked against the analytic rho; dB uses a Bd control variate")
+    mc.add_argument("--replicates", type=int, default=20_000,
+                    help="Chains per point (Bd runs them as antithetic pairs); the 37-point classify grid "
+                         "takes a few seconds at the default")
+    mc.add_argument("--seed", type=int, default=42)
+    mc.add_argument("--output-csv", default=None)
+
+    pack = sub.add_parser("pack-group", help="Convert a group's per-run trace CSVs into one archive per grid point")
+    pack.add_argument("--group", required=True, help="Group name under data/groups")
+    pack.add_argument("--remove-csv", action="store_true", help="Delete the CSVs once they are packed")
+
+    dedupe = sub.add_parser("dedupe", help="Move group trace CSVs into the content-addressed store, leaving hardlinks")
+    dedupe.add_argument("--groups", nargs="+", default=None, metavar="GROUP",
+                        help="Groups under data/groups to migrate (default: all)")
+    dedupe.add_argument("--store-dir", default=str(BASE_DIR / "data" / "store"))
+    dedupe.add_argument("--dry-run", action="store_true", help="Only report what would be linked")
 
     send = sub.add_parser("send", help="Submit the observable traces to the OpenAI Batch API")
     send.add_argument("--summary-csv", default=str(BASE_DIR / "data" / "results" / "dataset_summary.csv"))
@@ -44,10 +100,30 @@ def build_parser() -> argparse.ArgumentParser:
     csend.add_argument("--summary-csv", default=str(BASE_DIR / "data" / "results" / "dataset_summary.csv"))
     csend.add_argument("--batch-jsonl", default=str(BASE_DIR / "data" / "batches" / "classify_batch.jsonl"))
     csend.add_argument("--model", default="gpt-4o-mini")
+    csend.add_argument("--compress", choices=["none", "gzip", "zstd"], default="none",
+                       help="Keep the batch JSONL compressed on disk; it is decompressed in memory for upload")
+    csend.add_argument("--registry", default=None, help="Group registry.sqlite to record the batch in")
+    csend.add_argument("--crop", default="full",
+                       help="Crop view applied to each trace at prompt-build time: full, prefixK, suffixK, "
+                            "strideK, windowLsS (random window) or stateMwL (window from M mutants)")
+
+    cpack = sub.add_parser("classify-pack",
+                           help="Send the classification requests of whole groups in packed batches, sharded by size")
+    cpack.add_argument("--groups", nargs="+", required=True, help="Groups under data/groups; may be several")
+    cpack.add_argument("--batch-jsonl", default=str(BASE_DIR / "data" / "batches" / "classify_packed.jsonl"),
+                       help="Shards are written as <stem>_000.jsonl, <stem>_001.jsonl, ...")
+    cpack.add_argument("--model", default="gpt-4o-mini")
+    cpack.add_argument("--max-requests", type=int, default=50_000,
+                       help="Requests per batch (the Batch API allows 50,000); lower it for faster turnaround")
+    cpack.add_argument("--max-mb", type=float, default=200.0, help="MB of batch JSONL per batch (API limit 200)")
+    cpack.add_argument("--compress", choices=["none", "gzip", "zstd"], default="none")
+    cpack.add_argument("--crop", default="full", help="Crop view applied to each trace at prompt-build time")
 
     cfetch = sub.add_parser("classify-fetch", help="Fetch completed classification batch outputs")
     cfetch.add_argument("--batch-ids-jsonl", default=str(BASE_DIR / "data" / "batches" / "classify_batch_job_ids_gpt-4o-mini.jsonl"))
     cfetch.add_argument("--output-dir", default=str(BASE_DIR / "data" / "batches" / "outputs"))
+    cfetch.add_argument("--compress", choices=["none", "gzip", "zstd"], default="none",
+                        help="Store downloaded output JSONL compressed (.jsonl.gz / .jsonl.zst)")
 
     cparse = sub.add_parser("classify-parse", help="Parse classification output JSONL into CSV")
     cparse.add_argument("--output-jsonl", required=True)
@@ -57,16 +133,37 @@ def build_parser() -> argparse.ArgumentParser:
     cvote.add_argument("--parsed-csv", default=str(BASE_DIR / "data" / "results" / "classify_parsed.csv"))
     cvote.add_argument("--summary-csv", default=str(BASE_DIR / "data" / "results" / "dataset_summary.csv"))
     cvote.add_argument("--voted-csv", default=str(BASE_DIR / "data" / "results" / "classify_voted.csv"))
+    cvote.add_argument("--registry", default=None, help="Group registry.sqlite to read the truth from")
 
     # --- Estimation pipeline ---
     esend = sub.add_parser("estimation-send", help="Send r estimation batch")
     esend.add_argument("--summary-csv", default=str(BASE_DIR / "data" / "results" / "dataset_summary.csv"))
     esend.add_argument("--batch-jsonl", default=str(BASE_DIR / "data" / "batches" / "estimation_batch.jsonl"))
     esend.add_argument("--model", default="gpt-4o-mini")
+    esend.add_argument("--compress", choices=["none", "gzip", "zstd"], default="none",
+                       help="Keep the batch JSONL compressed on disk; it is decompressed in memory for upload")
+    esend.add_argument("--registry", default=None, help="Group registry.sqlite to record the batch in")
+    esend.add_argument("--crop", default="full",
+                       help="Crop view applied to each trace at prompt-build time: full, prefixK, suffixK, "
+                            "strideK, windowLsS (random window) or stateMwL (window from M mutants)")
+
+    epack = sub.add_parser("estimation-pack",
+                           help="Send the estimation requests of whole groups in packed batches, sharded by size")
+    epack.add_argument("--groups", nargs="+", required=True, help="Groups under data/groups; may be several")
+    epack.add_argument("--batch-jsonl", default=str(BASE_DIR / "data" / "batches" / "estimation_packed.jsonl"),
+                       help="Shards are written as <stem>_000.jsonl, <stem>_001.jsonl, ...")
+    epack.add_argument("--model", default="gpt-4o-mini")
+    epack.add_argument("--max-requests", type=int, default=50_000,
+                       help="Requests per batch (the Batch API allows 50,000); lower it for faster turnaround")
+    epack.add_argument("--max-mb", type=float, default=200.0, help="MB of batch JSONL per batch (API limit 200)")
+    epack.add_argument("--compress", choices=["none", "gzip", "zstd"], default="none")
+    epack.add_argument("--crop", default="full", help="Crop view applied to each trace at prompt-build time")
 
     efetch = sub.add_parser("estimation-fetch", help="Fetch completed estimation batch outputs")
     efetch.add_argument("--batch-ids-jsonl", default=str(BASE_DIR / "data" / "batches" / "estimation_batch_job_ids_gpt-4o-mini.jsonl"))
     efetch.add_argument("--output-dir", default=str(BASE_DIR / "data" / "batches" / "outputs"))
+    efetch.add_argument("--compress", choices=["none", "gzip", "zstd"], default="none",
+                        help="Store downloaded output JSONL compressed (.jsonl.gz / .jsonl.zst)")
 
     eparse = sub.add_parser("estimation-parse", help="Parse estimation output JSONL into CSV")
     eparse.add_argument("--output-jsonl", required=True)
@@ -76,6 +173,7 @@ def build_parser() -> argparse.ArgumentParser:
     escore.add_argument("--parsed-csv", default=str(BASE_DIR / "data" / "results" / "estimation_parsed.csv"))
     escore.add_argument("--summary-csv", default=str(BASE_DIR / "data" / "results" / "dataset_summary.csv"))
     escore.add_argument("--scored-csv", default=str(BASE_DIR / "data" / "results" / "estimation_scored.csv"))
+    escore.add_argument("--registry", default=None, help="Group registry.sqlite to read the truth from")
 
     return parser
 
@@ -94,9 +192,52 @@ def main() -> None:
             fixed_r=args.r,
             fixed_N=args.N,
             fixed_i0=args.i0,
+            engine=args.engine,
+            counts_only=args.counts_only,
+            exact_max_N=args.exact_max_N,
+            stream=args.stream,
+            workers=args.workers,
+            storage=args.storage,
+            crops=args.crops,
+            crop_stop_early=args.crop_stop_early,
+            graph=args.graph,
+            compression=args.compress,
         )
         print(f"Dataset summary written to {summary}")
 
+    elif args.command == "mc-rho":
+        from simulation.mc_rho import run_mc_rho
+        run_mc_rho(
+            r=args.r,
+            N=args.N,
+            i0=args.i0,
+            grid=args.grid,
+            model=args.model,
+            replicates=args.replicates,
+            seed=args.seed,
+            output_csv=args.output_csv,
+        )
+
+    elif args.command == "pack-group":
+        from simulation.io import pack_group_traces
+        archives = pack_group_traces(BASE_DIR / "data" / "groups" / args.group, remove_csv=args.remove_csv)
+        print(f"Packed {len(archives)} grid points:")
+        for path in archives:
+            print(f"- {path}")
+
+    elif args.command == "dedupe":
+        from simulation.store import TraceStore, group_trace_files, group_trace_points
+        groups_dir = BASE_DIR / "data" / "groups"
+        files = group_trace_files(groups_dir, args.groups)
+        points = group_trace_points(groups_dir, args.groups)
+        stats = TraceStore(args.store_dir).dedupe(files, points=points, dry_run=args.dry_run)
+        verb = "Would link" if args.dry_run else "Linked"
+        print(
+            f"{verb} {stats.linked} of {stats.files} trace files to the store "
+            f"({stats.already_linked} already linked); {stats.bytes_saved / 1e6:.1f} MB of duplicates freed; "
+            f"{stats.points} grid points indexed for reuse"
+        )
+
     elif args.command == "send":
         from evaluation.send_batch import send_batch
         batch_id = send_batch(args.summary_csv, args.batch_jsonl, model_name=args.model)
@@ -125,12 +266,41 @@ def main() -> None:
 
     elif args.command == "classify-send":
         from evaluation.send_batch_fixation_probability import send_classify_batch
-        batch_id = send_classify_batch(args.summary_csv, args.batch_jsonl, model_name=args.model)
+        batch_id = send_classify_batch(
+            args.summary_csv, args.batch_jsonl, model_name=args.model, compression=args.compress,
+            crop=args.crop,
+        )
+        if args.registry:
+            from simulation.registry import Registry
+            with Registry(args.registry) as registry:
+                registry.add_batch(batch_id, kind="classify", model=args.model, summary_csv=args.summary_csv)
         print(f"Submitted classification batch job: {batch_id}")
 
+    elif args.command in ("classify-pack", "estimation-pack"):
+        from evaluation.batch_pack import group_pack_points
+        from simulation.registry import Registry
+        kind = args.command.removesuffix("-pack")
+        if kind == "classify":
+            from evaluation.send_batch_fixation_probability import send_packed_classify_batches as send_packed
+        else:
+            from evaluation.send_batch_estimation import send_packed_estimation_batches as send_packed
+        groups_dir = BASE_DIR / "data" / "groups"
+        batch_ids_name = f"{kind}_batch_job_ids_{args.model}.jsonl"
+        points = [point for group in args.groups for point in group_pack_points(groups_dir / group, batch_ids_name)]
+        batch_ids = send_packed(
+            points, args.batch_jsonl, model_name=args.model, max_requests=args.max_requests,
+            max_bytes=int(args.max_mb * 2**20), compression=args.compress, crop=args.crop,
+        )
+        for group in args.groups:
+            with Registry.for_group(groups_dir / group) as registry:
+                registry.import_batch_ids(groups_dir / group / "batches" / batch_ids_name, kind=kind)
+        print(f"Submitted {len(batch_ids)} packed {kind} batch(es) for {len(points)} points")
+
     elif args.command == "classify-fetch":
         from evaluation.fetch_batch_fixation_probability import fetch_classify_batches
-        outputs = fetch_classify_batches(args.batch_ids_jsonl, args.output_dir, verbose=True)
+        outputs = fetch_classify_batches(
+            args.batch_ids_jsonl, args.output_dir, verbose=True, compression=args.compress
+        )
         print("Downloaded classification outputs:")
         for path in outputs:
             print(f"- {path}")
@@ -142,17 +312,26 @@ def main() -> None:
 
     elif args.command == "classify-vote":
         from evaluation.vote_fixation_probability import run_vote
-        voted = run_vote(args.parsed_csv, args.summary_csv, args.voted_csv)
+        voted = run_vote(args.parsed_csv, args.summary_csv, args.voted_csv, registry=args.registry)
         print(f"Voted results written to {voted}")
 
     elif args.command == "estimation-send":
         from evaluation.send_batch_estimation import send_estimation_batch
-        batch_id = send_estimation_batch(args.summary_csv, args.batch_jsonl, model_name=args.model)
+        batch_id = send_estimation_batch(
+            args.summary_csv, args.batch_jsonl, model_name=args.model, compression=args.compress,
+            crop=args.crop,
+        )
+        if args.registry:
+            from simulation.registry import Registry
+            with Registry(args.registry) as registry:
+                registry.add_batch(batch_id, kind="estimation", model=args.model, summary_csv=args.summary_csv)
         print(f"Submitted estimation batch job: {batch_id}")
 
     elif args.command == "estimation-fetch":
         from evaluation.fetch_batch_estimation import fetch_estimation_batches
-        outputs = fetch_estimation_batches(args.batch_ids_jsonl, args.output_dir, verbose=True)
+        outputs = fetch_estimation_batches(
+            args.batch_ids_jsonl, args.output_dir, verbose=True, compression=args.compress
+        )
         print("Downloaded estimation outputs:")
         for path in outputs:
             print(f"- {path}")
@@ -164,7 +343,7 @@ def main() -> None:
 
     elif args.command == "estimation-score":
         from evaluation.score_estimation import score_estimation
-        scored = score_estimation(args.parsed_csv, args.summary_csv, args.scored_csv)
+        scored = score_estimation(args.parsed_csv, args.summary_csv, args.scored_csv, registry=args.registry)
         print(f"Scored estimation results written to {scored}")
 
 
@@ -34,7 +34,11 @@ def rho_i(i: int, N: int, r: float) -> float:
     """Standard Moran-process fixation probability."""
     if abs(r - 1.0) < 1e-14:
         return i / N
-    return (1.0 - r ** (-i)) / (1.0 - r ** (-N))
+    log_r = math.log(r)
+    if r > 1.0:
+        return math.expm1(-i * log_r) / math.expm1(-N * log_r)
+    # For r < 1, scale numerator and denominator by r^N so large N cannot overflow.
+    return math.exp((N - i) * log_r) * math.expm1(i * log_r) / math.expm1(N * log_r)
 
 
 def solve_r_for_target(
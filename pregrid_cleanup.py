@@ -13,6 +13,8 @@ import argparse
 import shutil
 from pathlib import Path
 
+from simulation.io import stored_variants
+
 
 def remove_file(path: Path, verbose: bool = True) -> None:
     if path.exists() and path.is_file():
@@ -41,7 +43,7 @@ def pregrid_cleanup(base_dir: str | Path = "data", dry_run: bool = False) -> Non
     files_to_remove = [
         # Batch IDs
         batches_dir / "classify_batch_job_ids_gpt-4o-mini.jsonl",
-        batches_dir / "classify_batch.jsonl",
+        *stored_variants(batches_dir / "classify_batch.jsonl"),
         # Accumulated results
         results_dir / "classify_voted.csv",
         results_dir / "classify_parsed.csv",
@@ -50,7 +52,7 @@ def pregrid_cleanup(base_dir: str | Path = "data", dry_run: bool = False) -> Non
 
     glob_patterns = [
         (results_dir, "classify_parsed_batch_*.csv"),
-        (outputs_dir, "*_classify_output.jsonl"),
+        (outputs_dir, "*_classify_output.jsonl*"),
         (outputs_dir, "*_classify_errors.jsonl"),
     ]
 
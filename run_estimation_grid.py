@@ -3,7 +3,7 @@ from __future__ import annotations
 """
 Grid runner for r estimation pipeline.
 
-Define your (r, i0) pairs in GRID, set N, REPLICATES, MODEL, then run:
+Define your (r, i0) pairs and N in simulation/grids.py, set REPLICATES, MODEL, then run:
 
     python run_estimation_grid.py --group my_experiment
 
@@ -17,37 +17,42 @@ Then visualize:
 """
 
 import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import csv
+from itertools import chain
 import json
-import shutil
-import subprocess
-import sys
 from pathlib import Path
+import tempfile
+import time
+from typing import Iterator
+
+from evaluation.batch_pack import MAX_BATCH_BYTES, MAX_BATCH_REQUESTS, PackPoint, demux_parsed, point_label
+from evaluation.timing import StageTimer
+from simulation.absorption import format_budget_table
+from simulation.generate_dataset import generate_dataset
+from simulation.grids import ESTIMATION_GRID, ESTIMATION_N
+from simulation.io import TRACE_ARCHIVE_SUFFIX, archive_ref, pack_trace_csvs, plain_path
+from simulation.registry import Registry
+from simulation.seedstore import GENERATOR_VERSION, SeedRef
+from simulation.store import TraceStore, point_key, trace_suffix
 
 # ── Configure your grid here ─────────────────────────────────────────────────
-NUM = 13
-NUM2 = 9
-NUM3 = 11
-
-GRID = [
-    # (r,    i0)
-    (0.25,   NUM),
-    (0.5,    NUM),
-    (0.75,   NUM),
-    (1,      NUM),
-    (1.25,   NUM),
-    (1.5,    NUM),
-    (1.75,   NUM),
-]
-
-N          = 15
+# The (r, i0) points and N live in simulation/grids.py, where mc-rho --grid reads them too.
+GRID       = ESTIMATION_GRID
+N          = ESTIMATION_N
 REPLICATES = 20
 MODEL      = "gpt-4o-mini"
 SEED       = 42
+SEED_STORAGE_ENGINE = "indexed"   # engine behind --storage seed references
+ENGINE     = "reference"  # engine for csv/archive storage; part of the trace store key
+# Pinned rather than "auto", so a grid does not change with the environment.
+# Groups made before the trace store used the reference engine too, so the
+# points `main.py dedupe` migrates from them are linked, not re-simulated.
 
 # ─────────────────────────────────────────────────────────────────────────────
 
 GROUPS_DIR = Path("data/groups")
+STORE_DIR  = Path("data/store")
 
 
 def group_paths(group: str) -> dict[str, Path]:
@@ -66,7 +71,7 @@ def group_paths(group: str) -> dict[str, Path]:
     }
 
 
-def init_group(group: str) -> None:
+def init_group(group: str, storage: str = "csv") -> None:
     paths = group_paths(group)
     for key, p in paths.items():
         if key not in ("batch_ids", "scored_csv", "group_json"):
@@ -80,101 +85,242 @@ def init_group(group: str) -> None:
             "N": N,
             "replicates": REPLICATES,
             "model": MODEL,
+            "engine": ENGINE,
+            "seed": SEED,
             "points": [],
         }, indent=2))
         print(f"Created estimation group: {group}")
     else:
         print(f"Appending to existing estimation group: {group}")
 
-
-def register_point(group: str, r: float, i0: int) -> None:
-    paths = group_paths(group)
-    gj = paths["group_json"]
+    if storage == "seed":
+        # Traces in this group are regenerated from seed references.
+        meta = json.loads(gj.read_text())
+        meta.update({
+            "storage": "seed",
+            "generator_version": GENERATOR_VERSION,
+            "engine": SEED_STORAGE_ENGINE,
+            "seed": SEED,
+        })
+        gj.write_text(json.dumps(meta, indent=2))
+    elif storage == "archive":
+        meta = json.loads(gj.read_text())
+        meta["storage"] = "archive"
+        gj.write_text(json.dumps(meta, indent=2))
+
+
+def register_points(group: str, points: list[dict[str, float | int]]) -> None:
+    """Mirror the registry's points into group.json with a single rewrite."""
+    gj = group_paths(group)["group_json"]
     meta = json.loads(gj.read_text())
-    entry = {"r": r, "i0": i0}
-    if entry not in meta["points"]:
-        meta["points"].append(entry)
+    for entry in points:
+        if entry not in meta["points"]:
+            meta["points"].append(entry)
     gj.write_text(json.dumps(meta, indent=2))
 
 
-def run(cmd: list[str]) -> None:
-    print(f"\n>>> {' '.join(str(c) for c in cmd)}")
-    subprocess.run(cmd, check=True)
+def prepare_point(
+    group: str, r: float, i0: int, storage: str = "csv", compression: str = "none"
+) -> tuple[Path, list[dict[str, object]], StageTimer]:
+    """Simulate (or link) one point's traces and write its summary CSV.
 
-
-def simulate_and_send(group: str) -> None:
-    init_group(group)
+    Runs in a worker process under --jobs; it writes only files of its own
+    point, and the caller records the returned summary rows in the registry.
+    """
+    paths = group_paths(group)
+    store = TraceStore(STORE_DIR)
+    timer = StageTimer()
+    print(f"\n── Point: r={r}, i0={i0} ──")
+
+    run_ids = [f"exp001_run{rep:02d}" for rep in range(1, REPLICATES + 1)]
+    raw_point_dir = paths["raw"] / f"r{r}_i{i0}"
+    archive_path = paths["base"] / "archive" / f"r{r}_i{i0}{TRACE_ARCHIVE_SUFFIX}"
+    key = point_key(engine=ENGINE, r=r, N=N, i0=i0, seed=SEED)
+    stored_runs = store.lookup_point(key) if storage == "csv" else None
+    if stored_runs is not None and all(run_id in stored_runs for run_id in run_ids):
+        print(f"   All {REPLICATES} traces already in {STORE_DIR}; linking instead of simulating")
+    elif storage in ("csv", "archive"):
+        # Simulate into a private workspace inside the group instead of the shared data/raw
+        with tempfile.TemporaryDirectory(prefix=f"r{r}_i{i0}_", dir=paths["base"]) as work:
+            raw_dir = Path(work) / "data" / "raw"
+            with timer.stage("simulate"):
+                generate_dataset(
+                    num_experiments=1,
+                    replicates=REPLICATES,
+                    seed=SEED,
+                    base_dir=work,
+                    fixed_r=r,
+                    fixed_N=N,
+                    fixed_i0=i0,
+                    engine=ENGINE,
+                    compression=compression,
+                )
+
+            with timer.stage("store"):
+                if storage == "archive":
+                    # Pack all replicates of the point into one archive file
+                    pack_trace_csvs(raw_dir.glob("*.csv*"), archive_path, r=r, N=N, i0=i0)
+                else:
+                    # Store traces by content; the group gets hardlinks
+                    stored_runs = {
+                        csv_file.name[: -len(trace_suffix(csv_file))]: store.put(csv_file)
+                        for csv_file in raw_dir.glob("*.csv*")
+                    }
+                    store.record_point(key, stored_runs, {"engine": ENGINE, "r": r, "N": N, "i0": i0, "seed": SEED})
+    if storage == "csv":
+        trace_paths = {run_id: store.link(stored_runs[run_id], raw_point_dir, run_id) for run_id in run_ids}
+
+    # Write summary CSV with correct trace paths
+    summary_path = paths["summaries"] / f"summary_r{r}_i{i0}.csv"
+    fieldnames = ["run_id", "trace_csv", "meta_json", "true_r", "true_N", "true_i0", "num_events_full"]
+    rows = []
+    for run_id in run_ids:
+        if storage == "seed":
+            trace = str(SeedRef(engine=SEED_STORAGE_ENGINE, r=r, N=N, i0=i0, seed=SEED, run_id=run_id))
+        elif storage == "archive":
+            trace = archive_ref(archive_path, run_id)
+        else:
+            trace = str(trace_paths[run_id])
+        rows.append({"run_id": run_id, "trace_csv": trace,
+                     "meta_json": "", "true_r": r, "true_N": N,
+                     "true_i0": i0, "num_events_full": ""})
+    with summary_path.open("w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(rows)
+    return summary_path, rows, timer
+
+
+def prepared_points(
+    group: str, points: list[tuple[float, int]], storage: str, compression: str, jobs: int
+) -> Iterator[tuple[float, int, Path, list[dict[str, object]], StageTimer]]:
+    """prepare_point for each of ``points``; in completion order when jobs > 1.
+
+    A point that fails is reported and left out; the next run retries it.
+    """
+    if jobs <= 1:
+        for r, i0 in points:
+            try:
+                yield (r, i0, *prepare_point(group, r, i0, storage, compression))
+            except Exception as exc:
+                print(f"   WARNING: preparing r={r}, i0={i0} failed: {exc}")
+        return
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {pool.submit(prepare_point, group, r, i0, storage, compression): (r, i0) for r, i0 in points}
+        for future in as_completed(futures):
+            r, i0 = futures[future]
+            try:
+                result = future.result()
+            except Exception as exc:
+                print(f"   WARNING: preparing r={r}, i0={i0} failed: {exc}")
+                continue
+            yield (r, i0, *result)
+
+
+def simulate_and_send(
+    group: str,
+    storage: str = "csv",
+    compression: str = "none",
+    jobs: int = 1,
+    pack: bool = False,
+    max_requests: int = MAX_BATCH_REQUESTS,
+    max_bytes: int = MAX_BATCH_BYTES,
+) -> None:
+    init_group(group, storage)
     paths = group_paths(group)
+    registry = Registry.for_group(paths["base"])
+    timer = StageTimer()
+
+    from evaluation.client import make_client
+    from evaluation.send_batch_estimation import send_estimation_point, send_packed_estimation_batches
+    client = make_client()  # one client for every batch of the grid
 
     print(f"\n{'='*60}")
     print(f"Estimation group: {group}")
     print(f"Running {len(GRID)} grid points | N={N}, replicates={REPLICATES}, model={MODEL}")
     print(f"{'='*60}")
-
+    print(format_budget_table(GRID, N, REPLICATES))
+
+    # Register points in grid order first so group.json keeps that order under --jobs.
+    # Each point resumes after its last checkpoint; points with a batch are skipped.
+    registry.import_batch_ids(paths["batch_ids"], kind="estimation")
+    to_prepare: list[tuple[float, int]] = []
+    to_send: list[tuple[float, int, Path, list[dict[str, object]] | None, StageTimer]] = []
+    submitted = 0
     for r, i0 in GRID:
-        print(f"\n── Point: r={r}, i0={i0} ──")
-
-        # Clean shared temp dirs
-        for d in [Path("data/raw"), Path("data/cropped")]:
-            if d.exists():
-                shutil.rmtree(d)
-        for f in [Path("data/results/dataset_summary.csv")]:
-            if f.exists():
-                f.unlink()
-
-        # Simulate
-        run([sys.executable, "main.py", "simulate",
-             "--num-experiments", "1",
-             "--replicates", str(REPLICATES),
-             "--N", str(N),
-             "--r", str(r),
-             "--i0", str(i0),
-             "--seed", str(SEED),
-        ])
-
-        # Copy raw traces into group
-        raw_point_dir = paths["raw"] / f"r{r}_i{i0}"
-        raw_point_dir.mkdir(parents=True, exist_ok=True)
-        for csv_file in Path("data/raw").glob("*.csv"):
-            shutil.copy(csv_file, raw_point_dir / csv_file.name)
-
-        # Write summary CSV with correct trace paths
+        stage = registry.point_stage(registry.add_point(r, i0, N))
         summary_path = paths["summaries"] / f"summary_r{r}_i{i0}.csv"
-        fieldnames = ["run_id", "trace_csv", "meta_json", "true_r", "true_N", "true_i0", "num_events_full"]
-        rows = []
-        for rep in range(1, REPLICATES + 1):
-            run_id = f"exp001_run{rep:02d}"
-            trace = raw_point_dir / f"{run_id}.csv"
-            rows.append({"run_id": run_id, "trace_csv": str(trace),
-                         "meta_json": "", "true_r": r, "true_N": N,
-                         "true_i0": i0, "num_events_full": ""})
-        with summary_path.open("w", newline="", encoding="utf-8") as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(rows)
-
-        # Send estimation batch
-        batch_jsonl = paths["batches"] / "estimation_batch.jsonl"
-        run([sys.executable, "main.py", "estimation-send",
-             "--summary-csv", str(summary_path),
-             "--batch-jsonl", str(batch_jsonl),
-             "--model", MODEL,
-        ])
-
-        # Move batch IDs into group
-        default_ids = Path(f"data/batches/estimation_batch_job_ids_{MODEL}.jsonl")
-        if default_ids.exists():
-            with default_ids.open("r") as src, paths["batch_ids"].open("a") as dst:
-                for line in src:
-                    record = json.loads(line)
-                    record["summary_csv"] = str(summary_path)
-                    record["r"] = r
-                    record["i0"] = i0
-                    dst.write(json.dumps(record) + "\n")
-            default_ids.unlink()
-
-        register_point(group, r, i0)
-        print(f"✓ r={r}, i0={i0} registered to estimation group '{group}'")
+        if stage == "batch_created":
+            submitted += 1
+        elif stage is not None and summary_path.exists():
+            to_send.append((r, i0, summary_path, None, StageTimer()))
+        else:
+            to_prepare.append((r, i0))
+    print(f"\n{submitted} point(s) already submitted, {len(to_send)} to resume, {len(to_prepare)} to simulate")
+
+    pack_points: list[PackPoint] = []
+    pack_ids: dict[str, int] = {}   # label -> point_id of the packed points
+    failed = 0
+    start = time.perf_counter()
+    # Resumed points first (rows None: already recorded), then points as they are prepared
+    for r, i0, summary_path, rows, point_timer in chain(
+        to_send, prepared_points(group, to_prepare, storage, compression, jobs)
+    ):
+        point_id = registry.add_point(r, i0, N, summary_path)
+        if rows is not None:
+            timer.merge(point_timer)
+            registry.add_runs(point_id, rows)
+            registry.mark_stage(point_id, "simulated")
+
+        if pack:
+            # Submitted together with the other points after the loop
+            label = point_label(group, summary_path)
+            pack_points.append(PackPoint(label, summary_path, paths["batch_ids"]))
+            pack_ids[label] = point_id
+        else:
+            # Send estimation batch
+            try:
+                with timer.stage("send"):
+                    batch_id = send_estimation_point(
+                        registry, point_id, summary_path, paths["batches"] / f"estimation_batch_r{r}_i{i0}.jsonl",
+                        MODEL, compression=compression, client=client,
+                    )
+            except Exception as exc:
+                failed += 1
+                stage = registry.point_stage(point_id)
+                print(f"   WARNING: sending r={r}, i0={i0} failed after stage '{stage}': {exc}")
+                continue
+            print(f"   Submitted estimation batch job: {batch_id}")
+            print(f"✓ r={r}, i0={i0} registered to estimation group '{group}'")
+
+    if pack_points:
+        def checkpoint(shard: Path, file_id: str, batch_id: str, labels: list[str]) -> None:
+            for label in labels:
+                registry.mark_stage(pack_ids[label], "prompts_built", shard)
+                registry.mark_stage(pack_ids[label], "uploaded", file_id)
+                registry.mark_stage(pack_ids[label], "batch_created", batch_id)
+
+        # Failed points or shards are skipped; their points stay unsubmitted for the next run
+        with timer.stage("send"):
+            send_packed_estimation_batches(
+                pack_points, paths["batches"] / "estimation_batch.jsonl", model_name=MODEL, max_requests=max_requests,
+                max_bytes=max_bytes, compression=compression, client=client, on_submitted=checkpoint,
+            )
+        registry.import_batch_ids(paths["batch_ids"], kind="estimation")
+        unsent = [label for label, point_id in pack_ids.items() if registry.point_stage(point_id) != "batch_created"]
+        failed += len(unsent)
+        if unsent:
+            print(f"   WARNING: {len(unsent)} packed point(s) not submitted: {', '.join(unsent)}")
+
+    # group.json lists only points that have a batch
+    register_points(group, registry.points(submitted=True))
+    registry.close()
+
+    print(f"\n{timer.report()}")
+    print(f"Wall time: {time.perf_counter() - start:.2f} s with --jobs {jobs}")
+
+    if failed:
+        print(f"\n{failed} point(s) failed; re-run the same command to retry only those.")
 
     print(f"\n{'='*60}")
     print(f"All batches submitted to group '{group}'.")
@@ -183,44 +329,65 @@ def simulate_and_send(group: str) -> None:
     print(f"{'='*60}")
 
 
-def fetch_parse_score(group: str) -> None:
+def fetch_parse_score(group: str, compression: str = "none") -> None:
     paths = group_paths(group)
+    timer = StageTimer()
+
+    from evaluation.client import make_client
+    from evaluation.fetch_batch_estimation import fetch_estimation_batches
+    from evaluation.parse_outputs_estimation import parse_estimation_outputs
+    from evaluation.score_estimation import score_estimation
+    client = make_client()
 
     print(f"\n{'='*60}")
     print(f"Fetching, parsing, and scoring for estimation group: {group}")
     print(f"{'='*60}")
 
-    run([sys.executable, "main.py", "estimation-fetch",
-         "--batch-ids-jsonl", str(paths["batch_ids"]),
-         "--output-dir", str(paths["outputs"]),
-    ])
+    with timer.stage("fetch"):
+        fetch_estimation_batches(paths["batch_ids"], paths["outputs"], verbose=True, compression=compression, client=client)
 
-    output_files = sorted(paths["outputs"].glob("*_estimation_output.jsonl"))
+    output_files = sorted(paths["outputs"].glob("*_estimation_output.jsonl*"))
     if not output_files:
         print("\nNo completed output files found. Batches may still be in progress.")
+        print(f"\n{timer.report()}")
         return
 
-    print(f"\nFound {len(output_files)} output file(s) to process.")
-
-    for output_jsonl in output_files:
+    registry = Registry.for_group(paths["base"])
+    # Groups created before the registry only have the batch IDs file; index it once.
+    registry.import_batch_ids(paths["batch_ids"], kind="estimation")
+    # One output per batch: a batch stored both plain and compressed (e.g. after
+    # changing --compress) must still be parsed once.
+    done = {batch_id for _, batch_id in registry.parsed_outputs()}
+    new_files = []
+    for f in output_files:
+        batch_id = plain_path(f).name.replace("_estimation_output.jsonl", "")
+        if batch_id not in done and not registry.is_processed(f):
+            done.add(batch_id)
+            new_files.append(f)
+    print(f"\nFound {len(output_files)} output file(s), {len(new_files)} not processed yet.")
+
+    for output_jsonl in new_files:
         print(f"\n── Processing: {output_jsonl.name} ──")
-        batch_id = output_jsonl.name.replace("_estimation_output.jsonl", "")
-        summary_csv = _find_summary(paths["batch_ids"], batch_id)
+        batch_id = plain_path(output_jsonl).name.replace("_estimation_output.jsonl", "")
+        summaries = registry.summaries_for_batch(batch_id)
 
-        if summary_csv is None:
+        if not summaries:
             print(f"   WARNING: No summary found for {batch_id}, skipping.")
             continue
 
+        registry.add_output(output_jsonl, batch_id)
         parsed_csv = paths["parsed"] / f"estimation_parsed_{batch_id}.csv"
-        run([sys.executable, "main.py", "estimation-parse",
-             "--output-jsonl", str(output_jsonl),
-             "--parsed-csv", str(parsed_csv),
-        ])
-        run([sys.executable, "main.py", "estimation-score",
-             "--parsed-csv", str(parsed_csv),
-             "--summary-csv", str(summary_csv),
-             "--scored-csv", str(paths["scored_csv"]),
-        ])
+        with timer.stage("parse"):
+            parse_estimation_outputs(output_jsonl, parsed_csv)
+        # Packed batches hold several points; score each against its own summary
+        for label, point_parsed in demux_parsed(parsed_csv, summaries).items():
+            with timer.stage("score"):
+                score_estimation(point_parsed, summaries[label], paths["scored_csv"], registry=registry.path)
+        registry.mark_processed(output_jsonl, parsed_csv)
+
+    registry.close()
+
+    print(f"\n{timer.report()}")
 
     print(f"\n{'='*60}")
     print(f"Done. Visualize with:")
@@ -228,22 +395,6 @@ def fetch_parse_score(group: str) -> None:
     print(f"{'='*60}")
 
 
-def _find_summary(batch_ids_file: Path, batch_id: str) -> Path | None:
-    if not batch_ids_file.exists():
-        return None
-    with batch_ids_file.open("r") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            record = json.loads(line)
-            if record.get("batch_job_id") == batch_id:
-                p = Path(record["summary_csv"])
-                if p.exists():
-                    return p
-    return None
-
-
 def main() -> None:
     parser = argparse.ArgumentParser(
         description="Run grid simulation and r estimation batches within a named group."
@@ -251,12 +402,38 @@ def main() -> None:
     parser.add_argument("--group", required=True, help="Group name (e.g. r_estimation_N20)")
     parser.add_argument("--fetch-parse-score", dest="fetch_parse_score", action="store_true",
                         help="Fetch completed batches and process them")
+    parser.add_argument("--storage", choices=["csv", "seed", "archive"], default="csv",
+                        help="seed: store per-run seed references instead of trace CSVs; "
+                             "traces are regenerated when prompts are built. "
+                             "archive: pack each point's traces into one archive/r{r}_i{i0}.mtrace file")
+    parser.add_argument("--compress", choices=["none", "gzip", "zstd"], default="none",
+                        help="Store trace CSVs, batch JSONL and downloaded outputs compressed "
+                             "(zstd needs the zstandard package)")
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="Simulate and prepare this many grid points at once in a process pool; "
+                             "batches are still submitted from the main process as points finish")
+    parser.add_argument("--pack", action="store_true",
+                        help="Submit all points together in as few batches as the API limits allow "
+                             "instead of one batch per point")
+    parser.add_argument("--shard-requests", type=int, default=MAX_BATCH_REQUESTS,
+                        help="With --pack, at most this many requests per batch; lower it for faster turnaround")
+    parser.add_argument("--shard-mb", type=float, default=MAX_BATCH_BYTES / 2**20,
+                        help="With --pack, at most this many MB of batch JSONL per batch")
+    parser.add_argument("--budget", action="store_true",
+                        help="Only print the predicted events, bytes and tokens for the grid")
     args = parser.parse_args()
 
+    if args.budget:
+        print(format_budget_table(GRID, N, REPLICATES))
+        return
+
     if args.fetch_parse_score:
-        fetch_parse_score(args.group)
+        fetch_parse_score(args.group, args.compress)
     else:
-        simulate_and_send(args.group)
+        simulate_and_send(
+            args.group, args.storage, args.compress, args.jobs,
+            pack=args.pack, max_requests=args.shard_requests, max_bytes=int(args.shard_mb * 2**20),
+        )
 
 
 if __name__ == "__main__":
@@ -3,7 +3,7 @@ from __future__ import annotations
 """
 Grid runner for fixation probability classification.
 
-Define your (r, i0) pairs in GRID, set N, REPLICATES, MODEL, then run:
+Define your (r, i0) pairs and N in simulation/grids.py, set REPLICATES, MODEL, then run:
 
     python run_grid.py --group my_experiment
 
@@ -20,62 +20,43 @@ Then visualize:
 """
 
 import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import csv
+from itertools import chain
 import json
-import shutil
-import subprocess
-import sys
 from pathlib import Path
+import tempfile
+import time
+from typing import Iterator
+
+from evaluation.batch_pack import MAX_BATCH_BYTES, MAX_BATCH_REQUESTS, PackPoint, demux_parsed, point_label
+from evaluation.timing import StageTimer
+from simulation.absorption import format_budget_table
+from simulation.generate_dataset import generate_dataset
+from simulation.grids import CLASSIFY_GRID, CLASSIFY_N
+from simulation.io import TRACE_ARCHIVE_SUFFIX, archive_ref, pack_trace_csvs, plain_path
+from simulation.registry import Registry
+from simulation.seedstore import GENERATOR_VERSION, SeedRef
+from simulation.store import TraceStore, point_key, trace_suffix
 
 # ── Configure your grid here ─────────────────────────────────────────────────
 
-GRID = [
-    (1.6666, 1),   # rho = 0.4000
-    (1.2883, 2),   # rho = 0.4000
-    (1.5810, 2),   # rho = 0.6000
-    (1.1754, 3),   # rho = 0.4000
-    (1.3557, 3),   # rho = 0.6000
-    (1.1161, 4),   # rho = 0.4000
-    (1.2522, 4),   # rho = 0.6000
-    (1.0766, 5),   # rho = 0.4000
-    (1.1904, 5),   # rho = 0.6000
-    (1.0466, 6),   # rho = 0.4000
-    (1.1473, 6),   # rho = 0.6000
-    (1.0218, 7),   # rho = 0.4000
-    (1.1143, 7),   # rho = 0.6000
-    (1.0000, 8),   # rho = 0.4000
-    (1.0870, 8),   # rho = 0.6000
-    (0.9798, 9),   # rho = 0.4000
-    (1.0631, 9),   # rho = 0.6000
-    (0.9603, 10),   # rho = 0.4000
-    (1.0414, 10),   # rho = 0.6000
-    (0.9406, 11),   # rho = 0.4000
-    (1.0206, 11),   # rho = 0.6000
-    (0.9200, 12),   # rho = 0.4000
-    (1.0000, 12),   # rho = 0.6000
-    (0.8975, 13),   # rho = 0.4000
-    (0.9786, 13),   # rho = 0.6000
-    (0.8716, 14),   # rho = 0.4000
-    (0.9555, 14),   # rho = 0.6000
-    (0.8401, 15),   # rho = 0.4000
-    (0.9289, 15),   # rho = 0.6000
-    (0.7986, 16),   # rho = 0.4000
-    (0.8960, 16),   # rho = 0.6000
-    (0.7376, 17),   # rho = 0.4000
-    (0.8508, 17),   # rho = 0.6000
-    (0.6325, 18),   # rho = 0.4000
-    (0.7762, 18),   # rho = 0.6000
-    (0.4000, 19),   # rho = 0.4000
-    (0.6000, 19),   # rho = 0.6000
-]
-N          = 20
+# The (r, i0) points and N live in simulation/grids.py, where mc-rho --grid reads them too.
+GRID       = CLASSIFY_GRID
+N          = CLASSIFY_N
 REPLICATES = 20
 MODEL      = "gpt-4o-mini"
 SEED       = 17
+SEED_STORAGE_ENGINE = "indexed"   # engine behind --storage seed references
+ENGINE     = "reference"  # engine for csv/archive storage; part of the trace store key
+# Pinned rather than "auto", so a grid does not change with the environment.
+# Groups made before the trace store used the reference engine too, so the
+# points `main.py dedupe` migrates from them are linked, not re-simulated.
 
 # ─────────────────────────────────────────────────────────────────────────────
 
 GROUPS_DIR = Path("data/groups")
+STORE_DIR  = Path("data/store")
 
 
 def group_dir(group: str) -> Path:
@@ -98,7 +79,7 @@ def group_paths(group: str) -> dict[str, Path]:
     }
 
 
-def init_group(group: str) -> None:
+def init_group(group: str, storage: str = "csv") -> None:
     paths = group_paths(group)
     for key, p in paths.items():
         if key not in ("batch_ids", "voted_csv", "group_json"):
@@ -111,28 +92,40 @@ def init_group(group: str) -> None:
             "N": N,
             "replicates": REPLICATES,
             "model": MODEL,
+            "engine": ENGINE,
+            "seed": SEED,
             "points": [],
         }, indent=2))
         print(f"Created group: {group}")
     else:
         print(f"Appending to existing group: {group}")
 
-
-def register_point(group: str, r: float, i0: int) -> None:
-    paths = group_paths(group)
-    gj = paths["group_json"]
+    if storage == "seed":
+        # Traces in this group are regenerated from seed references.
+        meta = json.loads(gj.read_text())
+        meta.update({
+            "storage": "seed",
+            "generator_version": GENERATOR_VERSION,
+            "engine": SEED_STORAGE_ENGINE,
+            "seed": SEED,
+        })
+        gj.write_text(json.dumps(meta, indent=2))
+    elif storage == "archive":
+        meta = json.loads(gj.read_text())
+        meta["storage"] = "archive"
+        gj.write_text(json.dumps(meta, indent=2))
+
+
+def register_points(group: str, points: list[dict[str, float | int]]) -> None:
+    """Mirror the registry's points into group.json with a single rewrite."""
+    gj = group_paths(group)["group_json"]
     meta = json.loads(gj.read_text())
-    entry = {"r": r, "i0": i0}
-    if entry not in meta["points"]:
-        meta["points"].append(entry)
+    for entry in points:
+        if entry not in meta["points"]:
+            meta["points"].append(entry)
     gj.write_text(json.dumps(meta, indent=2))
 
 
-def run(cmd: list[str]) -> None:
-    print(f"\n>>> {' '.join(str(c) for c in cmd)}")
-    subprocess.run(cmd, check=True)
-
-
 def make_summary_csv(r: float, i0: int, summary_path: Path) -> None:
     summary_path.parent.mkdir(parents=True, exist_ok=True)
     fieldnames = ["run_id", "trace_csv", "meta_json", "true_r", "true_N", "true_i0", "num_events_full"]
@@ -147,83 +140,221 @@ def make_summary_csv(r: float, i0: int, summary_path: Path) -> None:
         writer.writerows(rows)
 
 
-def simulate_and_send(group: str) -> None:
-    init_group(group)
+def prepare_point(
+    group: str, r: float, i0: int, storage: str = "csv", compression: str = "none"
+) -> tuple[Path, list[dict[str, object]], StageTimer]:
+    """Simulate (or link) one point's traces and write its summary CSV.
+
+    Runs in a worker process under --jobs; it writes only files of its own
+    point, and the caller records the returned summary rows in the registry.
+    """
+    paths = group_paths(group)
+    store = TraceStore(STORE_DIR)
+    timer = StageTimer()
+    print(f"\n── Point: r={r}, i0={i0} ──")
+
+    run_ids = [f"exp001_run{rep:02d}" for rep in range(1, REPLICATES + 1)]
+    raw_point_dir = paths["raw"] / f"r{r}_i{i0}"
+    archive_path = paths["base"] / "archive" / f"r{r}_i{i0}{TRACE_ARCHIVE_SUFFIX}"
+    key = point_key(engine=ENGINE, r=r, N=N, i0=i0, seed=SEED)
+    stored_runs = store.lookup_point(key) if storage == "csv" else None
+    if stored_runs is not None and all(run_id in stored_runs for run_id in run_ids):
+        print(f"   All {REPLICATES} traces already in {STORE_DIR}; linking instead of simulating")
+    elif storage in ("csv", "archive"):
+        # Simulate into a private workspace inside the group instead of the shared data/raw
+        with tempfile.TemporaryDirectory(prefix=f"r{r}_i{i0}_", dir=paths["base"]) as work:
+            raw_dir = Path(work) / "data" / "raw"
+            with timer.stage("simulate"):
+                generate_dataset(
+                    num_experiments=1,
+                    replicates=REPLICATES,
+                    seed=SEED,
+                    base_dir=work,
+                    fixed_r=r,
+                    fixed_N=N,
+                    fixed_i0=i0,
+                    engine=ENGINE,
+                    compression=compression,
+                )
+
+            with timer.stage("store"):
+                if storage == "archive":
+                    # Pack all replicates of the point into one archive file
+                    pack_trace_csvs(raw_dir.glob("*.csv*"), archive_path, r=r, N=N, i0=i0)
+                else:
+                    # Store traces by content; the group gets hardlinks
+                    stored_runs = {
+                        csv_file.name[: -len(trace_suffix(csv_file))]: store.put(csv_file)
+                        for csv_file in raw_dir.glob("*.csv*")
+                    }
+                    store.record_point(key, stored_runs, {"engine": ENGINE, "r": r, "N": N, "i0": i0, "seed": SEED})
+    if storage == "csv":
+        trace_paths = {run_id: store.link(stored_runs[run_id], raw_point_dir, run_id) for run_id in run_ids}
+
+    # Build summary CSV pointing at group raw dir
+    summary_path = paths["summaries"] / f"summary_r{r}_i{i0}.csv"
+    # Write summary with correct trace_csv paths
+    summary_path.parent.mkdir(parents=True, exist_ok=True)
+    fieldnames = ["run_id", "trace_csv", "meta_json", "true_r", "true_N", "true_i0", "num_events_full"]
+    rows = []
+    for run_id in run_ids:
+        if storage == "seed":
+            trace = str(SeedRef(engine=SEED_STORAGE_ENGINE, r=r, N=N, i0=i0, seed=SEED, run_id=run_id))
+        elif storage == "archive":
+            trace = archive_ref(archive_path, run_id)
+        else:
+            trace = str(trace_paths[run_id])
+        rows.append({"run_id": run_id, "trace_csv": trace,
+                     "meta_json": "", "true_r": r, "true_N": N,
+                     "true_i0": i0, "num_events_full": ""})
+    with summary_path.open("w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(rows)
+    return summary_path, rows, timer
+
+
+def prepared_points(
+    group: str, points: list[tuple[float, int]], storage: str, compression: str, jobs: int
+) -> Iterator[tuple[float, int, Path, list[dict[str, object]], StageTimer]]:
+    """prepare_point for each of ``points``; in completion order when jobs > 1.
+
+    A point that fails is reported and left out; the next run retries it.
+    """
+    if jobs <= 1:
+        for r, i0 in points:
+            try:
+                yield (r, i0, *prepare_point(group, r, i0, storage, compression))
+            except Exception as exc:
+                print(f"   WARNING: preparing r={r}, i0={i0} failed: {exc}")
+        return
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {pool.submit(prepare_point, group, r, i0, storage, compression): (r, i0) for r, i0 in points}
+        for future in as_completed(futures):
+            r, i0 = futures[future]
+            try:
+                result = future.result()
+            except Exception as exc:
+                print(f"   WARNING: preparing r={r}, i0={i0} failed: {exc}")
+                continue
+            yield (r, i0, *result)
+
+
+def simulate_and_send(
+    group: str,
+    storage: str = "csv",
+    compression: str = "none",
+    jobs: int = 1,
+    pack: bool = False,
+    max_requests: int = MAX_BATCH_REQUESTS,
+    max_bytes: int = MAX_BATCH_BYTES,
+    grid: list[tuple[float, int]] | None = None,
+    replicates: int | None = None,
+) -> None:
+    """Simulate every point of ``grid`` (default GRID) and submit its batch.
+
+    With ``pack``, ``replicates`` sends only each point's first runs; the
+    rest stay simulated for later waves (see sequential_grid).
+    """
+    if replicates is not None and not pack:
+        raise ValueError("Sending only some replicates needs pack=True.")
+    grid = GRID if grid is None else grid
+    init_group(group, storage)
     paths = group_paths(group)
+    registry = Registry.for_group(paths["base"])
+    timer = StageTimer()
+
+    from evaluation.client import make_client
+    from evaluation.send_batch_fixation_probability import send_classify_point, send_packed_classify_batches
+    client = make_client()  # one client for every batch of the grid
 
     print(f"\n{'='*60}")
     print(f"Group: {group}")
-    print(f"Running {len(GRID)} grid points | N={N}, replicates={REPLICATES}, model={MODEL}")
+    print(f"Running {len(grid)} grid points | N={N}, replicates={REPLICATES}, model={MODEL}")
     print(f"{'='*60}")
-
-    for r, i0 in GRID:
-        print(f"\n── Point: r={r}, i0={i0} ──")
-
-        # Clean shared temp dirs before each point
-        for d in [Path("data/raw"), Path("data/cropped")]:
-            if d.exists():
-                shutil.rmtree(d)
-        for f in [Path("data/results/dataset_summary.csv"),
-                  Path("data/results/classify_parsed.csv"),
-                  Path(f"data/batches/classify_batch.jsonl")]:
-            if f.exists():
-                f.unlink()
-
-        # Simulate
-        run([sys.executable, "main.py", "simulate",
-             "--num-experiments", "1",
-             "--replicates", str(REPLICATES),
-             "--N", str(N),
-             "--r", str(r),
-             "--i0", str(i0),
-             "--seed", str(SEED),
-        ])
-
-        # Copy raw traces into group
-        raw_point_dir = paths["raw"] / f"r{r}_i{i0}"
-        raw_point_dir.mkdir(parents=True, exist_ok=True)
-        for csv_file in Path("data/raw").glob("*.csv"):
-            shutil.copy(csv_file, raw_point_dir / csv_file.name)
-
-        # Build summary CSV pointing at group raw dir
+    print(format_budget_table(grid, N, REPLICATES))
+
+    # Register points in grid order first so group.json keeps that order under --jobs.
+    # Each point resumes after its last checkpoint; points with a batch are skipped.
+    registry.import_batch_ids(paths["batch_ids"], kind="classify")
+    to_prepare: list[tuple[float, int]] = []
+    to_send: list[tuple[float, int, Path, list[dict[str, object]] | None, StageTimer]] = []
+    submitted = 0
+    for r, i0 in grid:
+        stage = registry.point_stage(registry.add_point(r, i0, N))
         summary_path = paths["summaries"] / f"summary_r{r}_i{i0}.csv"
-        # Write summary with correct trace_csv paths
-        summary_path.parent.mkdir(parents=True, exist_ok=True)
-        fieldnames = ["run_id", "trace_csv", "meta_json", "true_r", "true_N", "true_i0", "num_events_full"]
-        rows = []
-        for rep in range(1, REPLICATES + 1):
-            run_id = f"exp001_run{rep:02d}"
-            trace = raw_point_dir / f"{run_id}.csv"
-            rows.append({"run_id": run_id, "trace_csv": str(trace),
-                         "meta_json": "", "true_r": r, "true_N": N,
-                         "true_i0": i0, "num_events_full": ""})
-        with summary_path.open("w", newline="", encoding="utf-8") as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(rows)
-
-        # Send classification batch using group summary
-        run([sys.executable, "main.py", "classify-send",
-             "--summary-csv", str(summary_path),
-             "--batch-jsonl", str(paths["batches"] / "classify_batch.jsonl"),
-             "--model", MODEL,
-        ])
-
-        # Move batch IDs into group
-        default_ids = Path(f"data/batches/classify_batch_job_ids_{MODEL}.jsonl")
-        if default_ids.exists():
-            with default_ids.open("r") as src, paths["batch_ids"].open("a") as dst:
-                for line in src:
-                    # Rewrite summary_csv path to point at group summary
-                    record = json.loads(line)
-                    record["summary_csv"] = str(summary_path)
-                    record["r"] = r
-                    record["i0"] = i0
-                    dst.write(json.dumps(record) + "\n")
-            default_ids.unlink()
-
-        register_point(group, r, i0)
-        print(f"✓ r={r}, i0={i0} registered to group '{group}'")
+        if stage == "batch_created":
+            submitted += 1
+        elif stage is not None and summary_path.exists():
+            to_send.append((r, i0, summary_path, None, StageTimer()))
+        else:
+            to_prepare.append((r, i0))
+    print(f"\n{submitted} point(s) already submitted, {len(to_send)} to resume, {len(to_prepare)} to simulate")
+
+    pack_points: list[PackPoint] = []
+    pack_ids: dict[str, int] = {}   # label -> point_id of the packed points
+    failed = 0
+    start = time.perf_counter()
+    # Resumed points first (rows None: already recorded), then points as they are prepared
+    for r, i0, summary_path, rows, point_timer in chain(
+        to_send, prepared_points(group, to_prepare, storage, compression, jobs)
+    ):
+        point_id = registry.add_point(r, i0, N, summary_path)
+        if rows is not None:
+            timer.merge(point_timer)
+            registry.add_runs(point_id, rows)
+            registry.mark_stage(point_id, "simulated")
+
+        if pack:
+            # Submitted together with the other points after the loop
+            first_runs = None if replicates is None else tuple(f"exp001_run{rep:02d}" for rep in range(1, replicates + 1))
+            label = point_label(group, summary_path)
+            pack_points.append(PackPoint(label, summary_path, paths["batch_ids"], first_runs))
+            pack_ids[label] = point_id
+        else:
+            # Send classification batch using group summary
+            try:
+                with timer.stage("send"):
+                    batch_id = send_classify_point(
+                        registry, point_id, summary_path, paths["batches"] / f"classify_batch_r{r}_i{i0}.jsonl",
+                        MODEL, compression=compression, client=client,
+                    )
+            except Exception as exc:
+                failed += 1
+                stage = registry.point_stage(point_id)
+                print(f"   WARNING: sending r={r}, i0={i0} failed after stage '{stage}': {exc}")
+                continue
+            print(f"   Submitted classification batch job: {batch_id}")
+            print(f"✓ r={r}, i0={i0} registered to group '{group}'")
+
+    if pack_points:
+        def checkpoint(shard: Path, file_id: str, batch_id: str, labels: list[str]) -> None:
+            for label in labels:
+                registry.mark_stage(pack_ids[label], "prompts_built", shard)
+                registry.mark_stage(pack_ids[label], "uploaded", file_id)
+                registry.mark_stage(pack_ids[label], "batch_created", batch_id)
+
+        # Failed points or shards are skipped; their points stay unsubmitted for the next run
+        with timer.stage("send"):
+            send_packed_classify_batches(
+                pack_points, paths["batches"] / "classify_batch.jsonl", model_name=MODEL, max_requests=max_requests,
+                max_bytes=max_bytes, compression=compression, client=client, on_submitted=checkpoint,
+            )
+        registry.import_batch_ids(paths["batch_ids"], kind="classify")
+        unsent = [label for label, point_id in pack_ids.items() if registry.point_stage(point_id) != "batch_created"]
+        failed += len(unsent)
+        if unsent:
+            print(f"   WARNING: {len(unsent)} packed point(s) not submitted: {', '.join(unsent)}")
+
+    # group.json lists only points that have a batch
+    register_points(group, registry.points(submitted=True))
+    registry.close()
+
+    print(f"\n{timer.report()}")
+    print(f"Wall time: {time.perf_counter() - start:.2f} s with --jobs {jobs}")
+
+    if failed:
+        print(f"\n{failed} point(s) failed; re-run the same command to retry only those.")
 
     print(f"\n{'='*60}")
     print(f"All batches submitted to group '{group}'.")
@@ -232,45 +363,68 @@ def simulate_and_send(group: str) -> None:
     print(f"{'='*60}")
 
 
-def fetch_parse_vote(group: str) -> None:
+def fetch_parse_vote(group: str, compression: str = "none", vote: bool = True) -> None:
+    """Fetch finished batches, parse new outputs and vote each point (unless ``vote`` is False)."""
     paths = group_paths(group)
+    timer = StageTimer()
+
+    from evaluation.client import make_client
+    from evaluation.fetch_batch_fixation_probability import fetch_classify_batches
+    from evaluation.parse_outputs_fixation_probability import parse_classify_outputs
+    from evaluation.vote_fixation_probability import run_vote
+    client = make_client()
 
     print(f"\n{'='*60}")
     print(f"Fetching, parsing, and voting for group: {group}")
     print(f"{'='*60}")
 
     # Fetch into group outputs dir
-    run([sys.executable, "main.py", "classify-fetch",
-         "--batch-ids-jsonl", str(paths["batch_ids"]),
-         "--output-dir", str(paths["outputs"]),
-    ])
+    with timer.stage("fetch"):
+        fetch_classify_batches(paths["batch_ids"], paths["outputs"], verbose=True, compression=compression, client=client)
 
-    output_files = sorted(paths["outputs"].glob("*_classify_output.jsonl"))
+    output_files = sorted(paths["outputs"].glob("*_classify_output.jsonl*"))
     if not output_files:
         print("\nNo completed output files found. Batches may still be in progress.")
+        print(f"\n{timer.report()}")
         return
 
-    print(f"\nFound {len(output_files)} output file(s) to process.")
-
-    for output_jsonl in output_files:
+    registry = Registry.for_group(paths["base"])
+    # Groups created before the registry only have the batch IDs file; index it once.
+    registry.import_batch_ids(paths["batch_ids"], kind="classify")
+    # One output per batch: a batch stored both plain and compressed (e.g. after
+    # changing --compress) must still be parsed once.
+    done = {batch_id for _, batch_id in registry.parsed_outputs()}
+    new_files = []
+    for f in output_files:
+        batch_id = plain_path(f).name.replace("_classify_output.jsonl", "")
+        if batch_id not in done and not registry.is_processed(f):
+            done.add(batch_id)
+            new_files.append(f)
+    print(f"\nFound {len(output_files)} output file(s), {len(new_files)} not processed yet.")
+
+    for output_jsonl in new_files:
         print(f"\n── Processing: {output_jsonl.name} ──")
-        batch_id = output_jsonl.name.replace("_classify_output.jsonl", "")
-        summary_csv = _find_summary(paths["batch_ids"], batch_id)
+        batch_id = plain_path(output_jsonl).name.replace("_classify_output.jsonl", "")
+        summaries = registry.summaries_for_batch(batch_id)
 
-        if summary_csv is None:
+        if not summaries:
             print(f"   WARNING: No summary found for {batch_id}, skipping.")
             continue
 
+        registry.add_output(output_jsonl, batch_id)
         parsed_csv = paths["parsed"] / f"classify_parsed_{batch_id}.csv"
-        run([sys.executable, "main.py", "classify-parse",
-             "--output-jsonl", str(output_jsonl),
-             "--parsed-csv", str(parsed_csv),
-        ])
-        run([sys.executable, "main.py", "classify-vote",
-             "--parsed-csv", str(parsed_csv),
-             "--summary-csv", str(summary_csv),
-             "--voted-csv", str(paths["voted_csv"]),
-        ])
+        with timer.stage("parse"):
+            parse_classify_outputs(output_jsonl, parsed_csv)
+        if vote:
+            # Packed batches hold several points; vote each against its own summary
+            for label, point_parsed in demux_parsed(parsed_csv, summaries).items():
+                with timer.stage("vote"):
+                    run_vote(point_parsed, summaries[label], paths["voted_csv"], registry=registry.path)
+        registry.mark_processed(output_jsonl, parsed_csv)
+
+    registry.close()
+
+    print(f"\n{timer.report()}")
 
     print(f"\n{'='*60}")
     print(f"Done. Visualize with:")
@@ -278,20 +432,261 @@ def fetch_parse_vote(group: str) -> None:
     print(f"{'='*60}")
 
 
-def _find_summary(batch_ids_file: Path, batch_id: str) -> Path | None:
-    if not batch_ids_file.exists():
-        return None
-    with batch_ids_file.open("r") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            record = json.loads(line)
-            if record.get("batch_job_id") == batch_id:
-                p = Path(record["summary_csv"])
-                if p.exists():
-                    return p
-    return None
+def wait_for_votes(
+    group: str, grid: list[tuple[float, int]], compression: str = "none", poll_seconds: float = 0.0
+) -> dict[tuple[float, int], tuple[str, str]] | None:
+    """Fetch and vote until every grid point has a majority vote; None if some are pending and not polling."""
+    from evaluation.refine import read_votes
+
+    while True:
+        fetch_parse_vote(group, compression)
+        votes = read_votes(group_paths(group)["voted_csv"])
+        pending = [point for point in grid if point not in votes]
+        if not pending:
+            return {point: votes[point] for point in grid}
+        if poll_seconds <= 0:
+            return None
+        print(f"\n{len(pending)} point(s) still pending; checking again in {poll_seconds / 60:.0f} min")
+        time.sleep(poll_seconds)
+
+
+def refine_grid(
+    group: str,
+    rounds: int = 3,
+    request_budget: int | None = None,
+    delta: float = 0.2,
+    i0_step: int = 1,
+    compression: str = "none",
+    poll_seconds: float = 0.0,
+    r_range: tuple[float, float] | None = None,
+    **send_options: object,
+) -> None:
+    """Adaptive mode: send a coarse grid, then add points only where votes disagree.
+
+    New points stay within ``r_range``, by default the coarse grid's r span.
+
+    Each round votes the grid so far and refines it (see evaluation.refine)
+    until ``rounds`` refinements are done, nothing disagrees any more, or the
+    next points would exceed ``request_budget`` requests in total. Rounds are
+    replayed from the voted results, so re-running the same command after the
+    batches finish carries on where it stopped.
+    """
+    from evaluation.refine import coarse_grid, refine_points
+
+    grid = coarse_grid(N, delta, i0_step)
+    r_range = r_range or (min(r for r, _ in grid), max(r for r, _ in grid))
+    if request_budget is not None and len(grid) * REPLICATES > request_budget:
+        raise ValueError(
+            f"The coarse grid alone needs {len(grid) * REPLICATES} requests, over the budget of {request_budget}."
+        )
+    for round_no in range(rounds + 1):
+        print(f"\n{'#'*60}")
+        print(f"Round {round_no}: {len(grid)} points, {len(grid) * REPLICATES} requests in total")
+        print(f"{'#'*60}")
+        simulate_and_send(group, compression=compression, grid=grid, **send_options)
+        votes = wait_for_votes(group, grid, compression, poll_seconds)
+        if votes is None:
+            print(f"\nRound {round_no} is still in progress; re-run the same command once its batches finish.")
+            return
+        if round_no == rounds:
+            break
+        new_points = refine_points(votes, N, set(grid), r_range=r_range)
+        if request_budget is not None:
+            affordable = (request_budget - len(grid) * REPLICATES) // REPLICATES
+            if len(new_points) > affordable:
+                print(f"\nBudget allows {affordable} of {len(new_points)} new point(s)")
+                new_points = new_points[:affordable]
+        if not new_points:
+            print("\nNo new points to add.")
+            break
+        print(f"\nAdding {len(new_points)} point(s): {new_points}")
+        grid = grid + new_points
+
+    print(f"\n{'='*60}")
+    print(f"Adaptive grid for '{group}': {len(grid)} points, {len(grid) * REPLICATES} requests")
+    print(f"{'='*60}")
+
+
+def sequential_grid(
+    group: str,
+    wave: int = 4,
+    error: float = 0.05,
+    margin: float = 0.25,
+    storage: str = "csv",
+    compression: str = "none",
+    jobs: int = 1,
+    max_requests: int = MAX_BATCH_REQUESTS,
+    max_bytes: int = MAX_BATCH_BYTES,
+    poll_seconds: float = 0.0,
+) -> None:
+    """Sequential mode: send replicates in waves and stop each point once its vote is settled.
+
+    Every replicate is simulated up front, but each wave submits only ``wave``
+    more runs of the points whose labels have not passed the SPRT yet
+    (vote_fixation_probability.sprt_decision). A point still open after all
+    REPLICATES runs keeps its plain majority. Each point is voted once, on all
+    its labels, when no point is open any more. Like --adaptive, re-running
+    the same command resumes from the labels received so far.
+
+    The runs of every wave are logged in ``batches/sequential_waves.jsonl``,
+    which is what the requests-saved report counts. A wave batch that fails,
+    expires or completes without an output file stops the loop; it is logged,
+    and the next run sends its runs again in a new wave.
+    """
+    from evaluation.client import make_client
+    from evaluation.refine import read_votes
+    from evaluation.send_batch_fixation_probability import send_packed_classify_batches
+    from evaluation.vote_fixation_probability import run_vote, sprt_decision, sprt_lead
+
+    paths = group_paths(group)
+    wave_log = paths["batches"] / "sequential_waves.jsonl"
+    run_ids = [f"exp001_run{rep:02d}" for rep in range(1, REPLICATES + 1)]
+    labels = {(r, i0): point_label(group, paths["summaries"] / f"summary_r{r}_i{i0}.csv") for r, i0 in GRID}
+
+    def read_wave_log() -> list[dict]:
+        if not wave_log.exists():
+            return []
+        with wave_log.open("r", encoding="utf-8") as handle:
+            return [json.loads(line) for line in handle if line.strip()]
+
+    def log_wave(record: dict) -> None:
+        wave_log.parent.mkdir(parents=True, exist_ok=True)
+        with wave_log.open("a", encoding="utf-8") as handle:
+            handle.write(json.dumps(record) + "\n")
+
+    print(f"\nSPRT: a point is settled once one label leads by {sprt_lead(error, margin)} "
+          f"(error {error}, margin {margin}), in waves of {wave} replicates")
+
+    # The first wave goes out with the simulation; log it for the points it actually submitted
+    with Registry.for_group(paths["base"]) as registry:
+        before = {point for point in GRID if registry.point_stage(registry.add_point(*point, N)) == "batch_created"}
+    simulate_and_send(
+        group, storage, compression, jobs, pack=True, max_requests=max_requests, max_bytes=max_bytes,
+        replicates=wave,
+    )
+    with Registry.for_group(paths["base"]) as registry:
+        first = {
+            labels[point]: run_ids[:wave]
+            for point in GRID
+            if point not in before and registry.point_stage(registry.add_point(*point, N)) == "batch_created"
+        }
+    if first:
+        log_wave({"wave": 0, "runs": first})
+
+    points = {
+        labels[(r, i0)]: (r, i0, summary)
+        for r, i0 in GRID
+        if (summary := paths["summaries"] / f"summary_r{r}_i{i0}.csv").exists()
+    }
+    client = make_client()
+
+    while True:
+        fetch_parse_vote(group, compression, vote=False)
+        registry = Registry.for_group(paths["base"])
+        failed = {batch_id for record in read_wave_log() for batch_id in record.get("failed", [])}
+        pending = [batch_id for batch_id in registry.unprocessed_batches() if batch_id not in failed]
+        dead = []
+        for batch_id in pending:
+            batch = client.batches.retrieve(batch_id)
+            # A batch whose requests all failed completes with only an error file
+            if batch.status in {"failed", "expired", "cancelled"} or (
+                batch.status == "completed" and not getattr(batch, "output_file_id", None)
+            ):
+                dead.append(batch_id)
+        if dead:
+            registry.close()
+            log_wave({"failed": dead})
+            print(f"\nERROR: {len(dead)} batch(es) ended without output: {', '.join(dead)}")
+            print("Their runs got no labels; re-run the same command to send them again in a new wave.")
+            return
+        if pending:
+            registry.close()
+            if poll_seconds <= 0:
+                print(f"\n{len(pending)} batch(es) still in progress; re-run the same command once they finish.")
+                return
+            print(f"\n{len(pending)} batch(es) still in progress; checking again in {poll_seconds / 60:.0f} min")
+            time.sleep(poll_seconds)
+            continue
+
+        # Labels so far per point, across every wave (and earlier single-point batches of the group)
+        labelled: dict[str, dict[str, dict[str, str]]] = {}
+        for parsed_csv, batch_id in registry.parsed_outputs():
+            single = registry.summaries_for_batch(batch_id).get("")
+            with parsed_csv.open("r", newline="", encoding="utf-8") as handle:
+                for row in csv.DictReader(handle):
+                    label = row["point"] or (point_label(group, single) if single else "")
+                    labelled.setdefault(label, {})[row["run_id"]] = row
+
+        next_wave: list[PackPoint] = []
+        for label, (r, i0, summary) in points.items():
+            rows = labelled.get(label, {})
+            x_count = sum(row["label"] == "X" for row in rows.values())
+            remaining = [run_id for run_id in run_ids if run_id not in rows]
+            if sprt_decision(x_count, len(rows) - x_count, error, margin) is None and remaining:
+                next_wave.append(PackPoint(label, summary, paths["batch_ids"], tuple(remaining[:wave])))
+        if not next_wave:
+            break
+
+        num_waves = sum("runs" in record for record in read_wave_log())
+        planned = {point.label: list(point.run_ids) for point in next_wave}
+
+        def log_shard(shard: Path, file_id: str, batch_id: str, shard_labels: list[str]) -> None:
+            log_wave({"wave": num_waves, "batch_job_id": batch_id, "runs": {label: planned[label] for label in shard_labels}})
+
+        print(f"\nNext wave: {len(next_wave)} point(s) still open")
+        batch_ids = send_packed_classify_batches(
+            next_wave, paths["batches"] / f"classify_wave{num_waves:03d}.jsonl", model_name=MODEL,
+            max_requests=max_requests, max_bytes=max_bytes, compression=compression, client=client,
+            on_submitted=log_shard,
+        )
+        registry.import_batch_ids(paths["batch_ids"], kind="classify")
+        registry.close()
+        if not batch_ids:
+            print("\nERROR: no batch of this wave could be submitted; re-run the same command to retry it.")
+            return
+
+    # Every point is settled or out of replicates: vote each once on all its labels
+    voted = read_votes(paths["voted_csv"])
+    report = []
+    for label, (r, i0, summary) in points.items():
+        rows = labelled.get(label, {})
+        x_count = sum(row["label"] == "X" for row in rows.values())
+        decision = sprt_decision(x_count, len(rows) - x_count, error, margin)
+        report.append({"r": r, "i0": i0, "replicates": len(rows), "x_count": x_count,
+                       "o_count": len(rows) - x_count, "settled": int(decision is not None)})
+        if (r, i0) in voted or not rows:
+            continue
+        point_parsed = paths["parsed"] / f"classify_sequential__{label}.csv"
+        with point_parsed.open("w", newline="", encoding="utf-8") as handle:
+            writer = csv.DictWriter(handle, fieldnames=list(next(iter(rows.values()))))
+            writer.writeheader()
+            writer.writerows(rows[run_id] for run_id in run_ids if run_id in rows)
+        run_vote(point_parsed, summary, paths["voted_csv"], registry=registry.path)
+    registry.close()
+
+    report_csv = paths["results"] / "sequential_report.csv"
+    with report_csv.open("w", newline="", encoding="utf-8") as handle:
+        writer = csv.DictWriter(handle, fieldnames=list(report[0]) if report else ["r", "i0"])
+        writer.writeheader()
+        writer.writerows(report)
+
+    # Requests of this mode's own wave plans, against the fixed design for the same points
+    sent: dict[str, int] = {}
+    for record in read_wave_log():
+        for label, runs in record.get("runs", {}).items():
+            if label in points:
+                sent[label] = sent.get(label, 0) + len(runs)
+    used = sum(sent.values())
+    fixed = len(sent) * REPLICATES
+    print(f"\n{'='*60}")
+    print(f"{'r':>8} {'i0':>4} {'runs':>5} {'X':>3} {'O':>3}  settled")
+    for row in report:
+        print(f"{row['r']:>8} {row['i0']:>4} {row['replicates']:>5} {row['x_count']:>3} {row['o_count']:>3}  "
+              f"{'yes' if row['settled'] else 'no'}")
+    print(f"Requests: {used} sent in waves for {len(sent)} point(s), against {fixed} for the fixed design of "
+          f"{REPLICATES} replicates per point; saved {fixed - used} ({(fixed - used) / fixed if fixed else 0.0:.1%})")
+    print(f"Per-point report: {report_csv}")
+    print(f"{'='*60}")
 
 
 def main() -> None:
@@ -301,12 +696,73 @@ def main() -> None:
     parser.add_argument("--group", required=True, help="Group name (e.g. boundary_sweep_N20)")
     parser.add_argument("--fetch-parse-vote", dest="fetch_parse_vote", action="store_true",
                         help="Fetch completed batches and process them")
+    parser.add_argument("--storage", choices=["csv", "seed", "archive"], default="csv",
+                        help="seed: store per-run seed references instead of trace CSVs; "
+                             "traces are regenerated when prompts are built. "
+                             "archive: pack each point's traces into one archive/r{r}_i{i0}.mtrace file")
+    parser.add_argument("--compress", choices=["none", "gzip", "zstd"], default="none",
+                        help="Store trace CSVs, batch JSONL and downloaded outputs compressed "
+                             "(zstd needs the zstandard package)")
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="Simulate and prepare this many grid points at once in a process pool; "
+                             "batches are still submitted from the main process as points finish")
+    parser.add_argument("--pack", action="store_true",
+                        help="Submit all points together in as few batches as the API limits allow "
+                             "instead of one batch per point")
+    parser.add_argument("--shard-requests", type=int, default=MAX_BATCH_REQUESTS,
+                        help="With --pack, at most this many requests per batch; lower it for faster turnaround")
+    parser.add_argument("--shard-mb", type=float, default=MAX_BATCH_BYTES / 2**20,
+                        help="With --pack, at most this many MB of batch JSONL per batch")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="Start from a coarse grid instead of GRID and refine it where votes disagree "
+                             "with their neighbours or the analytic label")
+    parser.add_argument("--rounds", type=int, default=3, help="With --adaptive, the number of refinement rounds")
+    parser.add_argument("--request-budget", type=int, default=None,
+                        help="With --adaptive, stop adding points beyond this many requests in total")
+    parser.add_argument("--coarse-delta", type=float, default=0.2,
+                        help="With --adaptive, the coarse grid has points at rho = 0.5 -/+ this delta")
+    parser.add_argument("--r-range", type=float, nargs=2, metavar=("LO", "HI"), default=None,
+                        help="With --adaptive, never add points with r outside [LO, HI] "
+                             "(default: the coarse grid's r span)")
+    parser.add_argument("--i0-step", type=int, default=1, help="With --adaptive, coarse grid every i0-step-th i0")
+    parser.add_argument("--sequential", action="store_true",
+                        help="Send replicates in waves and stop each point once an SPRT settles its vote")
+    parser.add_argument("--wave", type=int, default=4, help="With --sequential, replicates per point per wave")
+    parser.add_argument("--sprt-error", type=float, default=0.05,
+                        help="With --sequential, the error rate at which a vote counts as settled")
+    parser.add_argument("--sprt-margin", type=float, default=0.25,
+                        help="With --sequential, the SPRT tests P(X) = 0.5 + margin against 0.5 - margin")
+    parser.add_argument("--poll-minutes", type=float, default=0.0,
+                        help="With --adaptive or --sequential, wait for each round's batches, checking this often; "
+                             "by default stop and resume on the next run")
+    parser.add_argument("--budget", action="store_true",
+                        help="Only print the predicted events, bytes and tokens for the grid")
     args = parser.parse_args()
 
+    if args.budget:
+        print(format_budget_table(GRID, N, REPLICATES))
+        return
+
     if args.fetch_parse_vote:
-        fetch_parse_vote(args.group)
+        fetch_parse_vote(args.group, args.compress)
+    elif args.sequential:
+        sequential_grid(
+            args.group, args.wave, args.sprt_error, args.sprt_margin, args.storage, args.compress, args.jobs,
+            max_requests=args.shard_requests, max_bytes=int(args.shard_mb * 2**20),
+            poll_seconds=args.poll_minutes * 60,
+        )
+    elif args.adaptive:
+        refine_grid(
+            args.group, args.rounds, args.request_budget, args.coarse_delta, args.i0_step, args.compress,
+            poll_seconds=args.poll_minutes * 60, r_range=tuple(args.r_range) if args.r_range else None,
+            storage=args.storage, jobs=args.jobs,
+            pack=args.pack, max_requests=args.shard_requests, max_bytes=int(args.shard_mb * 2**20),
+        )
     else:
-        simulate_and_send(args.group)
+        simulate_and_send(
+            args.group, args.storage, args.compress, args.jobs,
+            pack=args.pack, max_requests=args.shard_requests, max_bytes=int(args.shard_mb * 2**20),
+        )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+import math
+
+from .moran import _check_params
+
+# Rough OpenAI token counts: a trace row tokenizes to about one token per
+# field or separator, and the instructions around a trace cost a few hundred.
+TOKENS_PER_EVENT = 21
+PROMPT_OVERHEAD_TOKENS = 300
+
+
+@dataclass
+class AbsorptionTime:
+    """Number of Moran events until absorption, null events included."""
+
+    mean: float
+    var: float
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(max(self.var, 0.0))
+
+
+def _rates(r: float, N: int) -> tuple[list[float], list[float]]:
+    up = [0.0] * (N + 1)
+    down = [0.0] * (N + 1)
+    for i in range(1, N):
+        w = i * r + N - i
+        up[i] = (i * r / w) * ((N - i) / N)
+        down[i] = ((N - i) / w) * (i / N)
+    return up, down
+
+
+def _log_fixation_weight(i: int, N: int, r: float) -> float:
+    """log of a harmonic function proportional to rho_i, finite for any N."""
+    if i == 0:
+        return -math.inf
+    if abs(r - 1.0) < 1e-14:
+        return math.log(i)
+    log_r = math.log(r)
+    if r > 1.0:
+        return math.log(-math.expm1(-i * log_r))
+    return -i * log_r + math.log(-math.expm1(i * log_r))
+
+
+def _solve(up: list[float], down: list[float], rhs: list[float]) -> list[float]:
+    """Thomas algorithm for (up_i + down_i) x_i - up_i x_{i+1} - down_i x_{i-1} = rhs_i, x_0 = x_N = 0."""
+    n = len(up) - 1
+    c = [0.0] * (n + 1)
+    d = [0.0] * (n + 1)
+    for i in range(1, n):
+        denom = up[i] + down[i] - down[i] * c[i - 1]
+        c[i] = up[i] / denom
+        d[i] = (rhs[i] + down[i] * d[i - 1]) / denom
+    x = [0.0] * (n + 1)
+    for i in range(n - 1, 0, -1):
+        x[i] = c[i] * x[i + 1] + d[i]
+    return x
+
+
+def absorption_times(r: float, N: int, condition: str | None = None) -> list[AbsorptionTime]:
+    """Mean and variance of the absorption time from every start 0..N.
+
+    ``condition`` is None (unconditional), "fixation" or "extinction". The
+    conditional chain is the Doob h-transform with h = rho_i (or 1 - rho_i):
+    up and down rates are reweighted by h_{i+1} / h_i and h_{i-1} / h_i,
+    which keeps the holding probability and never leaves towards the other
+    boundary. The ratios are taken in log space, so they stay finite even
+    where rho_i itself underflows.
+    """
+    if N < 2:
+        raise ValueError("N must be at least 2.")
+    if r <= 0:
+        raise ValueError("Relative fitness r must be positive.")
+    up, down = _rates(r, N)
+
+    if condition is not None:
+        if condition not in ("fixation", "extinction"):
+            raise ValueError(f"Unknown condition {condition!r}; expected 'fixation' or 'extinction'.")
+        if condition == "fixation":
+            log_h = [_log_fixation_weight(i, N, r) for i in range(N + 1)]
+        else:
+            # Extinction of i mutants is fixation of N - i residents with fitness 1 / r.
+            log_h = [_log_fixation_weight(N - i, N, 1.0 / r) for i in range(N + 1)]
+        for i in range(1, N):
+            up[i] *= math.exp(log_h[i + 1] - log_h[i])
+            down[i] *= math.exp(log_h[i - 1] - log_h[i])
+
+    # E[T] solves L T = 1; E[T^2] solves L S = 2 E[T] - 1 with the same operator.
+    mean = _solve(up, down, [0.0] + [1.0] * (N - 1) + [0.0])
+    second = _solve(up, down, [0.0] + [2.0 * t - 1.0 for t in mean[1:N]] + [0.0])
+    return [AbsorptionTime(mean=m, var=s - m * m) for m, s in zip(mean, second)]
+
+
+def absorption_time(r: float, N: int, i0: int, condition: str | None = None) -> AbsorptionTime:
+    _check_params(r, N, i0)
+    return absorption_times(r, N, condition)[i0]
+
+
+def _mean_digits(n: int) -> float:
+    # Average decimal width of 0, 1, ..., n - 1.
+    if n <= 1:
+        return 1.0
+    total = 0
+    lo, width = 0, 1
+    while lo < n:
+        hi = min(n, 10 ** width)
+        total += (hi - lo) * width
+        lo, width = hi, width + 1
+    return total / n
+
+
+@dataclass
+class TraceBudget:
+    """Predicted size of one run's trace: events, CSV bytes and prompt tokens."""
+
+    r: float
+    N: int
+    i0: int
+    events: float
+    events_std: float
+
+    @property
+    def bytes(self) -> float:
+        # Fifteen fixed characters per row (separators, type letters, CRLF)
+        # plus the step, four indices, two counts and N.
+        per_event = 15 + _mean_digits(max(1, round(self.events))) + 6 * _mean_digits(self.N) + len(str(self.N))
+        return self.events * per_event
+
+    @property
+    def tokens(self) -> float:
+        return self.events * TOKENS_PER_EVENT + PROMPT_OVERHEAD_TOKENS
+
+
+def predict_trace_budget(r: float, N: int, i0: int) -> TraceBudget:
+    t = absorption_time(r, N, i0)
+    return TraceBudget(r=r, N=N, i0=i0, events=t.mean, events_std=t.std)
+
+
+def format_budget_table(points: list[tuple[float, int]], N: int, replicates: int) -> str:
+    """Per-point and whole-grid predicted events, bytes and tokens, as printed by the grid runners."""
+    lines = [
+        f"Predicted trace budget (N={N}, {replicates} replicates per point):",
+        f"{'r':>8} {'i0':>4} {'events/run':>16} {'MB/point':>9} {'tokens/point':>13}",
+    ]
+    total_events = total_bytes = total_tokens = 0.0
+    for r, i0 in points:
+        b = predict_trace_budget(r, N, i0)
+        total_events += b.events * replicates
+        total_bytes += b.bytes * replicates
+        total_tokens += b.tokens * replicates
+        lines.append(
+            f"{r:>8} {i0:>4} {b.events:>8.0f} ± {b.events_std:<5.0f} "
+            f"{b.bytes * replicates / 1e6:>9.2f} {b.tokens * replicates:>13,.0f}"
+        )
+    lines.append(
+        f"Grid total: {total_events:,.0f} events, {total_bytes / 1e6:.1f} MB, ~{total_tokens:,.0f} tokens"
+    )
+    return "\n".join(lines)
@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+import math
+import random
+from typing import Iterable
+
+from moran_grid import rho_i
+
+from .moran import TypeLabel, _check_params
+from .skip import null_run_length
+
+APPROX_ENGINE = "tau_leap"
+
+_Z95 = 1.959963984540054
+
+
+@dataclass
+class CountLeap:
+    """``events`` Moran events that moved the mutant count from before to after."""
+
+    events: int
+    mutants_before: int
+    mutants_after: int
+
+
+@dataclass
+class LeapMoranRun:
+    run_id: str
+    true_r: float
+    true_N: int
+    true_i0: int
+    absorbed_type: TypeLabel
+    leaps: list[CountLeap]
+    epsilon: float
+
+    @property
+    def num_events(self) -> int:
+        return sum(leap.events for leap in self.leaps)
+
+    def metadata(self) -> dict[str, object]:
+        return {
+            "engine": APPROX_ENGINE,
+            "approximate": True,
+            "epsilon": self.epsilon,
+            **rho_error_report(self.true_r, self.true_N, self.true_i0),
+        }
+
+
+def rho_diffusion(i: int, N: int, r: float) -> float:
+    """Fixation probability of the diffusion limit of the Moran count chain.
+
+    Per event the count has drift and variance in the fixed ratio
+    (r - 1) / (r + 1), so the scaled selection coefficient is
+    alpha = 2N (r - 1) / (r + 1).
+    """
+    alpha = 2.0 * N * (r - 1.0) / (r + 1.0)
+    x = i / N
+    if abs(alpha) < 1e-12:
+        return x
+    if alpha > 0:
+        return math.expm1(-alpha * x) / math.expm1(-alpha)
+    return math.exp(-alpha * (x - 1.0)) * math.expm1(alpha * x) / math.expm1(alpha)
+
+
+def rho_error_report(r: float, N: int, i0: int) -> dict[str, float]:
+    """Compare the exact rho_i with the diffusion limit the leaping engine follows.
+
+    ``diffusion_gap`` is only the distance between the two. It is not a bound
+    on the engine's error: the leap discretization adds an O(epsilon) bias
+    that this does not measure, so the gap can be 0 while that bias remains.
+    leap_rho_check bounds the engine's error from the runs themselves.
+    """
+    exact = rho_i(i0, N, r)
+    approx = rho_diffusion(i0, N, r)
+    return {"rho_exact": exact, "rho_approx": approx, "diffusion_gap": abs(exact - approx)}
+
+
+def leap_rho_check(r: float, N: int, i0: int, absorbed: Iterable[TypeLabel], z: float = _Z95) -> dict[str, object]:
+    """Empirical fixation probability of tau-leap runs checked against the exact rho_i.
+
+    ``rho_leap`` is the fraction of ``absorbed`` that fixed, with a Wilson
+    interval at ``z``. ``rho_error_bound`` is the largest distance from
+    rho_exact to that interval, so at that confidence the engine's own
+    fixation probability is within the bound of rho_i; it shrinks with the
+    number of runs. ``rho_within_ci`` says whether rho_i lies in the interval.
+    """
+    outcomes = list(absorbed)
+    n = len(outcomes)
+    if not n:
+        raise ValueError("Need at least one run to check.")
+    fixed = sum(1 for t in outcomes if t == "A")
+    p = fixed / n
+    z2 = z * z
+    centre = (p + z2 / (2 * n)) / (1 + z2 / n)
+    half = z * math.sqrt(p * (1 - p) / n + z2 / (4 * n * n)) / (1 + z2 / n)
+    low, high = max(0.0, centre - half), min(1.0, centre + half)
+    exact = rho_i(i0, N, r)
+    return {
+        "leap_runs": n,
+        "rho_leap": p,
+        "rho_leap_ci": [low, high],
+        "rho_error_bound": max(abs(exact - low), abs(exact - high)),
+        "rho_within_ci": low <= exact <= high,
+    }
+
+
+def check_leap_engine(
+    *,
+    r: float,
+    N: int,
+    i0: int,
+    replicates: int,
+    rng: random.Random,
+    epsilon: float = 0.03,
+    boundary: int | None = None,
+) -> dict[str, object]:
+    """leap_rho_check over ``replicates`` fresh runs of simulate_moran_leaping."""
+    runs = (
+        simulate_moran_leaping(r=r, N=N, i0=i0, run_id="check", rng=rng, epsilon=epsilon, boundary=boundary)
+        for _ in range(replicates)
+    )
+    return leap_rho_check(r, N, i0, (run.absorbed_type for run in runs))
+
+
+def simulate_moran_leaping(
+    *,
+    r: float,
+    N: int,
+    i0: int,
+    run_id: str,
+    rng: random.Random,
+    epsilon: float = 0.03,
+    boundary: int | None = None,
+) -> LeapMoranRun:
+    """Advance the mutant count in Gaussian tau-leaps.
+
+    A leap of tau events is sized so its standard deviation and drift stay
+    below ``epsilon * min(i, N - i)``. Within ``boundary`` of either absorbing
+    state the count moves one change at a time, with null events skipped
+    geometrically as in simulate_moran_counts, so absorption itself is exact.
+    """
+    _check_params(r, N, i0)
+    if not (0 < epsilon < 1):
+        raise ValueError("epsilon must satisfy 0 < epsilon < 1.")
+    boundary = boundary if boundary is not None else max(10, int(1.0 / epsilon))
+
+    i = i0
+    leaps: list[CountLeap] = []
+    while 0 < i < N:
+        w = i * r + N - i
+        p_up = (i * r / w) * ((N - i) / N)
+        p_down = ((N - i) / w) * (i / N)
+        p_change = p_up + p_down
+        m = min(i, N - i)
+
+        if m < boundary:
+            events = null_run_length(rng, p_change) + 1
+            after = i + 1 if rng.random() * p_change < p_up else i - 1
+        else:
+            drift = p_up - p_down
+            tau = (epsilon * m) ** 2 / p_change
+            if drift:
+                tau = min(tau, epsilon * m / abs(drift))
+            events = max(1, int(tau))
+            spread = math.sqrt(events * (p_change - drift * drift))
+            after = i + round(rng.gauss(events * drift, spread))
+            after = min(N, max(0, after))
+
+        leaps.append(CountLeap(events=events, mutants_before=i, mutants_after=after))
+        i = after
+
+    absorbed_type: TypeLabel = "A" if i == N else "B"
+    return LeapMoranRun(
+        run_id=run_id,
+        true_r=r,
+        true_N=N,
+        true_i0=i0,
+        absorbed_type=absorbed_type,
+        leaps=leaps,
+        epsilon=epsilon,
+    )
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from .moran import MoranRun, MoranTrace, TypeLabel, _check_params
+
+
+@dataclass
+class MoranBatch:
+    """Columnar result of simulate_moran_batch.
+
+    Events of replicate k live in ``[offsets[k], offsets[k + 1])`` of every
+    event column; the step number is the position within that range.
+    """
+
+    true_r: float
+    true_N: int
+    true_i0: int
+    offsets: np.ndarray
+    birth_index: np.ndarray
+    birth_is_mutant: np.ndarray
+    death_index: np.ndarray
+    death_is_mutant: np.ndarray
+    mutants_before: np.ndarray
+    mutants_after: np.ndarray
+    absorbed_mutant: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def num_events(self, k: int) -> int:
+        return int(self.offsets[k + 1] - self.offsets[k])
+
+    def run(self, k: int, run_id: str) -> MoranRun:
+        lo, hi = int(self.offsets[k]), int(self.offsets[k + 1])
+        steps = MoranTrace.from_columns(
+            self.true_N,
+            self.birth_index[lo:hi].tolist(),
+            self.birth_is_mutant[lo:hi].tolist(),
+            self.death_index[lo:hi].tolist(),
+            self.death_is_mutant[lo:hi].tolist(),
+            self.mutants_before[lo:hi].tolist(),
+        )
+        absorbed_type: TypeLabel = "A" if self.absorbed_mutant[k] else "B"
+        return MoranRun(
+            run_id=run_id,
+            true_r=self.true_r,
+            true_N=self.true_N,
+            true_i0=self.true_i0,
+            absorbed_type=absorbed_type,
+            steps=steps,
+        )
+
+    def to_runs(self, run_ids: list[str]) -> list[MoranRun]:
+        if len(run_ids) != len(self):
+            raise ValueError(f"Expected {len(self)} run IDs, got {len(run_ids)}.")
+        return [self.run(k, run_id) for k, run_id in enumerate(run_ids)]
+
+
+def simulate_moran_batch(
+    r: float,
+    N: int,
+    i0: int,
+    replicates: int,
+    rng: np.random.Generator | int | None = None,
+) -> MoranBatch:
+    """Advance ``replicates`` independent Moran runs in lockstep.
+
+    Uses the same partitioned order/slot layout as simulate_moran_run_indexed,
+    one row per replicate; absorbed rows drop out of the active set.
+    """
+    _check_params(r, N, i0)
+    if replicates < 1:
+        raise ValueError("replicates must be at least 1.")
+    rng = np.random.default_rng(rng)
+
+    order = np.tile(np.arange(N, dtype=np.int32), (replicates, 1))
+    slot = order.copy()
+    i = np.full(replicates, i0, dtype=np.int64)
+    active = np.arange(replicates)
+    chunks: list[tuple[np.ndarray, ...]] = []
+
+    while active.size:
+        ia = i[active]
+        birth_mut = rng.random(active.size) * (ia * r + N - ia) < ia * r
+        k = rng.integers(0, np.where(birth_mut, ia, N - ia)) + np.where(birth_mut, 0, ia)
+        birth_idx = order[active, k]
+        death_idx = rng.integers(0, N, active.size)
+        death_mut = slot[active, death_idx] < ia
+
+        change = birth_mut != death_mut
+        if change.any():
+            rows = active[change]
+            d = death_idx[change]
+            up = birth_mut[change]
+            boundary = np.where(up, ia[change], ia[change] - 1)
+            other = order[rows, boundary]
+            sd = slot[rows, d]
+            order[rows, sd] = other
+            slot[rows, other] = sd
+            order[rows, boundary] = d
+            slot[rows, d] = boundary
+            i[rows] += np.where(up, 1, -1)
+
+        ib = i[active]
+        chunks.append((
+            active.astype(np.int32),
+            birth_idx,
+            birth_mut,
+            death_idx.astype(np.int32),
+            death_mut,
+            ia.astype(np.int32),
+            ib.astype(np.int32),
+        ))
+        active = active[(ib > 0) & (ib < N)]
+
+    run, birth_idx, birth_mut, death_idx, death_mut, before, after = (
+        np.concatenate(col) for col in zip(*chunks)
+    )
+    # Chunks are in step order, so a stable sort by replicate keeps steps ordered.
+    perm = np.argsort(run, kind="stable")
+    offsets = np.zeros(replicates + 1, dtype=np.int64)
+    np.cumsum(np.bincount(run, minlength=replicates), out=offsets[1:])
+
+    return MoranBatch(
+        true_r=r,
+        true_N=N,
+        true_i0=i0,
+        offsets=offsets,
+        birth_index=birth_idx[perm],
+        birth_is_mutant=birth_mut[perm],
+        death_index=death_idx[perm],
+        death_is_mutant=death_mut[perm],
+        mutants_before=before[perm],
+        mutants_after=after[perm],
+        absorbed_mutant=i == N,
+    )
@@ -1,50 +1,219 @@
 from __future__ import annotations
 
+from abc import ABC, abstractmethod
+from collections import deque
 import csv
 from pathlib import Path
-from typing import Iterable
-
-
-def _read_rows(csv_path: str | Path) -> list[dict[str, str]]:
-    with Path(csv_path).open("r", newline="", encoding="utf-8") as handle:
-        return list(csv.DictReader(handle))
-
-
-def _write_rows(rows: Iterable[dict[str, str]], out_path: str | Path) -> Path:
-    out_path = Path(out_path)
-    rows = list(rows)
-    out_path.parent.mkdir(parents=True, exist_ok=True)
-    fieldnames = list(rows[0].keys()) if rows else [
-        "step",
-        "event",
-        "birth_index",
-        "birth_type",
-        "death_index",
-        "death_type",
-        "mutants_before",
-        "mutants_after",
-        "N",
-    ]
-    with out_path.open("w", newline="", encoding="utf-8") as handle:
-        writer = csv.DictWriter(handle, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(rows)
-    return out_path
+import re
+from typing import Iterable, Sequence
+
+from .io import OBSERVABLE_TRACE_COLUMNS, compressed_path, open_text, plain_path, split_archive_ref
+from .trace_index import TraceIndex
+
+DEFAULT_CROPS = ("full", "prefix10", "suffix10", "stride3")
+
+_CROP_PATTERN = re.compile(r"(full|prefix|suffix|stride)(\d*)")
+
+
+class _CropSink(ABC):
+    """Receives trace rows one at a time and writes one crop variant."""
+
+    def __init__(self, name: str, out_path: Path, header: Sequence[str]) -> None:
+        self.name = name
+        self.path = out_path
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        self._handle = open_text(out_path, "w", newline="")
+        self._writer = csv.writer(self._handle)
+        self._writer.writerow(header)
+
+    @property
+    def filled(self) -> bool:
+        return False
+
+    @abstractmethod
+    def push(self, row: Sequence[object]) -> None: ...
+
+    def close(self) -> Path:
+        self._handle.close()
+        return self.path
+
+
+class _PrefixSink(_CropSink):
+    def __init__(self, name: str, out_path: Path, header: Sequence[str], k: int) -> None:
+        super().__init__(name, out_path, header)
+        self._remaining = k
+
+    @property
+    def filled(self) -> bool:
+        return self._remaining <= 0
+
+    def push(self, row: Sequence[object]) -> None:
+        if self._remaining > 0:
+            self._writer.writerow(row)
+            self._remaining -= 1
+
+
+class _SuffixSink(_CropSink):
+    def __init__(self, name: str, out_path: Path, header: Sequence[str], k: int) -> None:
+        super().__init__(name, out_path, header)
+        self._ring: deque[Sequence[object]] = deque(maxlen=k)
+
+    def push(self, row: Sequence[object]) -> None:
+        if self._ring.maxlen:
+            self._ring.append(row)
+
+    def close(self) -> Path:
+        self._writer.writerows(self._ring)
+        return super().close()
 
 
-def make_crop_variants(raw_trace_csv: str | Path, output_dir: str | Path, *, prefix_k: int = 10, suffix_k: int = 10, stride: int = 3) -> dict[str, Path]:
-    rows = _read_rows(raw_trace_csv)
+class _StrideSink(_CropSink):
+    def __init__(self, name: str, out_path: Path, header: Sequence[str], stride: int) -> None:
+        super().__init__(name, out_path, header)
+        self._stride = stride
+        self._seen = 0
+
+    def push(self, row: Sequence[object]) -> None:
+        if self._seen % self._stride == 0:
+            self._writer.writerow(row)
+        self._seen += 1
+
+
+def parse_crop(name: str) -> tuple[str, int]:
+    """Split a crop name such as ``prefix10`` into its kind and length."""
+    match = _CROP_PATTERN.fullmatch(name)
+    if not match:
+        raise ValueError(f"Unknown crop {name!r}; expected full, prefixK, suffixK or strideK.")
+    kind, digits = match.groups()
+    if kind == "full":
+        if digits:
+            raise ValueError(f"Unknown crop {name!r}; 'full' takes no length.")
+        return kind, 0
+    if not digits:
+        raise ValueError(f"Crop {name!r} needs a length, e.g. {kind}10.")
+    k = int(digits)
+    if kind == "stride" and k < 1:
+        raise ValueError("Stride crops need a stride of at least 1.")
+    return kind, k
+
+
+def is_prefix_only(crops: Iterable[str]) -> bool:
+    return all(parse_crop(name)[0] == "prefix" for name in crops)
+
+
+def _open_sink(name: str, out_path: Path, header: Sequence[str], spec: tuple[str, int] | None = None) -> _CropSink:
+    kind, k = spec or parse_crop(name)
+    if kind == "prefix":
+        return _PrefixSink(name, out_path, header, k)
+    if kind == "suffix":
+        return _SuffixSink(name, out_path, header, k)
+    return _StrideSink(name, out_path, header, k or 1)
+
+
+def write_crop_variants(
+    rows: Iterable[Sequence[object]],
+    output_dir: str | Path,
+    stem: str,
+    crops: Sequence[str] = DEFAULT_CROPS,
+    *,
+    header: Sequence[str] = OBSERVABLE_TRACE_COLUMNS,
+    stop_when_filled: bool = False,
+    compression: str = "none",
+    specs: dict[str, tuple[str, int]] | None = None,
+) -> tuple[dict[str, Path], int, Sequence[object] | None]:
+    """Write every crop variant of a row stream in a single pass.
+
+    Prefix crops stop collecting once full, suffix crops keep only a ring
+    buffer of their last rows and stride crops write as they go, so memory is
+    bounded by the longest suffix. With ``stop_when_filled`` (prefix crops
+    only) the stream is abandoned as soon as every prefix is full; when
+    ``rows`` is a simulation generator this stops the simulation too.
+
+    ``specs`` maps a crop name to its (kind, length) when the name itself
+    does not say it, as for make_crop_variants' fixed names.
+
+    Returns the written paths by crop name, the number of rows consumed and
+    the last row consumed (None for an empty stream).
+    """
+    specs = specs or {}
+    if stop_when_filled and not all((specs.get(name) or parse_crop(name))[0] == "prefix" for name in crops):
+        raise ValueError("stop_when_filled needs prefix crops only; other crops depend on the whole trace.")
     output_dir = Path(output_dir)
-    stem = Path(raw_trace_csv).stem
+    sinks = [
+        _open_sink(name, compressed_path(output_dir / f"{stem}__{name}.csv", compression), header, specs.get(name))
+        for name in crops
+    ]
+
+    consumed = 0
+    last: Sequence[object] | None = None
+    try:
+        for last in rows:
+            for sink in sinks:
+                sink.push(last)
+            consumed += 1
+            if stop_when_filled and all(sink.filled for sink in sinks):
+                break
+    finally:
+        paths = {sink.name: sink.close() for sink in sinks}
+    return paths, consumed, last
 
-    variants = {
-        "full": rows,
-        "prefix10": rows[:prefix_k],
-        "suffix10": rows[-suffix_k:] if rows else [],
-        "stride3": rows[::stride] if stride > 0 else rows,
+
+def make_crop_variants(
+    raw_trace_csv: str | Path,
+    output_dir: str | Path,
+    *,
+    prefix_k: int = 10,
+    suffix_k: int = 10,
+    stride: int = 3,
+    compression: str = "none",
+) -> dict[str, Path]:
+    # The variant names stay prefix10 / suffix10 / stride3 whatever the
+    # lengths, as the {stem}__{name}.csv files have always been named.
+    specs = {
+        "full": ("full", 0),
+        "prefix10": ("prefix", prefix_k),
+        "suffix10": ("suffix", suffix_k),
+        "stride3": ("stride", stride if stride > 0 else 1),
     }
+    stem = plain_path(raw_trace_csv).stem
+    with open_text(raw_trace_csv, newline="") as handle:
+        reader = csv.reader(handle)
+        header = next(reader, OBSERVABLE_TRACE_COLUMNS)
+        paths, _, _ = write_crop_variants(
+            reader, output_dir, stem, list(specs), header=header, compression=compression, specs=specs
+        )
+    return paths
+
 
+def write_indexed_crop_variants(
+    index: TraceIndex,
+    run_ref: str,
+    output_dir: str | Path,
+    crops: Sequence[str] = DEFAULT_CROPS,
+    *,
+    compression: str = "none",
+) -> dict[str, Path]:
+    """Write crop variants of an archived run by slicing it through a TraceIndex.
+
+    Prefix and suffix crops only unpack their own events, so their cost does
+    not depend on the length of the run.
+    """
+    packed = split_archive_ref(run_ref)
+    stem = packed[1] if packed else run_ref
+    output_dir = Path(output_dir)
     out: dict[str, Path] = {}
-    for crop_name, crop_rows in variants.items():
-        out[crop_name] = _write_rows(crop_rows, output_dir / f"{stem}__{crop_name}.csv")
+    for name in crops:
+        kind, k = parse_crop(name)
+        if kind == "prefix":
+            rows = index.get_events(run_ref, 0, k).csv_rows()
+        elif kind == "suffix":
+            rows = index.get_events(run_ref, -k if k else index.num_events(run_ref)).csv_rows()
+        else:
+            rows = index.get_events(run_ref).csv_rows(stride=k or 1)
+        # Rows are already cropped, so they pass through a stride-1 sink unchanged.
+        out_path = compressed_path(output_dir / f"{stem}__{name}.csv", compression)
+        sink = _StrideSink(name, out_path, OBSERVABLE_TRACE_COLUMNS, 1)
+        for row in rows:
+            sink.push(row)
+        out[name] = sink.close()
     return out
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import random
+from typing import Iterator
+
+from .moran import (
+    MoranEvent,
+    _check_params,
+    event_from_step,
+    indexed_steps,
+    reference_steps,
+    simulate_moran_run,
+    simulate_moran_run_indexed,
+)
+from .kernel import compiled_steps, simulate_moran_run_compiled
+from .skip import simulate_moran_run_skip, skip_steps
+
+# Per-run engines sharing the simulate_moran_run signature.
+ENGINES = {
+    "reference": simulate_moran_run,
+    "indexed": simulate_moran_run_indexed,
+    "skip": simulate_moran_run_skip,
+    "compiled": simulate_moran_run_compiled,
+}
+
+# Step generators behind ENGINES; a streamed run draws exactly what the
+# in-memory engine of the same name draws.
+STEP_GENERATORS = {
+    "reference": reference_steps,
+    "indexed": indexed_steps,
+    "skip": skip_steps,
+    "compiled": compiled_steps,
+}
+
+
+def resolve_engine(engine: str) -> str:
+    """Map "auto" to the compiled kernel.
+
+    It gives the same traces with or without numba (only the speed differs),
+    so a seed reproduces the same dataset on every machine.
+    """
+    return "compiled" if engine == "auto" else engine
+
+
+def iter_moran_events(
+    *,
+    r: float,
+    N: int,
+    i0: int,
+    rng: random.Random,
+    engine: str = "reference",
+) -> Iterator[MoranEvent]:
+    """Yield a run's events one at a time without keeping them in memory."""
+    _check_params(r, N, i0)
+    if engine not in STEP_GENERATORS:
+        raise ValueError(f"Engine {engine!r} cannot stream; expected one of {sorted(STEP_GENERATORS)}.")
+    for step, t in enumerate(STEP_GENERATORS[engine](r, N, i0, rng)):
+        yield event_from_step(step, t, N)
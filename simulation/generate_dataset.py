@@ -2,9 +2,29 @@ from __future__ import annotations
 
 import csv
 import random
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
-from .io import write_run_metadata_json, write_run_trace_csv
-from .moran import simulate_moran_run
+from .approx import APPROX_ENGINE, LeapMoranRun, leap_rho_check, simulate_moran_leaping
+from .crop import is_prefix_only, parse_crop, write_crop_variants
+from .engines import ENGINES, STEP_GENERATORS, iter_moran_events, resolve_engine
+from .graph import GRAPH_KINDS, Graph, graph_steps, make_graph, simulate_moran_run_graph
+from .io import (
+    COMPRESSIONS,
+    compressed_path,
+    event_row,
+    write_count_trace_csv,
+    write_event_stream_csv,
+    write_leap_trace_csv,
+    write_run_metadata_json,
+    write_run_trace_csv,
+)
+from .moran import StreamedRun, event_from_step
+from .seeding import derive_seed, keyed_rng
+from .seedstore import SeedRef, check_seed_engine
+from .skip import simulate_moran_counts
+
+SUMMARY_FIELDNAMES = ["run_id", "trace_csv", "meta_json", "true_r", "true_N", "true_i0", "num_events_full"]
 
 
 def _sample_r(rng: random.Random) -> float:
@@ -12,6 +32,204 @@ def _sample_r(rng: random.Random) -> float:
     return round(rng.uniform(0.6, 1.8), 2)
 
 
+@dataclass(frozen=True)
+class _RunOptions:
+    raw_dir: Path
+    engine: str
+    counts_only: bool
+    exact_max_N: int | None
+    stream: bool
+    crop_dir: Path | None = None
+    crops: tuple[str, ...] = ()
+    crop_stop_early: bool = False
+    graph: str | None = None
+    compression: str = "none"
+
+
+def _stream_run(
+    raw_dir: Path,
+    run_id: str,
+    r: float,
+    N: int,
+    i0: int,
+    rng: random.Random,
+    engine: str,
+    compression: str,
+) -> StreamedRun:
+    events = iter_moran_events(r=r, N=N, i0=i0, rng=rng, engine=engine)
+    _, num_events, absorbed_type = write_event_stream_csv(events, raw_dir / f"{run_id}.csv", compression=compression)
+    return StreamedRun(
+        run_id=run_id, true_r=r, true_N=N, true_i0=i0, absorbed_type=absorbed_type, num_events=num_events
+    )
+
+
+def _stream_graph_run(
+    raw_dir: Path,
+    run_id: str,
+    graph: Graph,
+    r: float,
+    i0: int,
+    rng: random.Random,
+    compression: str,
+) -> StreamedRun:
+    N = graph.N
+    events = (event_from_step(step, t, N) for step, t in enumerate(graph_steps(graph, r, i0, rng)))
+    _, num_events, absorbed_type = write_event_stream_csv(events, raw_dir / f"{run_id}.csv", compression=compression)
+    return StreamedRun(
+        run_id=run_id, true_r=r, true_N=N, true_i0=i0, absorbed_type=absorbed_type, num_events=num_events
+    )
+
+
+def _crop_run(
+    opts: _RunOptions,
+    run_id: str,
+    r: float,
+    N: int,
+    i0: int,
+    rng: random.Random,
+) -> tuple[StreamedRun, dict[str, Path]]:
+    events = iter_moran_events(r=r, N=N, i0=i0, rng=rng, engine=opts.engine)
+    paths, num_events, last = write_crop_variants(
+        (event_row(ev) for ev in events),
+        opts.crop_dir,
+        run_id,
+        opts.crops,
+        stop_when_filled=opts.crop_stop_early,
+        compression=opts.compression,
+    )
+    # last[7] is mutants_after; a run cut short by crop_stop_early has no outcome.
+    absorbed_type = None
+    if last is not None and last[7] in (0, N):
+        absorbed_type = "A" if last[7] == N else "B"
+    run = StreamedRun(
+        run_id=run_id, true_r=r, true_N=N, true_i0=i0, absorbed_type=absorbed_type, num_events=num_events
+    )
+    return run, paths
+
+
+def _simulate_point(
+    opts: _RunOptions,
+    run_ids: list[str],
+    true_r: float,
+    true_N: int,
+    true_i0: int,
+    rng: random.Random,
+) -> list[dict[str, str | int | float]]:
+    raw_dir = opts.raw_dir
+    if opts.crops:
+        if opts.exact_max_N is not None and true_N > opts.exact_max_N:
+            raise ValueError(f"Crops need an exact engine, but N={true_N} exceeds exact_max_N.")
+        return [
+            _crop_summary_row(opts, *_crop_run(opts, run_id, true_r, true_N, true_i0, rng))
+            for run_id in run_ids
+        ]
+    # The tau-leaping switch is well-mixed only, so it never applies to graph runs.
+    if opts.engine == "graph":
+        run_engine = opts.engine
+        graph = make_graph(opts.graph, true_N)
+        meta_graph = {"graph_id": graph.graph_id}
+        if opts.stream:
+            runs = (
+                _stream_graph_run(raw_dir, run_id, graph, true_r, true_i0, rng, opts.compression)
+                for run_id in run_ids
+            )
+        else:
+            runs = (
+                simulate_moran_run_graph(graph=graph, r=true_r, i0=true_i0, run_id=run_id, rng=rng)
+                for run_id in run_ids
+            )
+    elif opts.exact_max_N is not None and true_N > opts.exact_max_N:
+        run_engine = APPROX_ENGINE
+        runs = [simulate_moran_leaping(r=true_r, N=true_N, i0=true_i0, run_id=run_id, rng=rng) for run_id in run_ids]
+        leap_check = leap_rho_check(true_r, true_N, true_i0, (run.absorbed_type for run in runs))
+    elif opts.counts_only:
+        run_engine = "counts"
+        runs = (simulate_moran_counts(r=true_r, N=true_N, i0=true_i0, run_id=run_id, rng=rng) for run_id in run_ids)
+    elif opts.stream:
+        run_engine = opts.engine
+        runs = (
+            _stream_run(raw_dir, run_id, true_r, true_N, true_i0, rng, opts.engine, opts.compression)
+            for run_id in run_ids
+        )
+    elif opts.engine == "batch":
+        run_engine = opts.engine
+        from .batch import simulate_moran_batch
+
+        batch = simulate_moran_batch(true_r, true_N, true_i0, len(run_ids), rng.getrandbits(64))
+        runs = batch.to_runs(run_ids)
+    else:
+        run_engine = opts.engine
+        simulate = ENGINES[opts.engine]
+        runs = (simulate(r=true_r, N=true_N, i0=true_i0, run_id=run_id, rng=rng) for run_id in run_ids)
+
+    compression = opts.compression
+    rows: list[dict[str, str | int | float]] = []
+    for run in runs:
+        run_id = run.run_id
+        meta_extra: dict[str, object] = {"engine": run_engine}
+        if run_engine == "graph":
+            meta_extra.update(meta_graph)
+        if isinstance(run, LeapMoranRun):
+            raw_trace_path = write_leap_trace_csv(run, raw_dir / f"{run_id}.leaps.csv", compression=compression)
+            meta_extra = {**run.metadata(), **leap_check}
+        elif isinstance(run, StreamedRun):
+            raw_trace_path = compressed_path(raw_dir / f"{run_id}.csv", compression)
+        elif opts.counts_only:
+            raw_trace_path = write_count_trace_csv(run, raw_dir / f"{run_id}.counts.csv", compression=compression)
+        else:
+            raw_trace_path = write_run_trace_csv(run, raw_dir / f"{run_id}.csv", compression=compression)
+        meta_path = write_run_metadata_json(run, raw_dir / f"{run_id}.meta.json", meta_extra)
+        rows.append(
+            {
+                "run_id": run_id,
+                "trace_csv": str(raw_trace_path),
+                "meta_json": str(meta_path),
+                "true_r": true_r,
+                "true_N": true_N,
+                "true_i0": true_i0,
+                "num_events_full": run.num_events,
+            }
+        )
+    return rows
+
+
+def _crop_summary_row(
+    opts: _RunOptions,
+    run: StreamedRun,
+    paths: dict[str, Path],
+) -> dict[str, str | int | float]:
+    stopped = run.absorbed_type is None
+    meta_extra: dict[str, object] = {"engine": opts.engine, "crops": list(opts.crops), "stopped_early": stopped}
+    meta_path = write_run_metadata_json(run, opts.raw_dir / f"{run.run_id}.meta.json", meta_extra)
+    row: dict[str, str | int | float] = {
+        "run_id": run.run_id,
+        "trace_csv": str(paths["full"] if "full" in paths else paths[opts.crops[0]]),
+        "meta_json": str(meta_path),
+        "true_r": run.true_r,
+        "true_N": run.true_N,
+        "true_i0": run.true_i0,
+        "num_events_full": "" if stopped else run.num_events,
+    }
+    for crop, path in paths.items():
+        row[f"trace_csv__{crop}"] = str(path)
+    return row
+
+
+def _write_summary(path: Path, rows: list[dict[str, str | int | float]]) -> Path:
+    with path.open("w", newline="", encoding="utf-8") as handle:
+        writer = csv.DictWriter(handle, fieldnames=SUMMARY_FIELDNAMES, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(rows)
+    return path
+
+
+def _run_keyed_job(
+    job: tuple[_RunOptions, list[str], float, int, int, int],
+) -> list[dict[str, str | int | float]]:
+    opts, run_ids, true_r, true_N, true_i0, job_seed = job
+    return _simulate_point(opts, run_ids, true_r, true_N, true_i0, random.Random(job_seed))
+
+
 def generate_dataset(
     *,
     num_experiments: int,
@@ -21,14 +239,66 @@ def generate_dataset(
     fixed_r: float | None = None,
     fixed_N: int | None = None,
     fixed_i0: int | None = None,
+    engine: str = "reference",
+    counts_only: bool = False,
+    exact_max_N: int | None = 10_000,
+    stream: bool = False,
+    workers: int | None = None,
+    storage: str = "csv",
+    crops: list[str] | tuple[str, ...] | None = None,
+    crop_stop_early: bool = False,
+    graph: str | None = None,
+    compression: str = "none",
 ) -> Path:
+    """Simulate the dataset and write traces, metadata and the summary CSV.
+
+    Experiments with N above ``exact_max_N`` switch to the approximate
+    tau-leaping engine (graph runs never do, since it is well-mixed only)
+    and write count-level ``.leaps.csv`` traces; the
+    metadata JSON records which engine produced each run, and the fixation
+    rate of the point's runs with its error bound against the exact rho_i
+    (see simulation.approx.leap_rho_check; with ``workers`` each run is
+    checked on its own).
+
+    With ``stream=True`` each trace is written while it is simulated, so
+    memory stays bounded regardless of run length.
+
+    By default one ``random.Random(seed)`` is threaded through every
+    experiment and replicate. Passing ``workers`` instead gives each
+    experiment's parameters and each run its own stream derived from
+    (seed, key) and spreads the runs over a process pool; the output is then
+    identical for any number of workers.
+
+    ``storage="seed"`` writes no trace files at all: each summary row's
+    ``trace_csv`` holds a seed reference from which
+    simulation.seedstore.regenerate_run rebuilds that one run on demand.
+    It always uses per-run seed streams.
+
+    ``crops`` (names such as ``full``, ``prefix10``, ``suffix10``,
+    ``stride3``) streams each run through crop sinks instead of writing its
+    trace: every variant lands in ``data/cropped/{run_id}__{crop}.csv`` in a
+    single pass, and a ``dataset_summary__{crop}.csv`` is written per crop.
+    ``crop_stop_early`` (prefix crops only) ends each run once its prefixes
+    are full; those runs have no outcome and a blank ``num_events_full``.
+
+    ``engine="graph"`` runs the birth-death process on the structured
+    population named by ``graph`` (see simulation.graph.make_graph), built
+    on each experiment's N; the metadata records its graph_id.
+
+    ``engine="auto"`` is the compiled kernel, jitted when numba is
+    installed; its traces are the same either way.
+
+    ``compression`` ("gzip" or "zstd") writes every trace and crop CSV
+    compressed, as ``.csv.gz`` / ``.csv.zst``; the summary CSVs stay plain.
+    All trace readers detect compressed files on their own.
+    """
     base_dir = Path(base_dir)
+    engine = resolve_engine(engine)
     raw_dir = base_dir / "data" / "raw"
     results_dir = base_dir / "data" / "results"
     raw_dir.mkdir(parents=True, exist_ok=True)
     results_dir.mkdir(parents=True, exist_ok=True)
 
-    rng = random.Random(seed)
     summary_rows: list[dict[str, str | int | float]] = []
 
     if fixed_N is not None and fixed_N < 2:
@@ -39,34 +309,105 @@ def generate_dataset(
         raise ValueError("i0 must satisfy 1 <= i0 < N.")
     if fixed_r is not None and fixed_r <= 0:
         raise ValueError("r must be positive.")
+    if engine not in ("batch", "graph") and engine not in ENGINES:
+        raise ValueError(f"Unknown engine {engine!r}; expected one of {sorted(ENGINES) + ['batch', 'graph']}.")
+    if (engine == "graph") != (graph is not None):
+        raise ValueError(f"The graph engine needs a graph ({list(GRAPH_KINDS)}) and a graph needs engine='graph'.")
+    if engine == "graph" and (counts_only or storage != "csv"):
+        raise ValueError("The graph engine cannot be combined with counts_only or seed-only storage.")
+    if stream and engine != "graph" and engine not in STEP_GENERATORS:
+        raise ValueError(f"Engine {engine!r} cannot stream; expected one of {sorted(STEP_GENERATORS)}.")
+    if workers is not None and workers < 1:
+        raise ValueError("workers must be at least 1.")
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"Unknown compression {compression!r}; expected one of {list(COMPRESSIONS)}.")
+    if storage not in ("csv", "seed"):
+        raise ValueError(f"Unknown storage {storage!r}; expected 'csv' or 'seed'.")
+    crops = tuple(crops or ())
+    for crop in crops:
+        parse_crop(crop)
+    if crops:
+        if counts_only or stream or storage != "csv":
+            raise ValueError("Crops cannot be combined with counts_only, stream or seed-only storage.")
+        if engine not in STEP_GENERATORS:
+            raise ValueError(f"Engine {engine!r} cannot feed crops; expected one of {sorted(STEP_GENERATORS)}.")
+        if crop_stop_early and not is_prefix_only(crops):
+            raise ValueError("crop_stop_early needs prefix crops only; other crops depend on the whole trace.")
+    elif crop_stop_early:
+        raise ValueError("crop_stop_early needs crops.")
+    if storage == "seed":
+        if counts_only or stream:
+            raise ValueError("Seed-only storage cannot be combined with counts_only or stream.")
+        check_seed_engine(engine)
+
+    opts = _RunOptions(
+        raw_dir=raw_dir,
+        engine=engine,
+        counts_only=counts_only,
+        exact_max_N=exact_max_N,
+        stream=stream,
+        crop_dir=base_dir / "data" / "cropped" if crops else None,
+        crops=crops,
+        crop_stop_early=crop_stop_early,
+        graph=graph,
+        compression=compression,
+    )
 
-    for exp_idx in range(1, num_experiments + 1):
+    def sample_params(rng: random.Random) -> tuple[float, int, int]:
         true_r = fixed_r if fixed_r is not None else _sample_r(rng)
         true_N = fixed_N if fixed_N is not None else rng.randint(15, 25)
         true_i0 = fixed_i0 if fixed_i0 is not None else rng.randint(1, true_N - 1)
-        for rep_idx in range(1, replicates + 1):
-            run_id = f"exp{exp_idx:03d}_run{rep_idx:02d}"
-            run = simulate_moran_run(r=true_r, N=true_N, i0=true_i0, run_id=run_id, rng=rng)
-            raw_trace_path = write_run_trace_csv(run, raw_dir / f"{run_id}.csv")
-            meta_path = write_run_metadata_json(run, raw_dir / f"{run_id}.meta.json")
-            summary_rows.append(
-                {
+        return true_r, true_N, true_i0
+
+    if storage == "seed":
+        if seed is None:
+            seed = random.SystemRandom().getrandbits(64)
+        for exp_idx in range(1, num_experiments + 1):
+            true_r, true_N, true_i0 = sample_params(keyed_rng(seed, "experiment", exp_idx))
+            if exact_max_N is not None and true_N > exact_max_N:
+                raise ValueError(f"Seed-only storage needs an exact engine, but N={true_N} exceeds exact_max_N.")
+            for rep_idx in range(1, replicates + 1):
+                run_id = f"exp{exp_idx:03d}_run{rep_idx:02d}"
+                ref = SeedRef(engine=engine, r=true_r, N=true_N, i0=true_i0, seed=seed, run_id=run_id)
+                summary_rows.append({
                     "run_id": run_id,
-                    "trace_csv": str(raw_trace_path),
-                    "meta_json": str(meta_path),
+                    "trace_csv": str(ref),
+                    "meta_json": "",
                     "true_r": true_r,
                     "true_N": true_N,
                     "true_i0": true_i0,
-                    "num_events_full": len(run.steps),
-                }
-            )
+                    "num_events_full": "",
+                })
+    elif workers is None:
+        rng = random.Random(seed)
+        for exp_idx in range(1, num_experiments + 1):
+            true_r, true_N, true_i0 = sample_params(rng)
+            run_ids = [f"exp{exp_idx:03d}_run{rep_idx:02d}" for rep_idx in range(1, replicates + 1)]
+            summary_rows.extend(_simulate_point(opts, run_ids, true_r, true_N, true_i0, rng))
+    else:
+        if seed is None:
+            seed = random.SystemRandom().getrandbits(64)
+        jobs: list[tuple[_RunOptions, list[str], float, int, int, int]] = []
+        for exp_idx in range(1, num_experiments + 1):
+            true_r, true_N, true_i0 = sample_params(keyed_rng(seed, "experiment", exp_idx))
+            run_ids = [f"exp{exp_idx:03d}_run{rep_idx:02d}" for rep_idx in range(1, replicates + 1)]
+            if engine == "batch":
+                jobs.append((opts, run_ids, true_r, true_N, true_i0, derive_seed(seed, "batch", exp_idx)))
+            else:
+                jobs.extend(
+                    (opts, [run_id], true_r, true_N, true_i0, derive_seed(seed, "run", run_id))
+                    for run_id in run_ids
+                )
+        if workers == 1:
+            for rows in map(_run_keyed_job, jobs):
+                summary_rows.extend(rows)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                # map() yields in submission order, so summary rows stay in run_id order.
+                for rows in pool.map(_run_keyed_job, jobs, chunksize=max(1, len(jobs) // (workers * 4))):
+                    summary_rows.extend(rows)
 
-    summary_path = results_dir / "dataset_summary.csv"
-    with summary_path.open("w", newline="", encoding="utf-8") as handle:
-        writer = csv.DictWriter(
-            handle,
-        fieldnames=["run_id", "trace_csv", "meta_json", "true_r", "true_N", "true_i0", "num_events_full"],
-        )
-        writer.writeheader()
-        writer.writerows(summary_rows)
-    return summary_path
\ No newline at end of file
+    for crop in crops:
+        crop_rows = [{**row, "trace_csv": row[f"trace_csv__{crop}"]} for row in summary_rows]
+        _write_summary(results_dir / f"dataset_summary__{crop}.csv", crop_rows)
+    return _write_summary(results_dir / "dataset_summary.csv", summary_rows)
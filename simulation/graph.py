@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+from array import array
+from dataclasses import dataclass
+from functools import lru_cache
+import math
+import random
+import re
+from typing import Iterator
+
+from .moran import MoranRun, StepTuple, _check_params, collect_run
+from .seeding import keyed_rng
+
+GRAPH_KINDS = ("cycle", "star", "lattice", "regular<d>")
+
+_REGULAR_PATTERN = re.compile(r"regular(\d+)")
+
+
+@dataclass(frozen=True)
+class Graph:
+    """Undirected graph in CSR form: the neighbours of v are indices[indptr[v]:indptr[v + 1]]."""
+
+    graph_id: str
+    indptr: array
+    indices: array
+
+    @property
+    def N(self) -> int:
+        return len(self.indptr) - 1
+
+    def degree(self, v: int) -> int:
+        return self.indptr[v + 1] - self.indptr[v]
+
+    def neighbours(self, v: int) -> array:
+        return self.indices[self.indptr[v]:self.indptr[v + 1]]
+
+
+def _from_adjacency(graph_id: str, adjacency: list[list[int]]) -> Graph:
+    indptr = array("l", [0])
+    indices = array("i")
+    for nbrs in adjacency:
+        if not nbrs:
+            raise ValueError(f"Graph {graph_id} has an isolated node.")
+        indices.extend(nbrs)
+        indptr.append(len(indices))
+    return Graph(graph_id=graph_id, indptr=indptr, indices=indices)
+
+
+def cycle_graph(N: int) -> Graph:
+    if N < 3:
+        raise ValueError("A cycle needs at least 3 nodes.")
+    return _from_adjacency(f"cycle_N{N}", [[(v - 1) % N, (v + 1) % N] for v in range(N)])
+
+
+def star_graph(N: int) -> Graph:
+    """Node 0 is the hub; every other node is a leaf."""
+    if N < 2:
+        raise ValueError("A star needs at least 2 nodes.")
+    return _from_adjacency(f"star_N{N}", [list(range(1, N))] + [[0] for _ in range(1, N)])
+
+
+def lattice_graph(N: int) -> Graph:
+    """Square periodic lattice (torus) with four neighbours per node."""
+    side = math.isqrt(N)
+    if side * side != N or side < 3:
+        raise ValueError(f"A lattice needs N to be a square of at least 9, got N={N}.")
+    adjacency = []
+    for v in range(N):
+        row, col = divmod(v, side)
+        adjacency.append([
+            ((row - 1) % side) * side + col,
+            ((row + 1) % side) * side + col,
+            row * side + (col - 1) % side,
+            row * side + (col + 1) % side,
+        ])
+    return _from_adjacency(f"lattice_N{N}", adjacency)
+
+
+def _is_connected(graph: Graph) -> bool:
+    seen = bytearray(graph.N)
+    seen[0] = 1
+    stack = [0]
+    reached = 1
+    while stack:
+        v = stack.pop()
+        for u in graph.neighbours(v):
+            if not seen[u]:
+                seen[u] = 1
+                reached += 1
+                stack.append(u)
+    return reached == graph.N
+
+
+def random_regular_graph(N: int, d: int, rng: random.Random, *, max_tries: int = 1000) -> Graph:
+    """Connected simple d-regular graph from the pairing model, resampled until valid."""
+    if not (1 <= d < N) or (N * d) % 2:
+        raise ValueError(f"No {d}-regular graph on {N} nodes.")
+    stubs = [v for v in range(N) for _ in range(d)]
+    for _ in range(max_tries):
+        rng.shuffle(stubs)
+        adjacency: list[list[int]] = [[] for _ in range(N)]
+        edges: set[tuple[int, int]] = set()
+        for k in range(0, len(stubs), 2):
+            u, v = stubs[k], stubs[k + 1]
+            edge = (u, v) if u < v else (v, u)
+            if u == v or edge in edges:
+                break
+            edges.add(edge)
+            adjacency[u].append(v)
+            adjacency[v].append(u)
+        else:
+            graph = _from_adjacency(f"regular{d}_N{N}", adjacency)
+            if _is_connected(graph):
+                return graph
+    raise ValueError(f"Could not sample a connected simple {d}-regular graph on {N} nodes in {max_tries} tries.")
+
+
+@lru_cache(maxsize=8)
+def make_graph(kind: str, N: int) -> Graph:
+    """Build the graph named by ``kind`` on N nodes.
+
+    Random regular graphs are drawn from a stream keyed by (kind, N), so the
+    same graph_id always denotes the same graph.
+    """
+    if kind == "cycle":
+        return cycle_graph(N)
+    if kind == "star":
+        return star_graph(N)
+    if kind == "lattice":
+        return lattice_graph(N)
+    match = _REGULAR_PATTERN.fullmatch(kind)
+    if match:
+        return random_regular_graph(N, int(match.group(1)), keyed_rng(0, "graph", kind, N))
+    raise ValueError(f"Unknown graph {kind!r}; expected one of {list(GRAPH_KINDS)}.")
+
+
+def graph_steps(graph: Graph, r: float, i0: int, rng: random.Random) -> Iterator[StepTuple]:
+    """Birth-death steps on a graph; nodes 0..i0-1 start as mutants.
+
+    The birth individual is drawn by fitness with the same partitioned
+    order/slot pool as indexed_steps; it replaces a uniformly chosen
+    neighbour, read straight from the CSR arrays.
+    """
+    N = graph.N
+    indptr = graph.indptr
+    indices = graph.indices
+    order = list(range(N))
+    slot = list(range(N))
+    i = i0
+
+    while 0 < i < N:
+        mutants_before = i
+        birth_mutant = rng.random() * (i * r + N - i) < i * r
+        if birth_mutant:
+            birth_index = order[rng.randrange(i)]
+        else:
+            birth_index = order[i + rng.randrange(N - i)]
+
+        start = indptr[birth_index]
+        death_index = indices[start + rng.randrange(indptr[birth_index + 1] - start)]
+        death_mutant = slot[death_index] < i
+
+        if birth_mutant != death_mutant:
+            boundary = i if birth_mutant else i - 1
+            other = order[boundary]
+            order[slot[death_index]] = other
+            slot[other] = slot[death_index]
+            order[boundary] = death_index
+            slot[death_index] = boundary
+            i += 1 if birth_mutant else -1
+
+        yield birth_index, birth_mutant, death_index, death_mutant, mutants_before, i
+
+
+def simulate_moran_run_graph(*, graph: Graph, r: float, i0: int, run_id: str, rng: random.Random) -> MoranRun:
+    _check_params(r, graph.N, i0)
+    return collect_run(r=r, N=graph.N, i0=i0, run_id=run_id, steps=graph_steps(graph, r, i0, rng))
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+# (r, i0) grid points of the runners, shared by run_grid.py,
+# run_estimation_grid.py and the mc-rho --grid sweep. Edit them here.
+
+# ── Classification (run_grid.py) ─────────────────────────────────────────────
+
+CLASSIFY_N = 20
+
+CLASSIFY_GRID = [
+    (1.6666, 1),   # rho = 0.4000
+    (1.2883, 2),   # rho = 0.4000
+    (1.5810, 2),   # rho = 0.6000
+    (1.1754, 3),   # rho = 0.4000
+    (1.3557, 3),   # rho = 0.6000
+    (1.1161, 4),   # rho = 0.4000
+    (1.2522, 4),   # rho = 0.6000
+    (1.0766, 5),   # rho = 0.4000
+    (1.1904, 5),   # rho = 0.6000
+    (1.0466, 6),   # rho = 0.4000
+    (1.1473, 6),   # rho = 0.6000
+    (1.0218, 7),   # rho = 0.4000
+    (1.1143, 7),   # rho = 0.6000
+    (1.0000, 8),   # rho = 0.4000
+    (1.0870, 8),   # rho = 0.6000
+    (0.9798, 9),   # rho = 0.4000
+    (1.0631, 9),   # rho = 0.6000
+    (0.9603, 10),   # rho = 0.4000
+    (1.0414, 10),   # rho = 0.6000
+    (0.9406, 11),   # rho = 0.4000
+    (1.0206, 11),   # rho = 0.6000
+    (0.9200, 12),   # rho = 0.4000
+    (1.0000, 12),   # rho = 0.6000
+    (0.8975, 13),   # rho = 0.4000
+    (0.9786, 13),   # rho = 0.6000
+    (0.8716, 14),   # rho = 0.4000
+    (0.9555, 14),   # rho = 0.6000
+    (0.8401, 15),   # rho = 0.4000
+    (0.9289, 15),   # rho = 0.6000
+    (0.7986, 16),   # rho = 0.4000
+    (0.8960, 16),   # rho = 0.6000
+    (0.7376, 17),   # rho = 0.4000
+    (0.8508, 17),   # rho = 0.6000
+    (0.6325, 18),   # rho = 0.4000
+    (0.7762, 18),   # rho = 0.6000
+    (0.4000, 19),   # rho = 0.4000
+    (0.6000, 19),   # rho = 0.6000
+]
+
+# ── Estimation (run_estimation_grid.py) ──────────────────────────────────────
+
+ESTIMATION_N = 15
+
+NUM = 13
+NUM2 = 9
+NUM3 = 11
+
+ESTIMATION_GRID = [
+    # (r,    i0)
+    (0.25,   NUM),
+    (0.5,    NUM),
+    (0.75,   NUM),
+    (1,      NUM),
+    (1.25,   NUM),
+    (1.5,    NUM),
+    (1.75,   NUM),
+]
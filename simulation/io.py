@@ -1,9 +1,27 @@
 from __future__ import annotations
 
+from array import array
 import csv
+from functools import lru_cache
+import gzip
 import json
+import mmap
+import os
 from pathlib import Path
-from .moran import MoranRun
+import struct
+from typing import IO, Iterable
+
+import numpy as np
+
+from .approx import LeapMoranRun
+from .moran import _BIRTH_A, _DEATH_A, MoranEvent, MoranRun, MoranTrace, StreamedRun, TypeLabel
+from .seedstore import SeedRef, is_seed_ref, regenerate_run
+from .skip import CompressedMoranRun, CountSegment
+
+try:
+    import zstandard
+except ImportError:  # zstd is optional; gzip needs only the standard library.
+    zstandard = None
 
 OBSERVABLE_TRACE_COLUMNS = [
     "step",
@@ -17,31 +35,236 @@ OBSERVABLE_TRACE_COLUMNS = [
     "N",
 ]
 
+COUNT_TRACE_COLUMNS = ["segment", "null_events", "mutants_before", "mutants_after", "N"]
+LEAP_TRACE_COLUMNS = ["leap", "events", "mutants_before", "mutants_after", "N"]
+
+# Trace archive: all replicates of a grid point in one file.
+#
+#   magic        8 bytes  b"MORANTR1"
+#   header_len   uint32, little-endian
+#   header       UTF-8 JSON, then zero padding to a multiple of 8 bytes
+#   columns      each starting on an 8-byte boundary of the data section
+#
+# The header lists the runs (run_id, true_r, true_N, true_i0, absorbed_type)
+# and, per column, its NumPy dtype string, byte offset from the start of the
+# data section and element count. Columns:
+#
+#   offsets          int64, num_runs + 1; run k is events [offsets[k], offsets[k+1])
+#   birth_index      narrowest unsigned int that holds N - 1
+#   death_index      same
+#   mutants_before   narrowest unsigned int that holds N
+#   birth_is_mutant  np.packbits bit column, one bit per event
+#   death_is_mutant  same
+#
+# step, event and mutants_after are derived on read.
+TRACE_ARCHIVE_MAGIC = b"MORANTR1"
+TRACE_ARCHIVE_VERSION = 1
+TRACE_ARCHIVE_SUFFIX = ".mtrace"
+ARCHIVE_REF_SEP = "#"
+
+# Text files (trace CSVs, batch JSONL) may be stored gzip- or zstd-compressed
+# under the plain name plus .gz / .zst. Readers go by the leading magic bytes,
+# so the suffix only matters for writing and for finding files.
+COMPRESSIONS = ("none", "gzip", "zstd")
+COMPRESSION_SUFFIXES = {"gzip": ".gz", "zstd": ".zst"}
+_GZIP_MAGIC = b"\x1f\x8b"
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+
+def _check_compression(compression: str) -> None:
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"Unknown compression {compression!r}; expected one of {list(COMPRESSIONS)}.")
+    if compression == "zstd" and zstandard is None:
+        raise RuntimeError("zstd compression needs the zstandard package, which is not installed.")
+
+
+def compressed_path(path: str | Path, compression: str) -> Path:
+    """``path`` with the suffix for ``compression`` appended (unchanged for "none")."""
+    _check_compression(compression)
+    path = Path(path)
+    suffix = COMPRESSION_SUFFIXES.get(compression, "")
+    return path if not suffix or path.name.endswith(suffix) else path.with_name(path.name + suffix)
+
+
+def plain_path(path: str | Path) -> Path:
+    """``path`` without a trailing .gz / .zst."""
+    path = Path(path)
+    for suffix in COMPRESSION_SUFFIXES.values():
+        if path.name.endswith(suffix):
+            return path.with_name(path.name[: -len(suffix)])
+    return path
+
+
+def stored_variants(path: str | Path) -> list[Path]:
+    """Existing files for a plain name: the name itself and its compressed forms."""
+    path = plain_path(path)
+    candidates = [path] + [path.with_name(path.name + suffix) for suffix in COMPRESSION_SUFFIXES.values()]
+    return [p for p in candidates if p.is_file()]
+
+
+def find_stored(path: str | Path) -> Path:
+    """The stored file for a plain name, compressed or not; ``path`` itself if none exists."""
+    variants = stored_variants(path)
+    return variants[0] if variants else Path(path)
+
+
+def sniff_compression(path: str | Path) -> str:
+    with Path(path).open("rb") as handle:
+        head = handle.read(4)
+    if head.startswith(_GZIP_MAGIC):
+        return "gzip"
+    if head.startswith(_ZSTD_MAGIC):
+        return "zstd"
+    return "none"
+
+
+def _suffix_compression(path: Path) -> str:
+    for compression, suffix in COMPRESSION_SUFFIXES.items():
+        if path.name.endswith(suffix):
+            return compression
+    return "none"
+
+
+def open_text(path: str | Path, mode: str = "r", *, newline: str | None = None) -> IO[str]:
+    """Open a text file that may be compressed, streaming through the codec.
+
+    Reading detects gzip and zstd by their magic bytes; writing and appending
+    compress according to the file's .gz / .zst suffix.
+    """
+    path = Path(path)
+    if mode not in ("r", "w", "a"):
+        raise ValueError(f"open_text mode must be 'r', 'w' or 'a', not {mode!r}.")
+    compression = sniff_compression(path) if mode == "r" else _suffix_compression(path)
+    _check_compression(compression)
+    if compression == "gzip":
+        return gzip.open(path, mode + "t", encoding="utf-8", newline=newline)
+    if compression == "zstd":
+        return zstandard.open(path, mode + "t", encoding="utf-8", newline=newline)
+    return path.open(mode, encoding="utf-8", newline=newline)
+
 
-def write_run_trace_csv(run: MoranRun, csv_path: str | Path) -> Path:
-    csv_path = Path(csv_path)
+def read_plain_bytes(path: str | Path) -> bytes:
+    """Whole file contents, decompressed if the file is compressed."""
+    path = Path(path)
+    compression = sniff_compression(path)
+    _check_compression(compression)
+    if compression == "gzip":
+        return gzip.decompress(path.read_bytes())
+    if compression == "zstd":
+        with zstandard.open(path, "rb") as handle:
+            return handle.read()
+    return path.read_bytes()
+
+
+def event_row(ev: MoranEvent) -> list[object]:
+    """One event as a row in OBSERVABLE_TRACE_COLUMNS order."""
+    return [
+        ev.step,
+        ev.event,
+        ev.birth_index,
+        ev.birth_type,
+        ev.death_index,
+        ev.death_type,
+        ev.mutants_before,
+        ev.mutants_after,
+        ev.N,
+    ]
+
+
+def write_run_trace_csv(run: MoranRun, csv_path: str | Path, *, compression: str = "none") -> Path:
+    csv_path = compressed_path(csv_path, compression)
     csv_path.parent.mkdir(parents=True, exist_ok=True)
-    with csv_path.open("w", newline="", encoding="utf-8") as handle:
-        writer = csv.DictWriter(handle, fieldnames=OBSERVABLE_TRACE_COLUMNS)
-        writer.writeheader()
-        for ev in run.steps:
-            writer.writerow(
-                {
-                    "step": ev.step,
-                    "event": ev.event,
-                    "birth_index": ev.birth_index,
-                    "birth_type": ev.birth_type,
-                    "death_index": ev.death_index,
-                    "death_type": ev.death_type,
-                    "mutants_before": ev.mutants_before,
-                    "mutants_after": ev.mutants_after,
-                    "N": ev.N,
-                }
-            )
+    with open_text(csv_path, "w", newline="") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(OBSERVABLE_TRACE_COLUMNS)
+        writer.writerows(run.steps.csv_rows())
+    return csv_path
+
+
+def write_event_stream_csv(
+    events: Iterable[MoranEvent],
+    csv_path: str | Path,
+    *,
+    chunk_rows: int = 8192,
+    compression: str = "none",
+) -> tuple[Path, int, TypeLabel | None]:
+    """Write events as they are produced, flushing every ``chunk_rows`` rows.
+
+    Returns the path (with the compression suffix, if any), the number of
+    events and the absorbed type (taken from the last event; None for an
+    empty stream).
+    """
+    csv_path = compressed_path(csv_path, compression)
+    csv_path.parent.mkdir(parents=True, exist_ok=True)
+    num_events = 0
+    last: MoranEvent | None = None
+    with open_text(csv_path, "w", newline="") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(OBSERVABLE_TRACE_COLUMNS)
+        buffer: list[list[object]] = []
+        for last in events:
+            buffer.append(event_row(last))
+            if len(buffer) >= chunk_rows:
+                writer.writerows(buffer)
+                num_events += len(buffer)
+                buffer.clear()
+        writer.writerows(buffer)
+        num_events += len(buffer)
+    if last is None:
+        return csv_path, 0, None
+    absorbed_type: TypeLabel = "A" if last.mutants_after == last.N else "B"
+    return csv_path, num_events, absorbed_type
+
+
+def write_count_trace_csv(run: CompressedMoranRun, csv_path: str | Path, *, compression: str = "none") -> Path:
+    csv_path = compressed_path(csv_path, compression)
+    csv_path.parent.mkdir(parents=True, exist_ok=True)
+    with open_text(csv_path, "w", newline="") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(COUNT_TRACE_COLUMNS)
+        for k, seg in enumerate(run.segments):
+            writer.writerow([k, seg.null_events, seg.mutants_before, seg.mutants_after, run.true_N])
+    return csv_path
+
+
+def write_leap_trace_csv(run: LeapMoranRun, csv_path: str | Path, *, compression: str = "none") -> Path:
+    csv_path = compressed_path(csv_path, compression)
+    csv_path.parent.mkdir(parents=True, exist_ok=True)
+    with open_text(csv_path, "w", newline="") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(LEAP_TRACE_COLUMNS)
+        for k, leap in enumerate(run.leaps):
+            writer.writerow([k, leap.events, leap.mutants_before, leap.mutants_after, run.true_N])
     return csv_path
 
 
-def write_run_metadata_json(run: MoranRun, json_path: str | Path) -> Path:
+def read_count_trace_csv(csv_path: str | Path, meta_json: str | Path) -> CompressedMoranRun:
+    """Load a count-level trace; the metadata supplies r, which expansion needs."""
+    meta = json.loads(Path(meta_json).read_text(encoding="utf-8"))
+    with open_text(csv_path, newline="") as handle:
+        segments = [
+            CountSegment(
+                null_events=int(row["null_events"]),
+                mutants_before=int(row["mutants_before"]),
+                mutants_after=int(row["mutants_after"]),
+            )
+            for row in csv.DictReader(handle)
+        ]
+    return CompressedMoranRun(
+        run_id=meta["run_id"],
+        true_r=meta["true_r"],
+        true_N=meta["true_N"],
+        true_i0=meta["true_i0"],
+        absorbed_type=meta["absorbed_type"],
+        segments=segments,
+    )
+
+
+def write_run_metadata_json(
+    run: MoranRun | CompressedMoranRun | LeapMoranRun | StreamedRun,
+    json_path: str | Path,
+    extra: dict[str, object] | None = None,
+) -> Path:
     json_path = Path(json_path)
     json_path.parent.mkdir(parents=True, exist_ok=True)
     payload = {
@@ -50,7 +273,313 @@ def write_run_metadata_json(run: MoranRun, json_path: str | Path) -> Path:
         "true_N": run.true_N,
         "true_i0": run.true_i0,
         "absorbed_type": run.absorbed_type,
-        "num_events": len(run.steps),
+        "num_events": run.num_events,
+        **(extra or {}),
     }
     json_path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
     return json_path
+
+
+def trace_display_name(trace_ref: str | Path) -> str:
+    """File name shown for a trace, whether it is stored on disk or as a seed reference."""
+    if is_seed_ref(str(trace_ref)):
+        return f"{SeedRef.parse(str(trace_ref)).run_id}.csv"
+    packed = split_archive_ref(trace_ref)
+    if packed:
+        return f"{packed[1]}.csv"
+    return plain_path(trace_ref).name
+
+
+def read_trace_rows(trace_ref: str | Path) -> tuple[list[str], list[dict[str, str]]]:
+    """Return (fieldnames, rows) for a trace CSV path, a seed reference or an archive reference.
+
+    Seed references are regenerated on demand through an LRU cache; archive
+    references load the whole archive once and slice the run out of it.
+    """
+    packed = split_archive_ref(trace_ref)
+    if is_seed_ref(str(trace_ref)) or packed:
+        if packed:
+            steps = load_trace_archive(packed[0]).trace(packed[1])
+        else:
+            steps = regenerate_run(SeedRef.parse(str(trace_ref))).steps
+        rows = [
+            dict(zip(OBSERVABLE_TRACE_COLUMNS, (str(v) for v in row)))
+            for row in steps.csv_rows()
+        ]
+        return list(OBSERVABLE_TRACE_COLUMNS), rows
+    with open_text(trace_ref, newline="") as handle:
+        reader = csv.DictReader(handle)
+        rows = list(reader)
+    return list(reader.fieldnames or []), rows
+
+
+def _align8(n: int) -> int:
+    return (n + 7) & ~7
+
+
+def _narrowest_uint(max_value: int) -> np.dtype:
+    for dtype in (np.uint8, np.uint16, np.uint32):
+        if max_value <= np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    return np.dtype(np.uint64)
+
+
+def write_trace_archive(runs: Iterable[MoranRun], archive_path: str | Path) -> Path:
+    """Pack the event tables of ``runs`` into one archive file (layout above)."""
+    archive_path = Path(archive_path)
+    archive_path.parent.mkdir(parents=True, exist_ok=True)
+    runs = list(runs)
+    if not runs:
+        raise ValueError("A trace archive needs at least one run.")
+    max_N = max(run.true_N for run in runs)
+
+    lengths = np.array([len(run.steps) for run in runs], dtype=np.int64)
+    offsets = np.zeros(len(runs) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    index_dtype = _narrowest_uint(max_N - 1)
+    count_dtype = _narrowest_uint(max_N)
+
+    def concat(name: str, dtype: np.dtype) -> np.ndarray:
+        parts = [np.frombuffer(getattr(run.steps, name), dtype=np.int32) for run in runs]
+        return np.concatenate(parts).astype(dtype)
+
+    flags = np.concatenate([np.frombuffer(run.steps.flags, dtype=np.uint8) for run in runs])
+    columns = {
+        "offsets": offsets,
+        "birth_index": concat("birth_index", index_dtype),
+        "death_index": concat("death_index", index_dtype),
+        "mutants_before": concat("mutants_before", count_dtype),
+        "birth_is_mutant": np.packbits((flags & _BIRTH_A) != 0),
+        "death_is_mutant": np.packbits((flags & _DEATH_A) != 0),
+    }
+
+    layout: dict[str, dict[str, object]] = {}
+    position = 0
+    for name, col in columns.items():
+        layout[name] = {"dtype": col.dtype.str, "offset": position, "count": int(col.size)}
+        position = _align8(position + col.nbytes)
+    header = json.dumps({
+        "version": TRACE_ARCHIVE_VERSION,
+        "num_runs": len(runs),
+        "num_events": int(offsets[-1]),
+        "runs": [
+            {
+                "run_id": run.run_id,
+                "true_r": run.true_r,
+                "true_N": run.true_N,
+                "true_i0": run.true_i0,
+                "absorbed_type": run.absorbed_type,
+            }
+            for run in runs
+        ],
+        "columns": layout,
+    }).encode("utf-8")
+    prefix_len = _align8(len(TRACE_ARCHIVE_MAGIC) + 4 + len(header))
+
+    # Written beside the archive and renamed over it, so a reader that still
+    # maps the old file keeps its inode instead of seeing it truncated.
+    tmp = archive_path.with_name(f".{archive_path.name}.{os.getpid()}.tmp")
+    with tmp.open("wb") as handle:
+        handle.write(TRACE_ARCHIVE_MAGIC)
+        handle.write(struct.pack("<I", len(header)))
+        handle.write(header)
+        handle.write(b"\0" * (prefix_len - len(TRACE_ARCHIVE_MAGIC) - 4 - len(header)))
+        written = 0
+        for name, col in columns.items():
+            handle.write(b"\0" * (layout[name]["offset"] - written))
+            handle.write(col.tobytes())
+            written = layout[name]["offset"] + col.nbytes
+    os.replace(tmp, archive_path)
+    return archive_path
+
+
+class TraceArchive:
+    """Read side of a trace archive; columns are NumPy views into one buffer."""
+
+    def __init__(self, buffer: bytes | mmap.mmap, path: str | Path | None = None) -> None:
+        self.path = Path(path) if path is not None else None
+        if bytes(buffer[:8]) != TRACE_ARCHIVE_MAGIC:
+            raise ValueError(f"Not a trace archive: {path}")
+        (header_len,) = struct.unpack("<I", bytes(buffer[8:12]))
+        self.header = json.loads(bytes(buffer[12:12 + header_len]).decode("utf-8"))
+        if self.header["version"] != TRACE_ARCHIVE_VERSION:
+            raise ValueError(f"Unsupported trace archive version {self.header['version']} in {path}")
+        data_start = _align8(12 + header_len)
+        self.columns = {
+            name: np.frombuffer(buffer, dtype=np.dtype(spec["dtype"]), count=spec["count"], offset=data_start + spec["offset"])
+            for name, spec in self.header["columns"].items()
+        }
+        self.runs = self.header["runs"]
+        self._position = {run["run_id"]: k for k, run in enumerate(self.runs)}
+
+    @classmethod
+    def load(cls, archive_path: str | Path) -> TraceArchive:
+        """Load every replicate with a single sequential read."""
+        return cls(Path(archive_path).read_bytes(), archive_path)
+
+    @classmethod
+    def map(cls, archive_path: str | Path) -> TraceArchive:
+        """Memory-map the archive, so columns are zero-copy views of the file and pages load on access."""
+        with Path(archive_path).open("rb") as handle:
+            buffer = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(buffer, archive_path)
+
+    def num_events(self, run_id: str) -> int:
+        lo, hi = self.span(run_id)
+        return hi - lo
+
+    def meta(self, run_id: str) -> dict[str, object]:
+        """run_id, true_r, true_N, true_i0 and absorbed_type of one run."""
+        return self.runs[self._position[run_id]]
+
+    @property
+    def run_ids(self) -> list[str]:
+        return [run["run_id"] for run in self.runs]
+
+    def __len__(self) -> int:
+        return len(self.runs)
+
+    def __contains__(self, run_id: str) -> bool:
+        return run_id in self._position
+
+    def span(self, run_id: str) -> tuple[int, int]:
+        """Event range of ``run_id`` within the concatenated columns."""
+        k = self._position[run_id]
+        offsets = self.columns["offsets"]
+        return int(offsets[k]), int(offsets[k + 1])
+
+    def bits(self, name: str, lo: int, hi: int) -> np.ndarray:
+        """Events lo..hi of a packed bit column, as booleans."""
+        first = lo // 8
+        unpacked = np.unpackbits(self.columns[name][first:(hi + 7) // 8])
+        return unpacked[lo - 8 * first:hi - 8 * first].astype(bool)
+
+    def trace(self, run_id: str, start: int = 0, stop: int | None = None) -> MoranTrace:
+        """Events [start, stop) of a run as a MoranTrace (steps renumbered from 0)."""
+        lo, hi = self.span(run_id)
+        stop = hi - lo if stop is None else min(stop, hi - lo)
+        lo, hi = lo + start, lo + max(start, stop)
+        trace = MoranTrace(self.meta(run_id)["true_N"])
+        flags = self.bits("birth_is_mutant", lo, hi) * np.uint8(_BIRTH_A) | self.bits("death_is_mutant", lo, hi) * np.uint8(_DEATH_A)
+        trace.birth_index = array("i", self.columns["birth_index"][lo:hi].astype(np.int32).tobytes())
+        trace.death_index = array("i", self.columns["death_index"][lo:hi].astype(np.int32).tobytes())
+        trace.mutants_before = array("i", self.columns["mutants_before"][lo:hi].astype(np.int32).tobytes())
+        trace.flags = array("B", flags.astype(np.uint8).tobytes())
+        return trace
+
+    def run(self, run_id: str) -> MoranRun:
+        meta = self.meta(run_id)
+        return MoranRun(
+            run_id=run_id,
+            true_r=meta["true_r"],
+            true_N=meta["true_N"],
+            true_i0=meta["true_i0"],
+            absorbed_type=meta["absorbed_type"],
+            steps=self.trace(run_id),
+        )
+
+
+def load_trace_archive(archive_path: str) -> TraceArchive:
+    # Memory-mapped and cached, so the replicates of a point, read one prompt
+    # at a time, share one mapping and only touch the pages they slice. The
+    # cache key includes the file's mtime and size, so a rewritten archive is
+    # mapped afresh instead of served from the old mapping.
+    stat = os.stat(archive_path)
+    return _map_trace_archive(str(archive_path), stat.st_mtime_ns, stat.st_size)
+
+
+@lru_cache(maxsize=64)
+def _map_trace_archive(archive_path: str, mtime_ns: int, size: int) -> TraceArchive:
+    return TraceArchive.map(archive_path)
+
+
+def archive_ref(archive_path: str | Path, run_id: str) -> str:
+    return f"{archive_path}{ARCHIVE_REF_SEP}{run_id}"
+
+
+def split_archive_ref(trace_ref: str | Path) -> tuple[str, str] | None:
+    """(archive_path, run_id) for a ``path.mtrace#run_id`` reference, else None."""
+    path, sep, run_id = str(trace_ref).rpartition(ARCHIVE_REF_SEP)
+    if sep and path.endswith(TRACE_ARCHIVE_SUFFIX):
+        return path, run_id
+    return None
+
+
+def read_run_trace_csv(csv_path: str | Path) -> MoranTrace:
+    """Load an observable trace CSV back into a MoranTrace."""
+    with open_text(csv_path, newline="") as handle:
+        rows = list(csv.DictReader(handle))
+    N = int(rows[0]["N"]) if rows else 0
+    return MoranTrace.from_columns(
+        N,
+        (int(row["birth_index"]) for row in rows),
+        (row["birth_type"] == "A" for row in rows),
+        (int(row["death_index"]) for row in rows),
+        (row["death_type"] == "A" for row in rows),
+        (int(row["mutants_before"]) for row in rows),
+    )
+
+
+def pack_trace_csvs(
+    csv_paths: Iterable[str | Path],
+    archive_path: str | Path,
+    *,
+    r: float,
+    N: int,
+    i0: int,
+) -> Path:
+    """Pack one grid point's trace CSVs (run_id = file stem, compressed or not) into an archive."""
+    runs = []
+    for csv_path in sorted(Path(p) for p in csv_paths):
+        steps = read_run_trace_csv(csv_path)
+        after = steps[-1].mutants_after if len(steps) else i0
+        absorbed_type: TypeLabel = "A" if after == N else "B"
+        steps.N = N
+        runs.append(MoranRun(run_id=plain_path(csv_path).stem, true_r=r, true_N=N, true_i0=i0, absorbed_type=absorbed_type, steps=steps))
+    return write_trace_archive(runs, archive_path)
+
+
+def pack_group_traces(group_dir: str | Path, *, remove_csv: bool = False) -> list[Path]:
+    """Convert a group's raw/r{r}_i{i0}/ CSV directories into archive/r{r}_i{i0}.mtrace.
+
+    Each point's summary CSV is rewritten so trace_csv holds
+    ``archive#run_id`` references. Points already packed (or stored as seed
+    references) are left alone.
+    """
+    group_dir = Path(group_dir)
+    archives: list[Path] = []
+    for summary_path in sorted((group_dir / "summaries").glob("summary_*.csv")):
+        point = summary_path.stem[len("summary_"):]
+        point_dir = group_dir / "raw" / point
+        with summary_path.open("r", newline="", encoding="utf-8") as handle:
+            reader = csv.DictReader(handle)
+            fieldnames = list(reader.fieldnames or [])
+            rows = list(reader)
+        if not rows or not point_dir.is_dir():
+            continue
+        if any(is_seed_ref(row["trace_csv"]) or split_archive_ref(row["trace_csv"]) for row in rows):
+            continue
+
+        csv_paths = [find_stored(point_dir / f"{row['run_id']}.csv") for row in rows]
+        first = rows[0]
+        archive_path = group_dir / "archive" / f"{point}{TRACE_ARCHIVE_SUFFIX}"
+        pack_trace_csvs(
+            csv_paths,
+            archive_path,
+            r=float(first["true_r"]),
+            N=int(first["true_N"]),
+            i0=int(first["true_i0"]),
+        )
+        for row in rows:
+            row["trace_csv"] = archive_ref(archive_path, row["run_id"])
+        with summary_path.open("w", newline="", encoding="utf-8") as handle:
+            writer = csv.DictWriter(handle, fieldnames=fieldnames)
+            writer.writeheader()
+            writer.writerows(rows)
+        if remove_csv:
+            for csv_path in csv_paths:
+                csv_path.unlink()
+            if not any(point_dir.iterdir()):
+                point_dir.rmdir()
+        archives.append(archive_path)
+    return archives
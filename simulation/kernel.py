@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import random
+from typing import Iterator
+
+import numpy as np
+
+from .moran import MoranRun, MoranTrace, StepTuple, TypeLabel, _check_params
+
+try:
+    import numba
+except ImportError:  # numba is optional; the kernel then runs as plain Python.
+    numba = None
+
+HAVE_NUMBA = numba is not None
+CHUNK_STEPS = 1 << 16
+
+_MASK32 = 0xFFFFFFFF
+
+
+def _jitable(fn):
+    # Callable from jitted code when numba is present, plain Python otherwise.
+    return numba.extending.register_jitable(fn) if HAVE_NUMBA else fn
+
+
+@_jitable
+def _lowbias32(x):
+    x ^= x >> 16
+    x = (x * 0x7FEB352D) & _MASK32
+    x ^= x >> 15
+    x = (x * 0x846CA68B) & _MASK32
+    x ^= x >> 16
+    return x
+
+
+@_jitable
+def _draw(key, counter):
+    # Every intermediate is masked to 32 bits, so Python ints and numba's
+    # wrapping int64 produce the same values.
+    return _lowbias32(key ^ _lowbias32(counter & _MASK32))
+
+
+def _kernel(r, N, i, key, step, order, slot, birth_index, birth_mutant, death_index, death_mutant, before):
+    """Fill the output columns with up to len(before) steps of the indexed engine.
+
+    Draw k of step s is hash(key, 3s + k), so a run can be resumed from any
+    step. Returns the number of steps written and the mutant count after them.
+    """
+    n = 0
+    cap = len(before)
+    while 0 < i < N and n < cap:
+        c = step * 3
+        u = _draw(key, c) / 4294967296.0
+        b_mut = u * (i * r + N - i) < i * r
+        if b_mut:
+            b = order[(_draw(key, c + 1) * i) >> 32]
+        else:
+            b = order[i + ((_draw(key, c + 1) * (N - i)) >> 32)]
+        d = (_draw(key, c + 2) * N) >> 32
+        d_mut = slot[d] < i
+
+        birth_index[n] = b
+        birth_mutant[n] = b_mut
+        death_index[n] = d
+        death_mutant[n] = d_mut
+        before[n] = i
+
+        if b_mut != d_mut:
+            boundary = i if b_mut else i - 1
+            other = order[boundary]
+            sd = slot[d]
+            order[sd] = other
+            slot[other] = sd
+            order[boundary] = d
+            slot[d] = boundary
+            i += 1 if b_mut else -1
+        n += 1
+        step += 1
+    return n, i
+
+
+_kernel_jit = numba.njit(cache=True, nogil=True)(_kernel) if HAVE_NUMBA else None
+
+
+def kernel_chunks(
+    r: float,
+    N: int,
+    i0: int,
+    key: int,
+    *,
+    jit: bool | None = None,
+    chunk_steps: int = CHUNK_STEPS,
+) -> Iterator[tuple[list[int], list[bool], list[int], list[bool], list[int], int]]:
+    """Run the counter-based kernel in chunks of at most ``chunk_steps`` steps.
+
+    Yields (birth_index, birth_mutant, death_index, death_mutant,
+    mutants_before, mutants_after_last) per chunk. ``jit=None`` uses numba
+    when it is installed; both paths give identical columns.
+    """
+    jit = HAVE_NUMBA if jit is None else jit
+    if jit and not HAVE_NUMBA:
+        raise RuntimeError("jit=True needs numba, which is not installed.")
+    if jit:
+        kernel = _kernel_jit
+        order = np.arange(N, dtype=np.int64)
+        slot = order.copy()
+    else:
+        kernel = _kernel
+        order = list(range(N))
+        slot = list(range(N))
+
+    i, step = i0, 0
+    while 0 < i < N:
+        if jit:
+            cols = (
+                np.empty(chunk_steps, np.int64),
+                np.empty(chunk_steps, np.bool_),
+                np.empty(chunk_steps, np.int64),
+                np.empty(chunk_steps, np.bool_),
+                np.empty(chunk_steps, np.int64),
+            )
+        else:
+            cols = ([0] * chunk_steps, [False] * chunk_steps, [0] * chunk_steps, [False] * chunk_steps, [0] * chunk_steps)
+        n, i = kernel(float(r), N, i, key, step, order, slot, *cols)
+        step += n
+        if jit:
+            yield (*(col[:n].tolist() for col in cols), i)
+        else:
+            yield (*(col[:n] for col in cols), i)
+
+
+def compiled_steps(r: float, N: int, i0: int, rng: random.Random) -> Iterator[StepTuple]:
+    """Step generator over the kernel; the whole run is keyed by one 32-bit draw from ``rng``."""
+    for birth_index, birth_mutant, death_index, death_mutant, before, last in kernel_chunks(
+        r, N, i0, rng.getrandbits(32)
+    ):
+        afters = before[1:] + [last]
+        yield from zip(birth_index, birth_mutant, death_index, death_mutant, before, afters)
+
+
+def simulate_moran_run_compiled(*, r: float, N: int, i0: int, run_id: str, rng: random.Random) -> MoranRun:
+    """Same model and trace columns as simulate_moran_run_indexed, from the counter-based kernel.
+
+    Draws come from a lowbias32 hash instead of ``rng``, so traces differ
+    from the other engines for the same seed, but they are identical with
+    and without numba.
+    """
+    _check_params(r, N, i0)
+    steps = MoranTrace(N)
+    i = i0
+    for *columns, i in kernel_chunks(r, N, i0, rng.getrandbits(32)):
+        steps.extend(*columns)
+    absorbed_type: TypeLabel = "A" if i == N else "B"
+    return MoranRun(run_id=run_id, true_r=r, true_N=N, true_i0=i0, absorbed_type=absorbed_type, steps=steps)
@@ -0,0 +1,261 @@
+from __future__ import annotations
+
+import csv
+from dataclasses import dataclass
+import math
+from pathlib import Path
+import time
+
+import numpy as np
+
+from moran_grid import rho_i
+
+from .grids import CLASSIFY_GRID, CLASSIFY_N, ESTIMATION_GRID, ESTIMATION_N
+from .moran import _check_params
+
+MC_MODELS = ("Bd", "dB")
+
+_Z95 = 1.959963984540054
+
+
+def _p_up_Bd(i: np.ndarray, r: float, N: int) -> np.ndarray:
+    # Given that the count changes, birth-death moves up with probability r / (1 + r).
+    return np.full(i.shape, r / (1.0 + r))
+
+
+def _p_up_dB(i: np.ndarray, r: float, N: int) -> np.ndarray:
+    # Death-birth: a uniform death, then a fitness-weighted birth among the N - 1 others.
+    up = (N - i) / N * (i * r / (i * r + N - i - 1))
+    down = i / N * ((N - i) / ((i - 1) * r + N - i))
+    return up / (up + down)
+
+
+_P_UP = {"Bd": _p_up_Bd, "dB": _p_up_dB}
+
+
+def _up_table(model: str, r: float, N: int) -> np.ndarray:
+    """Up-probability of ``model`` at every count 0..N; the absorbing ends are never used."""
+    table = np.zeros(N + 1)
+    table[1:N] = _P_UP[model](np.arange(1, N, dtype=np.float64), r, N)
+    return table
+
+
+@dataclass
+class RhoEstimate:
+    model: str
+    r: float
+    N: int
+    i0: int
+    replicates: int
+    rho: float
+    stderr: float
+    rho_exact: float | None
+    variance_reduction: float
+
+    @property
+    def ci_low(self) -> float:
+        return self.rho - _Z95 * self.stderr
+
+    @property
+    def ci_high(self) -> float:
+        return self.rho + _Z95 * self.stderr
+
+
+def _absorb(
+    tables: np.ndarray,
+    antithetic: tuple[bool, ...],
+    base: np.ndarray,
+    i0: np.ndarray,
+    N: int,
+    rng: np.random.Generator,
+    compact_every: int = 8,
+) -> np.ndarray:
+    """Fixation indicators, one row per chain, for chains driven by common random numbers.
+
+    Column j starts at count ``i0[j]`` and looks its up-probabilities up at
+    ``tables[k, base[j] + count]``, so columns of different grid points run
+    side by side. Only count changes are simulated: every chain takes a +-1
+    step per iteration from the same uniform u (1 - u for antithetic
+    chains), until all columns of all chains have absorbed. Absorbed columns
+    are dropped every ``compact_every`` iterations; in between they are
+    frozen in place.
+    """
+    fixed = np.zeros((len(tables), base.size), dtype=bool)
+    # The narrowest signed counts keep the per-step arithmetic cheap.
+    counts = np.tile(i0.astype(np.min_scalar_type(-N)), (len(tables), 1))
+    tables = tables.astype(np.float32)
+    base = base.astype(np.int32 if tables.shape[1] < 2**31 else np.int64)
+    alive = np.arange(base.size)
+    while alive.size:
+        for _ in range(compact_every):
+            u = rng.random(alive.size, dtype=np.float32)
+            for k, table in enumerate(tables):
+                i = counts[k]
+                up = (1.0 - u if antithetic[k] else u) < table[base + i]
+                counts[k] = i + (up.view(np.int8) * 2 - 1) * ((i > 0) & (i < N))
+        keep = ((counts > 0) & (counts < N)).any(axis=0)
+        fixed[:, alive[~keep]] = counts[:, ~keep] == N
+        counts = counts[:, keep]
+        alive = alive[keep]
+        base = base[keep]
+    return fixed
+
+
+def estimate_rho_points(
+    points: list[tuple[float, int]],
+    *,
+    N: int,
+    replicates: int,
+    model: str = "Bd",
+    rng: np.random.Generator | int | None = None,
+    chunk: int = 1_000_000,
+) -> list[RhoEstimate]:
+    """Monte Carlo fixation probability of the count-level chain at every (r, i0) of ``points``.
+
+    All points are simulated together as one set of NumPy columns, ``chunk``
+    columns at a time. Bd runs its replicates as antithetic pairs (u and
+    1 - u) and reports the analytic rho_i next to the estimate. Other models
+    run a Bd chain alongside on common random numbers and use it as a
+    control variate: rho = mean(X) - beta (mean(Y) - rho_Bd), with beta the
+    regression slope of X on Y. ``variance_reduction`` is the factor by
+    which either shrinks the variance of the plain estimate.
+    """
+    for r, i0 in points:
+        _check_params(r, N, i0)
+    if model not in _P_UP:
+        raise ValueError(f"Unknown model {model!r}; expected one of {list(MC_MODELS)}.")
+    if replicates < 4:
+        raise ValueError("replicates must be at least 4.")
+    rng = np.random.default_rng(rng)
+    P = len(points)
+    if model == "Bd":
+        models, antithetic, n = ("Bd", "Bd"), (False, True), replicates // 2
+    else:
+        models, antithetic, n = (model, "Bd"), (False, False), replicates
+    tables = np.stack([np.concatenate([_up_table(m, r, N) for r, _ in points]) for m in models])
+    i0s = np.array([i0 for _, i0 in points], dtype=np.int64)
+
+    # Running per-point sums keep memory bounded by one chunk of columns.
+    sx = np.zeros(P)
+    sy = np.zeros(P)
+    sxx = np.zeros(P)
+    syy = np.zeros(P)
+    sxy = np.zeros(P)
+    per_chunk = max(1, chunk // P)
+    for start in range(0, n, per_chunk):
+        m = min(per_chunk, n - start)
+        base = np.repeat(np.arange(P) * (N + 1), m)
+        fixed = _absorb(tables, antithetic, base, np.repeat(i0s, m), N, rng).reshape(len(models), P, m)
+        if model == "Bd":
+            x = fixed.mean(axis=0)
+            y = fixed[0].astype(np.float64)
+        else:
+            x = fixed[0].astype(np.float64)
+            y = fixed[1].astype(np.float64)
+        sx += x.sum(axis=1)
+        sxx += (x * x).sum(axis=1)
+        sy += y.sum(axis=1)
+        syy += (y * y).sum(axis=1)
+        sxy += (x * y).sum(axis=1)
+
+    estimates = []
+    for k, (r, i0) in enumerate(points):
+        mean_x = sx[k] / n
+        var_x = max(sxx[k] / n - mean_x * mean_x, 0.0) * n / (n - 1)
+        rho_bd = rho_i(i0, N, r)
+        if model == "Bd":
+            # A single chain is Bernoulli(rho); a pair mean averages two of them.
+            var_plain = mean_x * (1.0 - mean_x) / 2.0
+            reduction = var_plain / var_x if var_x > 0 else math.inf
+            estimates.append(RhoEstimate(model, r, N, i0, 2 * n, mean_x, math.sqrt(var_x / n), rho_bd, reduction))
+            continue
+        mean_y = sy[k] / n
+        var_y = max(syy[k] / n - mean_y * mean_y, 0.0) * n / (n - 1)
+        cov = (sxy[k] / n - mean_x * mean_y) * n / (n - 1)
+        beta = cov / var_y if var_y > 0 else 0.0
+        var_cv = max(var_x - beta * cov, 0.0)
+        reduction = var_x / var_cv if var_cv > 0 else math.inf
+        estimates.append(
+            RhoEstimate(model, r, N, i0, n, mean_x - beta * (mean_y - rho_bd), math.sqrt(var_cv / n), None, reduction)
+        )
+    return estimates
+
+
+def estimate_rho(
+    *,
+    r: float,
+    N: int,
+    i0: int,
+    replicates: int,
+    model: str = "Bd",
+    rng: np.random.Generator | int | None = None,
+    chunk: int = 1_000_000,
+) -> RhoEstimate:
+    """estimate_rho_points for a single point."""
+    return estimate_rho_points([(r, i0)], N=N, replicates=replicates, model=model, rng=rng, chunk=chunk)[0]
+
+
+MC_FIELDNAMES = ["model", "r", "N", "i0", "replicates", "rho", "stderr", "ci_low", "ci_high", "rho_exact", "variance_reduction"]
+
+
+def _grid_points(grid: str) -> tuple[int, list[tuple[float, int]]]:
+    if grid == "classify":
+        return CLASSIFY_N, list(CLASSIFY_GRID)
+    return ESTIMATION_N, list(ESTIMATION_GRID)
+
+
+def run_mc_rho(
+    *,
+    r: float | None,
+    N: int | None,
+    i0: int | None,
+    grid: str | None,
+    model: str,
+    replicates: int,
+    seed: int | None,
+    output_csv: str | Path | None = None,
+) -> list[RhoEstimate]:
+    """Estimate rho for one point or a whole runner grid and print a table."""
+    if grid is not None:
+        N, points = _grid_points(grid)
+    elif r is None or N is None or i0 is None:
+        raise ValueError("Pass --r, --N and --i0, or --grid.")
+    else:
+        points = [(r, i0)]
+
+    rng = np.random.default_rng(seed)
+    start = time.perf_counter()
+    estimates = estimate_rho_points(points, N=N, replicates=replicates, model=model, rng=rng)
+    elapsed = time.perf_counter() - start
+
+    print(f"{'r':>8} {'i0':>4} {'rho':>8} {'95% CI':>19} {'exact':>8} {'VR':>6}")
+    for est in estimates:
+        exact = f"{est.rho_exact:.4f}" if est.rho_exact is not None else "-"
+        print(
+            f"{est.r:>8.4f} {est.i0:>4} {est.rho:>8.4f} [{est.ci_low:.4f}, {est.ci_high:.4f}] "
+            f"{exact:>8} {est.variance_reduction:>6.1f}"
+        )
+    print(f"{len(estimates)} points x {replicates} replicates ({model}, N={N}) in {elapsed:.1f}s")
+
+    if output_csv is not None:
+        output_csv = Path(output_csv)
+        output_csv.parent.mkdir(parents=True, exist_ok=True)
+        with output_csv.open("w", newline="", encoding="utf-8") as handle:
+            writer = csv.DictWriter(handle, fieldnames=MC_FIELDNAMES)
+            writer.writeheader()
+            for est in estimates:
+                writer.writerow({
+                    "model": est.model,
+                    "r": est.r,
+                    "N": est.N,
+                    "i0": est.i0,
+                    "replicates": est.replicates,
+                    "rho": est.rho,
+                    "stderr": est.stderr,
+                    "ci_low": est.ci_low,
+                    "ci_high": est.ci_high,
+                    "rho_exact": "" if est.rho_exact is None else est.rho_exact,
+                    "variance_reduction": est.variance_reduction,
+                })
+        print(f"Estimates written to {output_csv}")
+    return estimates
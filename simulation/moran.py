@@ -1,13 +1,17 @@
 from __future__ import annotations
 
+from array import array
 from dataclasses import dataclass
 import random
-from typing import Literal
+from typing import Iterable, Iterator, Literal, overload
 
 TypeLabel = Literal["A", "B"]
 
+_BIRTH_A = 1
+_DEATH_A = 2
 
-@dataclass
+
+@dataclass(slots=True)
 class MoranEvent:
     step: int
     birth_index: int
@@ -23,6 +27,125 @@ class MoranEvent:
         return f"{self.birth_index}{self.birth_type}:{self.death_index}{self.death_type}"
 
 
+class MoranTrace:
+    """Struct-of-arrays event table that indexes and iterates as MoranEvent rows.
+
+    Each event costs 13 bytes: three int32 columns plus one byte of type
+    flags. ``step`` is the position in the trace and ``mutants_after`` follows
+    from ``mutants_before`` and the two types. MoranEvent objects are only
+    built when a row is accessed.
+    """
+
+    __slots__ = ("N", "birth_index", "death_index", "mutants_before", "flags")
+
+    def __init__(self, N: int) -> None:
+        self.N = N
+        self.birth_index = array("i")
+        self.death_index = array("i")
+        self.mutants_before = array("i")
+        self.flags = array("B")
+
+    @classmethod
+    def from_events(cls, N: int, events: Iterable[MoranEvent]) -> MoranTrace:
+        trace = cls(N)
+        for ev in events:
+            trace.append(ev)
+        return trace
+
+    @classmethod
+    def from_columns(
+        cls,
+        N: int,
+        birth_index: Iterable[int],
+        birth_is_mutant: Iterable[bool],
+        death_index: Iterable[int],
+        death_is_mutant: Iterable[bool],
+        mutants_before: Iterable[int],
+    ) -> MoranTrace:
+        trace = cls(N)
+        trace.extend(birth_index, birth_is_mutant, death_index, death_is_mutant, mutants_before)
+        return trace
+
+    def extend(
+        self,
+        birth_index: Iterable[int],
+        birth_is_mutant: Iterable[bool],
+        death_index: Iterable[int],
+        death_is_mutant: Iterable[bool],
+        mutants_before: Iterable[int],
+    ) -> None:
+        """Append whole columns at once."""
+        self.birth_index.extend(birth_index)
+        self.death_index.extend(death_index)
+        self.mutants_before.extend(mutants_before)
+        self.flags.extend(
+            (_BIRTH_A if b else 0) | (_DEATH_A if d else 0) for b, d in zip(birth_is_mutant, death_is_mutant)
+        )
+
+    def add(
+        self,
+        birth_index: int,
+        birth_is_mutant: bool,
+        death_index: int,
+        death_is_mutant: bool,
+        mutants_before: int,
+    ) -> None:
+        self.birth_index.append(birth_index)
+        self.death_index.append(death_index)
+        self.mutants_before.append(mutants_before)
+        self.flags.append((_BIRTH_A if birth_is_mutant else 0) | (_DEATH_A if death_is_mutant else 0))
+
+    def append(self, ev: MoranEvent) -> None:
+        self.add(ev.birth_index, ev.birth_type == "A", ev.death_index, ev.death_type == "A", ev.mutants_before)
+
+    def __len__(self) -> int:
+        return len(self.flags)
+
+    def _event(self, k: int) -> MoranEvent:
+        flags = self.flags[k]
+        before = self.mutants_before[k]
+        birth_a = flags & _BIRTH_A
+        death_a = flags & _DEATH_A
+        return MoranEvent(
+            step=k,
+            birth_index=self.birth_index[k],
+            birth_type="A" if birth_a else "B",
+            death_index=self.death_index[k],
+            death_type="A" if death_a else "B",
+            mutants_before=before,
+            mutants_after=before + (1 if birth_a and not death_a else -1 if death_a and not birth_a else 0),
+            N=self.N,
+        )
+
+    @overload
+    def __getitem__(self, k: int) -> MoranEvent: ...
+    @overload
+    def __getitem__(self, k: slice) -> list[MoranEvent]: ...
+
+    def __getitem__(self, k: int | slice) -> MoranEvent | list[MoranEvent]:
+        if isinstance(k, slice):
+            return [self._event(j) for j in range(*k.indices(len(self)))]
+        if k < 0:
+            k += len(self)
+        if not 0 <= k < len(self):
+            raise IndexError("MoranTrace index out of range")
+        return self._event(k)
+
+    def __iter__(self) -> Iterator[MoranEvent]:
+        for k in range(len(self)):
+            yield self._event(k)
+
+    def csv_rows(self) -> Iterator[list[object]]:
+        """Rows in io.OBSERVABLE_TRACE_COLUMNS order, without building MoranEvent objects."""
+        N = self.N
+        columns = zip(self.birth_index, self.death_index, self.mutants_before, self.flags)
+        for k, (b, d, before, flags) in enumerate(columns):
+            bt = "A" if flags & _BIRTH_A else "B"
+            dt = "A" if flags & _DEATH_A else "B"
+            after = before + (1 if bt == "A" and dt == "B" else -1 if bt == "B" and dt == "A" else 0)
+            yield [k, f"{b}{bt}:{d}{dt}", b, bt, d, dt, before, after, N]
+
+
 @dataclass
 class MoranRun:
     run_id: str
@@ -30,20 +153,65 @@ class MoranRun:
     true_N: int
     true_i0: int
     absorbed_type: TypeLabel
-    steps: list[MoranEvent]
+    steps: MoranTrace
 
+    @property
+    def num_events(self) -> int:
+        return len(self.steps)
 
 
-def simulate_moran_run(*, r: float, N: int, i0: int, run_id: str, rng: random.Random) -> MoranRun:
+@dataclass
+class StreamedRun:
+    """Run summary for a trace that was written while it was simulated.
+
+    ``absorbed_type`` is None when the simulation was stopped before absorption.
+    """
+
+    run_id: str
+    true_r: float
+    true_N: int
+    true_i0: int
+    absorbed_type: TypeLabel | None
+    num_events: int
+
+
+def _check_params(r: float, N: int, i0: int) -> None:
     if not (0 < i0 < N):
         raise ValueError("Initial mutant count i0 must satisfy 0 < i0 < N.")
     if r <= 0:
         raise ValueError("Relative fitness r must be positive.")
 
+
+# (birth_index, birth_is_mutant, death_index, death_is_mutant, mutants_before, mutants_after)
+StepTuple = tuple[int, bool, int, bool, int, int]
+
+
+def event_from_step(step: int, t: StepTuple, N: int) -> MoranEvent:
+    birth_index, birth_mutant, death_index, death_mutant, before, after = t
+    return MoranEvent(
+        step=step,
+        birth_index=birth_index,
+        birth_type="A" if birth_mutant else "B",
+        death_index=death_index,
+        death_type="A" if death_mutant else "B",
+        mutants_before=before,
+        mutants_after=after,
+        N=N,
+    )
+
+
+def collect_run(*, r: float, N: int, i0: int, run_id: str, steps: Iterable[StepTuple]) -> MoranRun:
+    events = MoranTrace(N)
+    i = i0
+    for birth_index, birth_mutant, death_index, death_mutant, before, i in steps:
+        events.add(birth_index, birth_mutant, death_index, death_mutant, before)
+    absorbed_type: TypeLabel = "A" if i == N else "B"
+    return MoranRun(run_id=run_id, true_r=r, true_N=N, true_i0=i0, absorbed_type=absorbed_type, steps=events)
+
+
+def reference_steps(r: float, N: int, i0: int, rng: random.Random) -> Iterator[StepTuple]:
     population: list[TypeLabel] = ["A"] * i0 + ["B"] * (N - i0)
     i = i0
-    step = 0
-    events: list[MoranEvent] = []
 
     while 0 < i < N:
         mutants_before = i
@@ -57,19 +225,52 @@ def simulate_moran_run(*, r: float, N: int, i0: int, run_id: str, rng: random.Ra
         population[death_index] = birth_type
         i = sum(1 for t in population if t == "A")
 
-        events.append(
-            MoranEvent(
-                step=step,
-                birth_index=birth_index,
-                birth_type=birth_type,
-                death_index=death_index,
-                death_type=death_type,
-                mutants_before=mutants_before,
-                mutants_after=i,
-                N=N,
-            )
-        )
-        step += 1
+        yield birth_index, birth_type == "A", death_index, death_type == "A", mutants_before, i
 
-    absorbed_type: TypeLabel = "A" if i == N else "B"
-    return MoranRun(run_id=run_id, true_r=r, true_N=N, true_i0=i0, absorbed_type=absorbed_type, steps=events)
+
+def indexed_steps(r: float, N: int, i0: int, rng: random.Random) -> Iterator[StepTuple]:
+    """O(1)-per-step generator: same model and trace columns as reference_steps.
+
+    The birth type is drawn with probability i*r / (i*r + N - i) and the birth
+    index uniformly within that type. Positions are kept partitioned in
+    ``order`` (mutants in ``order[:i]``, wild types in ``order[i:]``) with
+    ``slot`` as the inverse map, so a type change is a single swap across the
+    boundary. Draws differ from the reference engine, so traces for a given
+    seed differ too.
+    """
+    order = list(range(N))
+    slot = list(range(N))
+    i = i0
+
+    while 0 < i < N:
+        mutants_before = i
+        birth_mutant = rng.random() * (i * r + N - i) < i * r
+        if birth_mutant:
+            birth_index = order[rng.randrange(i)]
+        else:
+            birth_index = order[i + rng.randrange(N - i)]
+
+        death_index = rng.randrange(N)
+        death_mutant = slot[death_index] < i
+
+        if birth_mutant != death_mutant:
+            # Move the replaced individual across the mutant/wild-type boundary.
+            boundary = i if birth_mutant else i - 1
+            other = order[boundary]
+            order[slot[death_index]] = other
+            slot[other] = slot[death_index]
+            order[boundary] = death_index
+            slot[death_index] = boundary
+            i += 1 if birth_mutant else -1
+
+        yield birth_index, birth_mutant, death_index, death_mutant, mutants_before, i
+
+
+def simulate_moran_run(*, r: float, N: int, i0: int, run_id: str, rng: random.Random) -> MoranRun:
+    _check_params(r, N, i0)
+    return collect_run(r=r, N=N, i0=i0, run_id=run_id, steps=reference_steps(r, N, i0, rng))
+
+
+def simulate_moran_run_indexed(*, r: float, N: int, i0: int, run_id: str, rng: random.Random) -> MoranRun:
+    _check_params(r, N, i0)
+    return collect_run(r=r, N=N, i0=i0, run_id=run_id, steps=indexed_steps(r, N, i0, rng))
@@ -0,0 +1,297 @@
+from __future__ import annotations
+
+import csv
+import json
+from pathlib import Path
+import sqlite3
+from typing import Iterable, Mapping
+
+REGISTRY_NAME = "registry.sqlite"
+
+# Per-point stages of simulate-and-send, in order. A point's checkpoints are
+# always a prefix of this list: redoing a stage forgets the ones after it.
+STAGES = ("simulated", "prompts_built", "uploaded", "batch_created")
+
+# One registry per group directory. Runs are keyed by (point, run_id) because
+# every grid point reuses the same exp001_runKK run ids. A packed batch spans
+# several points: batches.point_id is NULL and batch_points lists them by the
+# label their requests carry in custom_id.
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS points (
+    point_id    INTEGER PRIMARY KEY,
+    r           REAL NOT NULL,
+    i0          INTEGER NOT NULL,
+    N           INTEGER NOT NULL,
+    summary_csv TEXT UNIQUE,
+    UNIQUE (r, i0, N)
+);
+CREATE TABLE IF NOT EXISTS runs (
+    point_id        INTEGER NOT NULL REFERENCES points (point_id),
+    run_id          TEXT NOT NULL,
+    trace_csv       TEXT NOT NULL,
+    true_r          REAL NOT NULL,
+    true_N          INTEGER NOT NULL,
+    true_i0         INTEGER NOT NULL,
+    num_events_full INTEGER,
+    PRIMARY KEY (point_id, run_id)
+);
+CREATE TABLE IF NOT EXISTS batches (
+    batch_id TEXT PRIMARY KEY,
+    point_id INTEGER REFERENCES points (point_id),
+    kind     TEXT NOT NULL,
+    model    TEXT
+);
+CREATE INDEX IF NOT EXISTS batches_by_point ON batches (point_id);
+CREATE TABLE IF NOT EXISTS batch_points (
+    batch_id TEXT NOT NULL REFERENCES batches (batch_id),
+    label    TEXT NOT NULL,
+    point_id INTEGER NOT NULL REFERENCES points (point_id),
+    PRIMARY KEY (batch_id, label)
+);
+CREATE TABLE IF NOT EXISTS checkpoints (
+    point_id INTEGER NOT NULL REFERENCES points (point_id),
+    stage    TEXT NOT NULL,
+    detail   TEXT,
+    PRIMARY KEY (point_id, stage)
+);
+CREATE TABLE IF NOT EXISTS outputs (
+    path       TEXT PRIMARY KEY,
+    batch_id   TEXT NOT NULL REFERENCES batches (batch_id),
+    parsed_csv TEXT,
+    processed  INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+
+class Registry:
+    """SQLite index of a group's grid points, runs (with truth), batches and output files."""
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, timeout=30.0)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA foreign_keys = ON")
+        self._conn.executescript(_SCHEMA)
+
+    @classmethod
+    def for_group(cls, group_dir: str | Path) -> Registry:
+        return cls(Path(group_dir) / REGISTRY_NAME)
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> Registry:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    # ── points and runs ──────────────────────────────────────────────────
+
+    def add_point(self, r: float, i0: int, N: int, summary_csv: str | Path | None = None) -> int:
+        with self._conn:
+            self._conn.execute("INSERT OR IGNORE INTO points (r, i0, N) VALUES (?, ?, ?)", (r, i0, N))
+            if summary_csv is not None:
+                self._conn.execute(
+                    "UPDATE points SET summary_csv = ? WHERE r = ? AND i0 = ? AND N = ?",
+                    (str(summary_csv), r, i0, N),
+                )
+        return self._conn.execute(
+            "SELECT point_id FROM points WHERE r = ? AND i0 = ? AND N = ?", (r, i0, N)
+        ).fetchone()[0]
+
+    def points(self, submitted: bool = False) -> list[dict[str, float | int]]:
+        """Points in the order they were added, as group.json lists them; with ``submitted``, only those with a batch."""
+        rows = self._conn.execute("SELECT point_id, r, i0 FROM points ORDER BY point_id").fetchall()
+        return [
+            {"r": row["r"], "i0": row["i0"]}
+            for row in rows
+            if not submitted or self.point_stage(row["point_id"]) == STAGES[-1]
+        ]
+
+    def add_runs(self, point_id: int, rows: Iterable[Mapping[str, object]]) -> None:
+        """Record summary rows (run_id, trace_csv, true_*) for a point, replacing earlier ones."""
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    (
+                        point_id,
+                        row["run_id"],
+                        str(row["trace_csv"]),
+                        float(row["true_r"]),
+                        int(row["true_N"]),
+                        int(row["true_i0"]),
+                        int(row["num_events_full"]) if row.get("num_events_full") not in (None, "") else None,
+                    )
+                    for row in rows
+                ),
+            )
+
+    def import_summary(self, summary_csv: str | Path) -> int:
+        """Register a summary CSV's point and runs; the point comes from its first row."""
+        with Path(summary_csv).open("r", newline="", encoding="utf-8") as handle:
+            rows = list(csv.DictReader(handle))
+        if not rows:
+            raise ValueError(f"Summary {summary_csv} has no runs.")
+        first = rows[0]
+        point_id = self.add_point(float(first["true_r"]), int(first["true_i0"]), int(first["true_N"]), summary_csv)
+        self.add_runs(point_id, rows)
+        return point_id
+
+    def point_for_summary(self, summary_csv: str | Path) -> int | None:
+        row = self._conn.execute("SELECT point_id FROM points WHERE summary_csv = ?", (str(summary_csv),)).fetchone()
+        return None if row is None else row[0]
+
+    def truth(self, summary_csv: str | Path) -> dict[str, dict[str, str]]:
+        """run_id -> summary-style row (string values) for the point behind ``summary_csv``.
+
+        Points not registered yet are imported from the CSV first.
+        """
+        point_id = self.point_for_summary(summary_csv)
+        if point_id is None:
+            point_id = self.import_summary(summary_csv)
+        rows = self._conn.execute(
+            "SELECT run_id, trace_csv, true_r, true_N, true_i0, num_events_full FROM runs WHERE point_id = ?",
+            (point_id,),
+        )
+        return {
+            row["run_id"]: {key: "" if row[key] is None else str(row[key]) for key in row.keys()}
+            for row in rows
+        }
+
+    # ── checkpoints ──────────────────────────────────────────────────────
+
+    def mark_stage(self, point_id: int, stage: str, detail: str | Path | None = None) -> None:
+        """Record a finished stage (with e.g. its file or batch id) and forget every later one."""
+        later = STAGES[STAGES.index(stage) + 1:]
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?)",
+                (point_id, stage, None if detail is None else str(detail)),
+            )
+            self._conn.executemany(
+                "DELETE FROM checkpoints WHERE point_id = ? AND stage = ?", ((point_id, s) for s in later)
+            )
+
+    def stages(self, point_id: int) -> dict[str, str | None]:
+        rows = self._conn.execute("SELECT stage, detail FROM checkpoints WHERE point_id = ?", (point_id,))
+        return {row["stage"]: row["detail"] for row in rows}
+
+    def point_stage(self, point_id: int) -> str | None:
+        """Furthest stage the point has reached, or None.
+
+        Any batch covering the point counts as ``batch_created``, including
+        batches from before checkpoints existed and packed shards.
+        """
+        submitted = self._conn.execute(
+            "SELECT 1 FROM batches WHERE point_id = ? UNION SELECT 1 FROM batch_points WHERE point_id = ?",
+            (point_id, point_id),
+        ).fetchone()
+        if submitted:
+            return STAGES[-1]
+        done = self.stages(point_id)
+        reached = None
+        for stage in STAGES:
+            if stage not in done:
+                break
+            reached = stage
+        return reached
+
+    # ── batches and outputs ──────────────────────────────────────────────
+
+    def _point_for(self, summary_csv: str | Path) -> int | None:
+        point_id = self.point_for_summary(summary_csv)
+        if point_id is None and Path(summary_csv).exists():
+            point_id = self.import_summary(summary_csv)
+        return point_id
+
+    def add_batch(
+        self,
+        batch_id: str,
+        *,
+        kind: str,
+        model: str | None,
+        summary_csv: str | Path | None = None,
+        points: Mapping[str, str | Path] | None = None,
+    ) -> None:
+        """Record a batch of one point (``summary_csv``) or a packed batch (label -> summary in ``points``)."""
+        point_id = None if summary_csv is None else self._point_for(summary_csv)
+        packed = {label: self._point_for(summary) for label, summary in (points or {}).items()}
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO batches (batch_id, point_id, kind, model) VALUES (?, ?, ?, ?)",
+                (batch_id, point_id, kind, model),
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO batch_points (batch_id, label, point_id) VALUES (?, ?, ?)",
+                ((batch_id, label, pid) for label, pid in packed.items() if pid is not None),
+            )
+
+    def import_batch_ids(self, batch_ids_jsonl: str | Path, *, kind: str) -> int:
+        """Register every batch of a ``*_batch_job_ids_*.jsonl`` file not known yet."""
+        batch_ids_jsonl = Path(batch_ids_jsonl)
+        if not batch_ids_jsonl.exists():
+            return 0
+        known = {row[0] for row in self._conn.execute("SELECT batch_id FROM batches")}
+        added = 0
+        with batch_ids_jsonl.open("r", encoding="utf-8") as handle:
+            for line in handle:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                if record["batch_job_id"] in known:
+                    continue
+                self.add_batch(
+                    record["batch_job_id"], kind=kind, model=record.get("model"),
+                    summary_csv=record.get("summary_csv"), points=record.get("points"),
+                )
+                known.add(record["batch_job_id"])
+                added += 1
+        return added
+
+    def summary_for_batch(self, batch_id: str) -> Path | None:
+        row = self._conn.execute(
+            "SELECT p.summary_csv FROM batches b JOIN points p USING (point_id) WHERE b.batch_id = ?", (batch_id,)
+        ).fetchone()
+        if row is None or row[0] is None or not Path(row[0]).exists():
+            return None
+        return Path(row[0])
+
+    def summaries_for_batch(self, batch_id: str) -> dict[str, Path]:
+        """custom_id point label -> summary CSV for the batch's points ("" for a single-point batch)."""
+        single = self.summary_for_batch(batch_id)
+        if single is not None:
+            return {"": single}
+        rows = self._conn.execute(
+            "SELECT bp.label, p.summary_csv FROM batch_points bp JOIN points p USING (point_id) WHERE bp.batch_id = ?",
+            (batch_id,),
+        )
+        return {row[0]: Path(row[1]) for row in rows if row[1] is not None and Path(row[1]).exists()}
+
+    def unprocessed_batches(self) -> list[str]:
+        """Batches without a processed output yet (still running, or fetched but not parsed)."""
+        rows = self._conn.execute(
+            "SELECT batch_id FROM batches WHERE batch_id NOT IN (SELECT batch_id FROM outputs WHERE processed = 1)"
+        )
+        return [row[0] for row in rows]
+
+    def parsed_outputs(self) -> list[tuple[Path, str]]:
+        """(parsed CSV, batch id) of every processed output, oldest first."""
+        rows = self._conn.execute("SELECT parsed_csv, batch_id FROM outputs WHERE processed = 1 ORDER BY rowid")
+        return [(Path(row[0]), row[1]) for row in rows if row[0] is not None]
+
+    def add_output(self, path: str | Path, batch_id: str) -> None:
+        with self._conn:
+            self._conn.execute("INSERT OR IGNORE INTO outputs (path, batch_id) VALUES (?, ?)", (str(path), batch_id))
+
+    def is_processed(self, path: str | Path) -> bool:
+        row = self._conn.execute("SELECT processed FROM outputs WHERE path = ?", (str(path),)).fetchone()
+        return bool(row and row[0])
+
+    def mark_processed(self, path: str | Path, parsed_csv: str | Path) -> None:
+        with self._conn:
+            self._conn.execute(
+                "UPDATE outputs SET processed = 1, parsed_csv = ? WHERE path = ?", (str(parsed_csv), str(path))
+            )
@@ -0,0 +1,18 @@
+from __future__ import annotations
+
+import hashlib
+import random
+
+
+def derive_seed(seed: int, *key: object) -> int:
+    """64-bit seed for the stream named by ``key`` under the dataset ``seed``.
+
+    Streams depend only on (seed, key), never on how many other streams were
+    drawn before them or which process draws them.
+    """
+    digest = hashlib.blake2b(repr((seed, *key)).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+def keyed_rng(seed: int, *key: object) -> random.Random:
+    return random.Random(derive_seed(seed, *key))
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from functools import lru_cache
+from urllib.parse import parse_qsl, urlencode
+
+from .engines import ENGINES, STEP_GENERATORS
+from .moran import MoranRun
+from .seeding import keyed_rng
+
+# Bump whenever an engine changes how it consumes its RNG stream, so stale
+# references fail loudly instead of silently regenerating different traces.
+GENERATOR_VERSION = 1
+
+SEED_REF_PREFIX = "seed:"
+CACHE_SIZE = 256
+
+
+@dataclass(frozen=True)
+class SeedRef:
+    """Everything needed to regenerate one run exactly, in place of its trace file."""
+
+    engine: str
+    r: float
+    N: int
+    i0: int
+    seed: int
+    run_id: str
+    version: int = GENERATOR_VERSION
+
+    def __str__(self) -> str:
+        query = urlencode({
+            "engine": self.engine,
+            "r": repr(self.r),
+            "N": self.N,
+            "i0": self.i0,
+            "seed": self.seed,
+            "run_id": self.run_id,
+        })
+        return f"{SEED_REF_PREFIX}v{self.version}?{query}"
+
+    @classmethod
+    def parse(cls, text: str) -> SeedRef:
+        if not is_seed_ref(text):
+            raise ValueError(f"Not a seed reference: {text!r}")
+        version, _, query = text[len(SEED_REF_PREFIX):].partition("?")
+        fields = dict(parse_qsl(query))
+        return cls(
+            engine=fields["engine"],
+            r=float(fields["r"]),
+            N=int(fields["N"]),
+            i0=int(fields["i0"]),
+            seed=int(fields["seed"]),
+            run_id=fields["run_id"],
+            version=int(version.removeprefix("v")),
+        )
+
+
+def is_seed_ref(text: str) -> bool:
+    return str(text).startswith(SEED_REF_PREFIX)
+
+
+def check_seed_engine(engine: str) -> None:
+    # Batch runs share one stream per experiment, so a single replicate could
+    # not be regenerated without replaying the others.
+    if engine not in STEP_GENERATORS:
+        raise ValueError(f"Engine {engine!r} cannot back seed-only storage; expected one of {sorted(STEP_GENERATORS)}.")
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def regenerate_run(ref: SeedRef) -> MoranRun:
+    """Rebuild the run a seed reference points at, keeping recently used runs cached."""
+    if ref.version != GENERATOR_VERSION:
+        raise ValueError(
+            f"Seed reference for {ref.run_id} was written by generator v{ref.version}; "
+            f"this is v{GENERATOR_VERSION}."
+        )
+    check_seed_engine(ref.engine)
+    rng = keyed_rng(ref.seed, "run", ref.run_id)
+    return ENGINES[ref.engine](r=ref.r, N=ref.N, i0=ref.i0, run_id=ref.run_id, rng=rng)
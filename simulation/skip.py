@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+import math
+import random
+from typing import Iterable, Iterator
+
+from .moran import MoranEvent, MoranRun, StepTuple, TypeLabel, _check_params, collect_run, event_from_step
+
+
+@dataclass
+class CountSegment:
+    """A run of null events followed by the single event that changes the count."""
+
+    null_events: int
+    mutants_before: int
+    mutants_after: int
+
+
+@dataclass
+class CompressedMoranRun:
+    run_id: str
+    true_r: float
+    true_N: int
+    true_i0: int
+    absorbed_type: TypeLabel
+    segments: list[CountSegment]
+
+    @property
+    def num_events(self) -> int:
+        return sum(seg.null_events for seg in self.segments) + len(self.segments)
+
+    def iter_events(self, rng: random.Random) -> Iterator[MoranEvent]:
+        """Expand into the full event table, sampling indices as events are consumed."""
+        for step, t in enumerate(expand_segments(self.segments, self.true_r, self.true_N, rng)):
+            yield event_from_step(step, t, self.true_N)
+
+    def expand(self, rng: random.Random) -> MoranRun:
+        return collect_run(
+            r=self.true_r,
+            N=self.true_N,
+            i0=self.true_i0,
+            run_id=self.run_id,
+            steps=expand_segments(self.segments, self.true_r, self.true_N, rng),
+        )
+
+
+def null_run_length(rng: random.Random, p_change: float) -> int:
+    """Null events before the next count change: failures before the first success of Bernoulli(p_change)."""
+    if p_change >= 1.0:
+        return 0
+    return int(math.log(1.0 - rng.random()) / math.log1p(-p_change))
+
+
+def count_segments(r: float, N: int, i0: int, rng: random.Random) -> Iterator[CountSegment]:
+    i = i0
+    while 0 < i < N:
+        w = i * r + N - i
+        p_up = (i * r / w) * ((N - i) / N)
+        p_down = ((N - i) / w) * (i / N)
+        p_change = p_up + p_down
+        null_events = null_run_length(rng, p_change)
+        after = i + 1 if rng.random() * p_change < p_up else i - 1
+        yield CountSegment(null_events=null_events, mutants_before=i, mutants_after=after)
+        i = after
+
+
+def expand_segments(segments: Iterable[CountSegment], r: float, N: int, rng: random.Random) -> Iterator[StepTuple]:
+    """Sample the individuals behind a count path.
+
+    Given the count path, the individuals involved in each event are uniform
+    within their types, and a null event is A->A with probability
+    i^2 r / (i^2 r + (N - i)^2), so the expansion has the same law as an
+    exact run.
+    """
+    order = list(range(N))
+    slot = list(range(N))
+    for seg in segments:
+        i = seg.mutants_before
+        if seg.null_events:
+            p_aa = i * i * r / (i * i * r + (N - i) * (N - i))
+            for _ in range(seg.null_events):
+                if rng.random() < p_aa:
+                    yield order[rng.randrange(i)], True, order[rng.randrange(i)], True, i, i
+                else:
+                    yield order[i + rng.randrange(N - i)], False, order[i + rng.randrange(N - i)], False, i, i
+
+        up = seg.mutants_after > i
+        if up:
+            birth_index = order[rng.randrange(i)]
+            death_index = order[i + rng.randrange(N - i)]
+        else:
+            birth_index = order[i + rng.randrange(N - i)]
+            death_index = order[rng.randrange(i)]
+        boundary = i if up else i - 1
+        other = order[boundary]
+        order[slot[death_index]] = other
+        slot[other] = slot[death_index]
+        order[boundary] = death_index
+        slot[death_index] = boundary
+        yield birth_index, up, death_index, not up, i, seg.mutants_after
+
+
+def skip_steps(r: float, N: int, i0: int, rng: random.Random) -> Iterator[StepTuple]:
+    # Indices come from their own stream so that streaming (which interleaves
+    # count simulation and expansion) matches simulate_moran_run_skip.
+    expand_rng = random.Random(rng.getrandbits(64))
+    return expand_segments(count_segments(r, N, i0, rng), r, N, expand_rng)
+
+
+def simulate_moran_counts(*, r: float, N: int, i0: int, run_id: str, rng: random.Random) -> CompressedMoranRun:
+    """Simulate only the count changes, drawing each run of null events geometrically."""
+    _check_params(r, N, i0)
+
+    segments = list(count_segments(r, N, i0, rng))
+    absorbed_type: TypeLabel = "A" if segments[-1].mutants_after == N else "B"
+    return CompressedMoranRun(
+        run_id=run_id, true_r=r, true_N=N, true_i0=i0, absorbed_type=absorbed_type, segments=segments
+    )
+
+
+def simulate_moran_run_skip(*, r: float, N: int, i0: int, run_id: str, rng: random.Random) -> MoranRun:
+    _check_params(r, N, i0)
+    return collect_run(r=r, N=N, i0=i0, run_id=run_id, steps=skip_steps(r, N, i0, rng))
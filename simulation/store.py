@@ -0,0 +1,239 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+import hashlib
+import json
+import os
+from pathlib import Path
+import re
+import shutil
+from typing import Iterable, Mapping
+
+from .io import plain_path, read_plain_bytes
+from .seedstore import GENERATOR_VERSION
+
+# Content-addressed trace store shared by all groups:
+#
+#   store/objects/ab/<sha256>.csv[.gz|.zst]   one file per distinct trace
+#   store/points/<point key>.json             run_id -> object for a simulated point
+#
+# Objects are keyed by the SHA-256 of the decompressed bytes, so a plain and a
+# compressed copy of the same trace share one object. Group directories hold
+# hardlinks to objects (symlinks where hardlinks are not possible), which
+# every reader opens like any other trace file. Objects are made read-only, so
+# writing through one group's link fails instead of changing every group.
+# Temporary files carry the writer's pid, so grid workers and concurrently
+# running groups can add the same object at once.
+DEFAULT_STORE_DIR = Path("data/store")
+
+# group.json records the engine and seed of groups made since the store
+# exists. Older groups always used the reference engine, with each runner's
+# fixed seed; dedupe indexes their points under those keys.
+LEGACY_ENGINE = "reference"
+LEGACY_SEEDS = {"classify": 17, "estimation": 42}
+
+_POINT_DIR = re.compile(r"r(.+)_i(\d+)")
+
+
+@dataclass
+class DedupeStats:
+    files: int = 0
+    linked: int = 0
+    already_linked: int = 0
+    bytes_saved: int = 0
+    points: int = 0
+
+
+@dataclass
+class PointRun:
+    """Where a group trace file belongs in the point index."""
+
+    key: str
+    run_id: str
+    meta: dict[str, object]
+
+
+def point_key(*, engine: str, r: float, N: int, i0: int, seed: int) -> str:
+    """Name of a point in the index; everything that determines its traces."""
+    return f"{engine}-v{GENERATOR_VERSION}_N{N}_r{r!r}_i{i0}_s{seed}"
+
+
+def trace_suffix(path: str | Path) -> str:
+    """Everything after the run_id or digest: ".csv", ".csv.gz", ".counts.csv.zst", ..."""
+    path = Path(path)
+    plain = plain_path(path)
+    return "".join(plain.suffixes) + path.name[len(plain.name):]
+
+
+def _same_file(a: Path, b: Path) -> bool:
+    try:
+        return os.path.samefile(a, b)
+    except OSError:
+        return False
+
+
+class TraceStore:
+    def __init__(self, root: str | Path = DEFAULT_STORE_DIR) -> None:
+        self.root = Path(root)
+        self.objects_dir = self.root / "objects"
+        self.points_dir = self.root / "points"
+
+    def object_path(self, digest: str, suffix: str) -> Path:
+        return self.objects_dir / digest[:2] / f"{digest}{suffix}"
+
+    def find_object(self, digest: str) -> Path | None:
+        shard = self.objects_dir / digest[:2]
+        if shard.is_dir():
+            for path in shard.glob(f"{digest}.*"):
+                # Skip another writer's temporary file, live or left by a crash
+                if not path.name.endswith(".tmp"):
+                    return path
+        return None
+
+    def put(self, path: str | Path) -> Path:
+        """Add a trace file to the store (if its content is new) and return its object."""
+        path = Path(path)
+        digest = hashlib.sha256(read_plain_bytes(path)).hexdigest()
+        existing = self.find_object(digest)
+        if existing is not None:
+            return existing
+        obj = self.object_path(digest, trace_suffix(path))
+        obj.parent.mkdir(parents=True, exist_ok=True)
+        # Named so the find_object glob for the digest can never match it
+        tmp = obj.with_name(f".{digest}.{os.getpid()}.tmp")
+        shutil.copyfile(path, tmp)
+        tmp.chmod(0o444)
+        tmp.replace(obj)
+        return obj
+
+    def link(self, obj: Path, directory: str | Path, run_id: str) -> Path:
+        """Hardlink ``obj`` into ``directory`` as run_id plus the object's suffix, replacing any file there."""
+        dest = Path(directory) / f"{run_id}{trace_suffix(obj)}"
+        if _same_file(obj, dest):
+            return dest
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        tmp = dest.with_name(f"{dest.name}.{os.getpid()}.tmp")
+        tmp.unlink(missing_ok=True)
+        try:
+            os.link(obj, tmp)
+        except OSError:
+            # Different filesystem, or no hardlink support.
+            tmp.symlink_to(obj.resolve())
+        tmp.replace(dest)
+        return dest
+
+    def lookup_point(self, key: str) -> dict[str, Path] | None:
+        """run_id -> object for a recorded point, or None if it is unknown or incomplete."""
+        index = self.points_dir / f"{key}.json"
+        if not index.exists():
+            return None
+        runs = {run_id: self.root / rel for run_id, rel in json.loads(index.read_text(encoding="utf-8"))["runs"].items()}
+        if not all(obj.is_file() for obj in runs.values()):
+            return None
+        return runs
+
+    def record_point(self, key: str, runs: dict[str, Path], meta: dict[str, object] | None = None) -> Path:
+        """Merge ``runs`` into the point's index entry (replicates accumulate across calls)."""
+        index = self.points_dir / f"{key}.json"
+        index.parent.mkdir(parents=True, exist_ok=True)
+        entry = json.loads(index.read_text(encoding="utf-8")) if index.exists() else {"key": key, **(meta or {}), "runs": {}}
+        for run_id, obj in runs.items():
+            entry["runs"][run_id] = obj.relative_to(self.root).as_posix()
+        entry["runs"] = dict(sorted(entry["runs"].items()))
+        tmp = index.with_name(f"{index.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(entry, indent=2), encoding="utf-8")
+        tmp.replace(index)
+        return index
+
+    def dedupe(
+        self,
+        paths: Iterable[str | Path],
+        *,
+        points: Mapping[Path, PointRun] | None = None,
+        dry_run: bool = False,
+    ) -> DedupeStats:
+        """Move trace files into the store and replace each with a hardlink to its object.
+
+        Files listed in ``points`` (see group_trace_points) are also recorded
+        under their point key, so the grid runners link those points instead
+        of simulating them again.
+        """
+        stats = DedupeStats()
+        planned: dict[str, str] = {}  # digest -> suffix of objects a dry run would have created
+        recorded: dict[str, tuple[dict[str, object], dict[str, Path]]] = {}
+        for path in paths:
+            path = Path(path)
+            if path.is_symlink() or not path.is_file():
+                continue
+            stats.files += 1
+            digest = hashlib.sha256(read_plain_bytes(path)).hexdigest()
+            existing = self.find_object(digest)
+            if existing is not None and _same_file(existing, path):
+                stats.already_linked += 1
+                continue
+            suffix = trace_suffix(path)
+            existing_suffix = trace_suffix(existing) if existing is not None else planned.get(digest)
+            if existing_suffix is not None:
+                # Summaries name the file, so only an object stored the same way can stand in for it.
+                if existing_suffix != suffix:
+                    continue
+                stats.bytes_saved += path.stat().st_size
+            stats.linked += 1
+            run = (points or {}).get(path)
+            if dry_run:
+                planned.setdefault(digest, suffix)
+                if run is not None:
+                    recorded.setdefault(run.key, (run.meta, {}))
+                continue
+            obj = existing if existing is not None else self.put(path)
+            self.link(obj, path.parent, path.name[: -len(suffix)])
+            if run is not None:
+                recorded.setdefault(run.key, (run.meta, {}))[1][run.run_id] = obj
+        stats.points = len(recorded)
+        if not dry_run:
+            for key, (meta, runs) in recorded.items():
+                self.record_point(key, runs, meta)
+        return stats
+
+
+def group_trace_files(groups_dir: str | Path, groups: Iterable[str] | None = None) -> list[Path]:
+    """Every trace CSV (compressed or not) under the groups' raw/ directories."""
+    groups_dir = Path(groups_dir)
+    names = list(groups) if groups else sorted(p.name for p in groups_dir.iterdir() if p.is_dir())
+    files: list[Path] = []
+    for name in names:
+        raw = groups_dir / name / "raw"
+        if raw.is_dir():
+            files.extend(sorted(p for p in raw.rglob("*.csv*") if not p.name.endswith(".tmp")))
+    return files
+
+
+def group_trace_points(groups_dir: str | Path, groups: Iterable[str] | None = None) -> dict[Path, PointRun]:
+    """Point key and run_id of every trace under the groups' raw/r<r>_i<i0>/ directories.
+
+    Paths are built like group_trace_files builds them, so the two can be
+    passed to TraceStore.dedupe together.
+    """
+    groups_dir = Path(groups_dir)
+    names = list(groups) if groups else sorted(p.name for p in groups_dir.iterdir() if p.is_dir())
+    runs: dict[Path, PointRun] = {}
+    for name in names:
+        group_json = groups_dir / name / "group.json"
+        if not group_json.exists():
+            continue
+        meta = json.loads(group_json.read_text(encoding="utf-8"))
+        engine = meta.get("engine", LEGACY_ENGINE)
+        seed = meta.get("seed", LEGACY_SEEDS.get(meta.get("pipeline", "classify")))
+        if "N" not in meta or seed is None:
+            continue
+        for point_dir in sorted((groups_dir / name / "raw").glob("r*_i*")):
+            match = _POINT_DIR.fullmatch(point_dir.name)
+            if match is None or not point_dir.is_dir():
+                continue
+            r, N, i0 = float(match[1]), int(meta["N"]), int(match[2])
+            key = point_key(engine=engine, r=r, N=N, i0=i0, seed=seed)
+            point_meta = {"engine": engine, "r": r, "N": N, "i0": i0, "seed": seed}
+            for path in point_dir.glob("*.csv*"):
+                if not path.name.endswith(".tmp"):
+                    runs[path] = PointRun(key, path.name[: -len(trace_suffix(path))], point_meta)
+    return runs
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Iterator
+
+import numpy as np
+
+from .io import TRACE_ARCHIVE_SUFFIX, TraceArchive, archive_ref, split_archive_ref
+
+
+@dataclass
+class EventSlice:
+    """Events [start, stop) of one run.
+
+    The index and count columns are zero-copy views into the memory-mapped
+    archive; only the two type columns are unpacked, and only for this range.
+    """
+
+    N: int
+    start: int
+    birth_index: np.ndarray
+    death_index: np.ndarray
+    mutants_before: np.ndarray
+    birth_is_mutant: np.ndarray
+    death_is_mutant: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.mutants_before)
+
+    @property
+    def step(self) -> np.ndarray:
+        return np.arange(self.start, self.start + len(self))
+
+    @property
+    def mutants_after(self) -> np.ndarray:
+        delta = self.birth_is_mutant.astype(np.int64) - self.death_is_mutant.astype(np.int64)
+        return self.mutants_before + delta
+
+    def csv_rows(self, stride: int = 1) -> Iterator[list[object]]:
+        """Rows in io.OBSERVABLE_TRACE_COLUMNS order, keeping the original step numbers."""
+        N = self.N
+        columns = zip(
+            self.step[::stride].tolist(),
+            self.birth_index[::stride].tolist(),
+            self.birth_is_mutant[::stride].tolist(),
+            self.death_index[::stride].tolist(),
+            self.death_is_mutant[::stride].tolist(),
+            self.mutants_before[::stride].tolist(),
+            self.mutants_after[::stride].tolist(),
+        )
+        for step, b, b_mut, d, d_mut, before, after in columns:
+            bt = "A" if b_mut else "B"
+            dt = "A" if d_mut else "B"
+            yield [step, f"{b}{bt}:{d}{dt}", b, bt, d, dt, before, after, N]
+
+
+class TraceIndex:
+    """Random access to events across many memory-mapped trace archives.
+
+    Runs are addressed by archive reference (``path.mtrace#run_id``), or by
+    bare run_id when it is unique across the indexed archives. Archives not
+    passed up front are mapped the first time one of their references is
+    queried.
+    """
+
+    def __init__(self, archive_paths: Iterable[str | Path] = ()) -> None:
+        self._archives: dict[str, TraceArchive] = {}
+        self._by_run_id: dict[str, list[str]] = {}
+        for path in archive_paths:
+            self._archive(str(path))
+
+    @classmethod
+    def from_group(cls, group_dir: str | Path) -> TraceIndex:
+        return cls(sorted((Path(group_dir) / "archive").glob(f"*{TRACE_ARCHIVE_SUFFIX}")))
+
+    def _archive(self, path: str) -> TraceArchive:
+        archive = self._archives.get(path)
+        if archive is None:
+            archive = self._archives[path] = TraceArchive.map(path)
+            for run_id in archive.run_ids:
+                self._by_run_id.setdefault(run_id, []).append(path)
+        return archive
+
+    def _resolve(self, run_ref: str) -> tuple[TraceArchive, str]:
+        packed = split_archive_ref(run_ref)
+        if packed:
+            return self._archive(packed[0]), packed[1]
+        paths = self._by_run_id.get(run_ref, [])
+        if len(paths) != 1:
+            problem = "not indexed" if not paths else f"in {len(paths)} archives; use an archive reference"
+            raise KeyError(f"Run {run_ref!r} is {problem}.")
+        return self._archives[paths[0]], run_ref
+
+    def __len__(self) -> int:
+        return sum(len(archive) for archive in self._archives.values())
+
+    def refs(self) -> Iterator[str]:
+        for path, archive in self._archives.items():
+            for run_id in archive.run_ids:
+                yield archive_ref(path, run_id)
+
+    def num_events(self, run_ref: str) -> int:
+        archive, run_id = self._resolve(run_ref)
+        return archive.num_events(run_id)
+
+    def N(self, run_ref: str) -> int:
+        archive, run_id = self._resolve(run_ref)
+        return archive.meta(run_id)["true_N"]
+
+    def get_events(self, run_ref: str, start: int = 0, stop: int | None = None) -> EventSlice:
+        """Events [start, stop) of a run; negative bounds count from the end as in slicing."""
+        archive, run_id = self._resolve(run_ref)
+        lo, hi = archive.span(run_id)
+        start, stop, _ = slice(start, stop).indices(hi - lo)
+        stop = max(start, stop)
+        a, b = lo + start, lo + stop
+        columns = archive.columns
+        return EventSlice(
+            N=archive.meta(run_id)["true_N"],
+            start=start,
+            birth_index=columns["birth_index"][a:b],
+            death_index=columns["death_index"][a:b],
+            mutants_before=columns["mutants_before"][a:b],
+            birth_is_mutant=archive.bits("birth_is_mutant", a, b),
+            death_is_mutant=archive.bits("death_is_mutant", a, b),
+        )
+
+    def find_state(self, run_ref: str, mutants: int) -> int | None:
+        """First step whose event starts with ``mutants`` mutants, or None if the run never has that count."""
+        archive, run_id = self._resolve(run_ref)
+        lo, hi = archive.span(run_id)
+        hits = np.flatnonzero(archive.columns["mutants_before"][lo:hi] == mutants)
+        return int(hits[0]) if len(hits) else None
+
+    def state_at(self, run_ref: str, step: int) -> int:
+        """Mutant count just before event ``step``; step == num_events gives the absorbed state."""
+        archive, run_id = self._resolve(run_ref)
+        lo, hi = archive.span(run_id)
+        if not 0 <= step <= hi - lo:
+            raise IndexError(f"Step {step} out of range for {run_ref} with {hi - lo} events.")
+        if step < hi - lo:
+            return int(archive.columns["mutants_before"][lo + step])
+        last = self.get_events(run_ref, hi - lo - 1, hi - lo)
+        return int(last.mutants_after[0])
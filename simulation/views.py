@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+import re
+
+from .io import OBSERVABLE_TRACE_COLUMNS, plain_path, read_trace_rows, split_archive_ref, trace_display_name
+from .seeding import keyed_rng
+from .trace_index import TraceIndex
+
+# A crop view is a crop applied when the trace is read instead of a file on
+# disk. Any trace reference (CSV path, seed reference, archive reference) can
+# carry one as ``ref@view``; view names are the crop names used for the
+# materialized ``{run_id}__{crop}.csv`` files, plus two that only exist as views:
+#
+#   full                    every event
+#   prefixK / suffixK       first / last K events
+#   strideK                 every K-th event, starting with the first
+#   windowLsS               L consecutive events at a random start, drawn from
+#                           seed S and the run_id (the same window on every read)
+#   stateMwL                L events from the first one with M mutants before it
+VIEW_SEP = "@"
+VIEW_KINDS = ("full", "prefix", "suffix", "stride", "window", "state")
+
+_VIEW_PATTERN = re.compile(r"full|(prefix|suffix|stride)(\d+)|window(\d+)s(\d+)|state(\d+)w(\d+)")
+
+_index = TraceIndex()
+
+
+@dataclass(frozen=True)
+class CropView:
+    kind: str
+    length: int = 0
+    stride: int = 1
+    seed: int = 0
+    state: int = 0
+
+    @property
+    def name(self) -> str:
+        if self.kind == "full":
+            return "full"
+        if self.kind == "stride":
+            return f"stride{self.stride}"
+        if self.kind == "window":
+            return f"window{self.length}s{self.seed}"
+        if self.kind == "state":
+            return f"state{self.state}w{self.length}"
+        return f"{self.kind}{self.length}"
+
+    def bounds(self, num_events: int, run_id: str, state_step: int | None = None) -> tuple[int, int, int]:
+        """(start, stop, stride) of the selected events.
+
+        ``state_step`` is the first step starting from ``state`` mutants (None if
+        the run never reaches it); only state views use it.
+        """
+        n = num_events
+        if self.kind == "full":
+            return 0, n, 1
+        if self.kind == "prefix":
+            return 0, min(self.length, n), 1
+        if self.kind == "suffix":
+            return max(n - self.length, 0) if self.length else n, n, 1
+        if self.kind == "stride":
+            return 0, n, self.stride
+        if self.kind == "window":
+            start = keyed_rng(self.seed, "window", run_id).randrange(max(n - self.length, 0) + 1)
+            return start, min(start + self.length, n), 1
+        if state_step is None:
+            return n, n, 1
+        return state_step, min(state_step + self.length, n), 1
+
+
+def parse_view(name: str) -> CropView:
+    match = _VIEW_PATTERN.fullmatch(name)
+    if not match:
+        raise ValueError(
+            f"Unknown crop view {name!r}; expected full, prefixK, suffixK, strideK, windowLsS or stateMwL."
+        )
+    kind, k, window_len, window_seed, state, state_len = match.groups()
+    if name == "full":
+        return CropView("full")
+    if kind == "stride":
+        if int(k) < 1:
+            raise ValueError("Stride crops need a stride of at least 1.")
+        return CropView("stride", stride=int(k))
+    if kind is not None:
+        return CropView(kind, length=int(k))
+    if window_len is not None:
+        return CropView("window", length=int(window_len), seed=int(window_seed))
+    return CropView("state", length=int(state_len), state=int(state))
+
+
+def view_ref(trace_ref: str, view: str) -> str:
+    """Attach a crop view to a trace reference (``full`` leaves it unchanged)."""
+    parse_view(view)
+    return trace_ref if view == "full" else f"{trace_ref}{VIEW_SEP}{view}"
+
+
+def split_view_ref(trace_ref: str) -> tuple[str, CropView | None]:
+    """(base reference, view) for ``ref@view``; the view is None for a plain reference."""
+    base, sep, name = str(trace_ref).rpartition(VIEW_SEP)
+    if sep and _VIEW_PATTERN.fullmatch(name):
+        return base, parse_view(name)
+    return str(trace_ref), None
+
+
+def _run_id(base_ref: str) -> str:
+    return plain_path(trace_display_name(base_ref)).stem
+
+
+def view_display_name(trace_ref: str) -> str:
+    """File name shown for a trace, matching the materialized crop file for a view."""
+    base, view = split_view_ref(trace_ref)
+    if view is None:
+        return trace_display_name(base)
+    return f"{_run_id(base)}__{view.name}.csv"
+
+
+def read_view_rows(trace_ref: str) -> tuple[list[str], list[dict[str, str]]]:
+    """Like io.read_trace_rows, applying a crop view if the reference carries one.
+
+    Views on archive references slice the memory-mapped archive, so only the
+    selected events are unpacked; other references read the whole trace once.
+    Rows keep their original step numbers, exactly as the materialized crops do.
+    """
+    base, view = split_view_ref(trace_ref)
+    if view is None:
+        return read_trace_rows(base)
+    run_id = _run_id(base)
+    if split_archive_ref(base):
+        n = _index.num_events(base)
+        state_step = _index.find_state(base, view.state) if view.kind == "state" else None
+        start, stop, stride = view.bounds(n, run_id, state_step)
+        rows = [
+            dict(zip(OBSERVABLE_TRACE_COLUMNS, (str(v) for v in row)))
+            for row in _index.get_events(base, start, stop).csv_rows(stride)
+        ]
+        return list(OBSERVABLE_TRACE_COLUMNS), rows
+    fieldnames, rows = read_trace_rows(base)
+    state_step = None
+    if view.kind == "state":
+        state_step = next((i for i, row in enumerate(rows) if int(row["mutants_before"]) == view.state), None)
+    start, stop, stride = view.bounds(len(rows), run_id, state_step)
+    return fieldnames, rows[start:stop:stride]
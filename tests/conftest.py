@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import json
+from types import SimpleNamespace
+from typing import Callable
+
+import pytest
+
+
+class FakeOpenAI:
+    """In-memory stand-in for the parts of the OpenAI client the pipelines use.
+
+    Batches stay ``in_progress`` until ``finish`` answers every request with
+    ``label(custom_id)``, or ``set_status`` moves them along by hand. With
+    ``auto_finish`` a batch finishes the first time it is retrieved.
+    """
+
+    def __init__(self, label: Callable[[str], str] = lambda custom_id: "X") -> None:
+        self.label = label
+        self.uploads: dict[str, bytes] = {}
+        self.batches_by_id: dict[str, SimpleNamespace] = {}
+        self.inputs: dict[str, str] = {}     # batch id -> input file id
+        self.fail_uploads = 0                # fail this many uploads before succeeding
+        self.clients_made = 0                # make_client() calls that returned this client
+        self.auto_finish = False
+        self.files = SimpleNamespace(create=self._upload, content=self._content)
+        self.batches = SimpleNamespace(create=self._create, retrieve=self._retrieve)
+
+    def _upload(self, *, file: tuple[str, bytes], purpose: str) -> SimpleNamespace:
+        if self.fail_uploads:
+            self.fail_uploads -= 1
+            raise RuntimeError("upload failed")
+        file_id = f"file-{len(self.uploads)}"
+        self.uploads[file_id] = file[1]
+        return SimpleNamespace(id=file_id)
+
+    def _content(self, file_id: str) -> SimpleNamespace:
+        return SimpleNamespace(content=self.uploads[file_id])
+
+    def _create(self, *, input_file_id: str, endpoint: str, completion_window: str) -> SimpleNamespace:
+        batch_id = f"batch-{len(self.batches_by_id)}"
+        self.inputs[batch_id] = input_file_id
+        self.batches_by_id[batch_id] = SimpleNamespace(
+            id=batch_id, status="in_progress", output_file_id=None, error_file_id=None
+        )
+        return self.batches_by_id[batch_id]
+
+    def _retrieve(self, batch_id: str) -> SimpleNamespace:
+        if self.auto_finish:
+            self.finish(batch_id)
+        return self.batches_by_id[batch_id]
+
+    def requests(self, batch_id: str) -> list[dict]:
+        return [json.loads(line) for line in self.uploads[self.inputs[batch_id]].decode("utf-8").splitlines() if line]
+
+    def set_status(self, batch_id: str, status: str, *, output: bytes | None = None, errors: bytes | None = None) -> None:
+        batch = self.batches_by_id[batch_id]
+        batch.status = status
+        for attr, content in (("output_file_id", output), ("error_file_id", errors)):
+            if content is not None:
+                file_id = f"file-{len(self.uploads)}"
+                self.uploads[file_id] = content
+                setattr(batch, attr, file_id)
+
+    def finish(self, batch_id: str | None = None) -> None:
+        """Complete one batch (default: every unfinished one) with a JSON label per request."""
+        for bid in [batch_id] if batch_id else list(self.batches_by_id):
+            if self.batches_by_id[bid].status != "in_progress":
+                continue
+            lines = [
+                json.dumps({
+                    "custom_id": request["custom_id"],
+                    "response": {"body": {"choices": [
+                        {"message": {"content": json.dumps({"label": self.label(request["custom_id"])})}}
+                    ]}},
+                })
+                for request in self.requests(bid)
+            ]
+            self.set_status(bid, "completed", output=("\n".join(lines) + "\n").encode("utf-8"))
+
+
+@pytest.fixture
+def fake_openai(monkeypatch) -> FakeOpenAI:
+    """A FakeOpenAI that every make_client() call of the pipelines returns."""
+    pytest.importorskip("openai")
+    import evaluation.client
+
+    client = FakeOpenAI()
+
+    def make_client() -> FakeOpenAI:
+        client.clients_made += 1
+        return client
+
+    monkeypatch.setattr(evaluation.client, "make_client", make_client)
+    return client
+
+
+@pytest.fixture
+def small_grid(tmp_path, monkeypatch):
+    """run_grid with its groups and store under tmp_path, N=6 and 3 replicates."""
+    import run_grid
+
+    monkeypatch.setattr(run_grid, "GROUPS_DIR", tmp_path / "groups")
+    monkeypatch.setattr(run_grid, "STORE_DIR", tmp_path / "store")
+    monkeypatch.setattr(run_grid, "N", 6)
+    monkeypatch.setattr(run_grid, "REPLICATES", 3)
+    monkeypatch.setattr(run_grid, "GRID", [(1.5, 2), (0.7, 3)])
+    return run_grid
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import random
+
+import pytest
+
+from moran_grid import rho_i
+from simulation.absorption import absorption_time, format_budget_table, predict_trace_budget
+from simulation.io import write_run_trace_csv
+from simulation.moran import simulate_moran_run_indexed
+from simulation.skip import simulate_moran_counts
+
+
+def test_two_individuals_absorb_geometrically():
+    # From i = 1 of N = 2 the count changes with probability 1/2 per event, whatever r is
+    t = absorption_time(1.7, 2, 1)
+    assert t.mean == pytest.approx(2.0)
+    assert t.var == pytest.approx(2.0)
+
+
+def test_mean_absorption_time_matches_simulation():
+    r, N, i0, runs = 1.2, 15, 4, 3000
+    rng = random.Random(6)
+    events = [simulate_moran_counts(r=r, N=N, i0=i0, run_id="c", rng=rng).num_events for _ in range(runs)]
+    t = absorption_time(r, N, i0)
+    mean = sum(events) / runs
+    assert abs(mean - t.mean) < 4 * t.std / runs**0.5
+    assert sum((e - mean) ** 2 for e in events) / (runs - 1) == pytest.approx(t.var, rel=0.15)
+
+
+def test_conditional_times_average_to_the_unconditional_time():
+    r, N, i0 = 0.9, 12, 5
+    rho = rho_i(i0, N, r)
+    fixation = absorption_time(r, N, i0, "fixation").mean
+    extinction = absorption_time(r, N, i0, "extinction").mean
+    assert rho * fixation + (1 - rho) * extinction == pytest.approx(absorption_time(r, N, i0).mean)
+
+
+def test_trace_budget_predicts_csv_size(tmp_path):
+    r, N, i0, runs = 1.1, 20, 10, 200
+    rng = random.Random(2)
+    sizes = [
+        write_run_trace_csv(simulate_moran_run_indexed(r=r, N=N, i0=i0, run_id="x", rng=rng), tmp_path / "x.csv")
+        .stat().st_size
+        for _ in range(runs)
+    ]
+    budget = predict_trace_budget(r, N, i0)
+    assert sum(sizes) / runs == pytest.approx(budget.bytes, rel=0.15)
+    assert "Grid total" in format_budget_table([(r, i0)], N, 20)
@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import json
+import random
+
+import pytest
+
+from moran_grid import rho_i
+from simulation.approx import check_leap_engine, leap_rho_check
+from simulation.generate_dataset import generate_dataset
+
+
+def test_rho_check_bounds_the_distance_to_the_interval():
+    check = leap_rho_check(1.0, 10, 5, ["A"] * 50 + ["B"] * 50)
+    low, high = check["rho_leap_ci"]
+    assert check["rho_leap"] == 0.5
+    assert low < 0.5 < high and check["rho_within_ci"]
+    assert check["rho_error_bound"] == pytest.approx(max(0.5 - low, high - 0.5))
+
+    # rho_i(1, 10, 1) = 0.1 is outside the interval of 50% fixation
+    far = leap_rho_check(1.0, 10, 1, ["A"] * 50 + ["B"] * 50)
+    assert not far["rho_within_ci"]
+    assert far["rho_error_bound"] > 0.4
+
+
+def test_leaping_engine_fixes_within_its_bound():
+    r, N, i0 = 1.01, 200, 60
+    check = check_leap_engine(r=r, N=N, i0=i0, replicates=400, rng=random.Random(5), epsilon=0.2, boundary=5)
+    assert check["rho_within_ci"]
+    assert abs(check["rho_leap"] - rho_i(i0, N, r)) <= check["rho_error_bound"] < 0.1
+
+
+def test_large_N_switches_to_leaping_and_records_the_bound(tmp_path):
+    summary = generate_dataset(
+        num_experiments=1, replicates=4, seed=1, base_dir=tmp_path, fixed_r=1.2, fixed_N=60, fixed_i0=30,
+        exact_max_N=50,
+    )
+    rows = summary.read_text(encoding="utf-8").splitlines()[1:]
+    assert len(rows) == 4
+    meta = json.loads((tmp_path / "data" / "raw" / "exp001_run01.meta.json").read_text(encoding="utf-8"))
+    assert meta["engine"] == "tau_leap" and meta["approximate"]
+    assert meta["leap_runs"] == 4
+    assert meta["rho_exact"] == pytest.approx(rho_i(30, 60, 1.2))
+    low, high = meta["rho_leap_ci"]
+    assert meta["rho_error_bound"] == pytest.approx(max(abs(meta["rho_exact"] - low), abs(meta["rho_exact"] - high)))
+    assert (tmp_path / "data" / "raw" / "exp001_run01.leaps.csv").exists()
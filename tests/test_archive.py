@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import random
+
+from simulation.io import (
+    TraceArchive,
+    archive_ref,
+    load_trace_archive,
+    read_trace_rows,
+    write_run_trace_csv,
+    write_trace_archive,
+)
+from simulation.moran import simulate_moran_run_indexed
+
+
+def _runs(seed: int, count: int, N: int = 12):
+    rng = random.Random(seed)
+    return [
+        simulate_moran_run_indexed(r=1.2, N=N, i0=3, run_id=f"exp001_run{k:02d}", rng=rng) for k in range(1, count + 1)
+    ]
+
+
+def _as_tuple(run):
+    return run.run_id, run.true_r, run.true_N, run.true_i0, run.absorbed_type, list(run.steps)
+
+
+def test_archive_round_trips_every_run(tmp_path):
+    runs = _runs(1, 5)
+    path = write_trace_archive(runs, tmp_path / "archive" / "r1.2_i3.mtrace")
+    for archive in (TraceArchive.load(path), TraceArchive.map(path)):
+        assert archive.run_ids == [run.run_id for run in runs]
+        for run in runs:
+            assert _as_tuple(archive.run(run.run_id)) == _as_tuple(run)
+            # Slices are renumbered from step 0
+            assert [ev.event for ev in archive.trace(run.run_id, 2, 6)] == [ev.event for ev in run.steps[2:6]]
+    csv_path = write_run_trace_csv(runs[0], tmp_path / "exp001_run01.csv")
+    assert read_trace_rows(archive_ref(path, runs[0].run_id)) == read_trace_rows(csv_path)
+
+
+def test_rewritten_archive_is_not_served_from_the_old_mapping(tmp_path):
+    path = tmp_path / "point.mtrace"
+    old_runs = _runs(1, 3)
+    write_trace_archive(old_runs, path)
+    old = load_trace_archive(str(path))
+    assert old.run_ids == [run.run_id for run in old_runs]
+
+    new_runs = _runs(2, 4)
+    write_trace_archive(new_runs, path)
+    assert not list(tmp_path.glob("*.tmp"))
+    new = load_trace_archive(str(path))
+    assert new is not old
+    assert _as_tuple(new.run(new_runs[0].run_id)) == _as_tuple(new_runs[0])
+    # The old mapping still reads the old file, which the rename left intact
+    assert _as_tuple(old.run(old_runs[2].run_id)) == _as_tuple(old_runs[2])
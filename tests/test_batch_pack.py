@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import csv
+from pathlib import Path
+
+import pytest
+
+from evaluation.batch_pack import PackPoint, make_custom_id, shard_points, split_custom_id
+
+
+def _point(label):
+    return PackPoint(label, Path(f"{label}.csv"), Path("ids.jsonl"))
+
+
+def test_custom_ids_round_trip():
+    assert split_custom_id(make_custom_id("classify", "exp001_run03", "g.r1.5_i2")) == ("g.r1.5_i2", "exp001_run03")
+    assert split_custom_id(make_custom_id("classify", "exp001_run03")) == ("", "exp001_run03")
+
+
+def test_shards_keep_each_point_whole_under_both_limits():
+    points = [(_point(f"p{k}"), [f"{k}-{j}" for j in range(n)]) for k, n in enumerate([3, 2, 4, 1, 6])]
+    shards = list(shard_points(points, max_requests=5, max_bytes=10_000))
+    assert [[line for _, line in shard] for shard in shards][:2] == [
+        ["0-0", "0-1", "0-2", "1-0", "1-1"],
+        ["2-0", "2-1", "2-2", "2-3", "3-0"],
+    ]
+    # Only a point larger than a shard is split
+    assert [len(shard) for shard in shards] == [5, 5, 5, 1]
+
+    by_bytes = list(shard_points(points[:2], max_requests=100, max_bytes=4 * 4))
+    assert [{p.label for p, _ in shard} for shard in by_bytes] == [{"p0"}, {"p1"}]
+    with pytest.raises(ValueError):
+        list(shard_points(points, max_requests=100, max_bytes=3))
+
+
+def test_packed_grid_votes_every_point_from_shared_batches(small_grid, fake_openai, monkeypatch):
+    grid = [(1.5, 2), (0.7, 3), (1.1, 1)]
+    monkeypatch.setattr(small_grid, "GRID", grid)
+    # O for one point only, to check that votes stay with their point
+    fake_openai.label = lambda custom_id: "O" if ".r0.7_i3__" in custom_id else "X"
+    small_grid.simulate_and_send("g", pack=True, max_requests=7)
+
+    # Three points of 3 runs each: two shards, no point split across them
+    assert len(fake_openai.batches_by_id) == 2
+    shards = [{split_custom_id(req["custom_id"])[0] for req in fake_openai.requests(b)} for b in fake_openai.batches_by_id]
+    assert shards == [{"g.r1.5_i2", "g.r0.7_i3"}, {"g.r1.1_i1"}]
+
+    fake_openai.finish()
+    small_grid.fetch_parse_vote("g")
+    with small_grid.group_paths("g")["voted_csv"].open(newline="", encoding="utf-8") as handle:
+        voted = {(float(row["true_r"]), int(row["true_i0"])): row for row in csv.DictReader(handle)}
+    assert sorted(voted) == sorted(grid)
+    assert {point: row["majority_vote"] for point, row in voted.items()} == {(1.5, 2): "X", (0.7, 3): "O", (1.1, 1): "X"}
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import csv
+import random
+
+import pytest
+
+from simulation.crop import _CropSink, make_crop_variants, write_crop_variants
+from simulation.io import OBSERVABLE_TRACE_COLUMNS, open_text, write_run_trace_csv
+from simulation.moran import simulate_moran_run
+
+
+def _rows(path):
+    with open_text(path, newline="") as handle:
+        return list(csv.reader(handle))
+
+
+@pytest.fixture
+def trace_csv(tmp_path):
+    run = simulate_moran_run(r=1.1, N=10, i0=3, run_id="exp001_run01", rng=random.Random(1))
+    assert run.num_events > 30
+    return write_run_trace_csv(run, tmp_path / "raw" / "exp001_run01.csv")
+
+
+@pytest.mark.parametrize("prefix_k, suffix_k, stride", [(10, 10, 3), (4, 7, 5), (2, 3, 0)])
+def test_crop_variants_keep_their_names_and_slices(tmp_path, trace_csv, prefix_k, suffix_k, stride):
+    header, *rows = _rows(trace_csv)
+    paths = make_crop_variants(trace_csv, tmp_path / "cropped", prefix_k=prefix_k, suffix_k=suffix_k, stride=stride)
+    assert list(paths) == ["full", "prefix10", "suffix10", "stride3"]
+    assert paths["prefix10"].name == "exp001_run01__prefix10.csv"
+    expected = {
+        "full": rows,
+        "prefix10": rows[:prefix_k],
+        "suffix10": rows[-suffix_k:],
+        "stride3": rows[::stride] if stride > 0 else rows,
+    }
+    for name, path in paths.items():
+        assert _rows(path) == [header, *expected[name]]
+
+
+def test_prefix_crops_stop_the_stream_once_filled(tmp_path):
+    consumed = []
+
+    def rows():
+        for k in range(1000):
+            consumed.append(k)
+            yield [k] * len(OBSERVABLE_TRACE_COLUMNS)
+
+    paths, count, last = write_crop_variants(rows(), tmp_path, "run", ["prefix3", "prefix5"], stop_when_filled=True)
+    assert count == 5 and len(consumed) == 5 and last[0] == 4
+    assert len(_rows(paths["prefix5"])) == 6
+    with pytest.raises(ValueError):
+        write_crop_variants(rows(), tmp_path, "run", ["prefix3", "suffix3"], stop_when_filled=True)
+
+
+def test_crop_sink_base_is_abstract(tmp_path):
+    with pytest.raises(TypeError):
+        _CropSink("full", tmp_path / "x.csv", OBSERVABLE_TRACE_COLUMNS)
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import random
+
+import pytest
+
+from moran_grid import rho_i
+from simulation.batch import simulate_moran_batch
+from simulation.engines import iter_moran_events
+from simulation.moran import MoranRun, simulate_moran_run, simulate_moran_run_indexed
+from simulation.skip import simulate_moran_counts, simulate_moran_run_skip
+
+
+def assert_consistent(run: MoranRun) -> None:
+    """Replay the trace on a population that starts with mutants at positions 0..i0-1."""
+    N, i0 = run.true_N, run.true_i0
+    population = ["A"] * i0 + ["B"] * (N - i0)
+    i = i0
+    for step, ev in enumerate(run.steps):
+        assert ev.step == step
+        assert ev.mutants_before == i
+        assert population[ev.birth_index] == ev.birth_type
+        assert population[ev.death_index] == ev.death_type
+        population[ev.death_index] = ev.birth_type
+        i = population.count("A")
+        assert ev.mutants_after == i
+        assert 0 < ev.mutants_before < N
+    assert i in (0, N)
+    assert run.absorbed_type == ("A" if i == N else "B")
+
+
+@pytest.mark.parametrize("simulate", [simulate_moran_run, simulate_moran_run_indexed, simulate_moran_run_skip])
+@pytest.mark.parametrize("r, N, i0", [(1.0, 2, 1), (1.5, 12, 3), (0.7, 9, 8)])
+def test_trace_replays_on_the_population(simulate, r, N, i0):
+    rng = random.Random(7)
+    for k in range(20):
+        assert_consistent(simulate(r=r, N=N, i0=i0, run_id=f"run{k}", rng=rng))
+
+
+def test_indexed_fixation_frequency_matches_rho():
+    r, N, i0, runs = 1.4, 10, 2, 4000
+    rng = random.Random(3)
+    fixed = sum(
+        simulate_moran_run_indexed(r=r, N=N, i0=i0, run_id="x", rng=rng).absorbed_type == "A" for _ in range(runs)
+    )
+    rho = rho_i(i0, N, r)
+    # Four standard errors of the binomial estimate
+    assert abs(fixed / runs - rho) < 4 * (rho * (1 - rho) / runs) ** 0.5
+
+
+def test_batch_runs_replay_and_fix_at_rho():
+    r, N, i0, replicates = 0.8, 8, 5, 3000
+    batch = simulate_moran_batch(r, N, i0, replicates, 11)
+    runs = batch.to_runs([f"run{k}" for k in range(replicates)])
+    for run in runs[:200]:
+        assert_consistent(run)
+    assert [run.num_events for run in runs] == [batch.num_events(k) for k in range(replicates)]
+
+    rho = rho_i(i0, N, r)
+    fixed = sum(run.absorbed_type == "A" for run in runs) / replicates
+    assert abs(fixed - rho) < 4 * (rho * (1 - rho) / replicates) ** 0.5
+
+
+def test_batch_is_reproducible_from_its_seed():
+    a = simulate_moran_batch(1.3, 10, 4, 50, 5)
+    b = simulate_moran_batch(1.3, 10, 4, 50, 5)
+    assert (a.offsets == b.offsets).all() and (a.birth_index == b.birth_index).all()
+    with pytest.raises(ValueError):
+        a.to_runs(["only-one"])
+
+
+def test_count_segments_expand_to_the_same_count_path():
+    run = simulate_moran_counts(r=1.2, N=15, i0=4, run_id="c", rng=random.Random(9))
+    expanded = run.expand(random.Random(1))
+    assert_consistent(expanded)
+    assert expanded.num_events == run.num_events
+    changes = [(ev.mutants_before, ev.mutants_after) for ev in expanded.steps if ev.mutants_before != ev.mutants_after]
+    assert changes == [(seg.mutants_before, seg.mutants_after) for seg in run.segments]
+
+
+def test_streamed_skip_run_matches_in_memory_run():
+    run = simulate_moran_run_skip(r=0.9, N=12, i0=6, run_id="s", rng=random.Random(4))
+    streamed = list(iter_moran_events(r=0.9, N=12, i0=6, rng=random.Random(4), engine="skip"))
+    assert streamed == list(run.steps)
+
+
+def test_count_chain_fixes_at_rho():
+    r, N, i0, runs = 1.1, 30, 10, 3000
+    rng = random.Random(2)
+    fixed = sum(simulate_moran_counts(r=r, N=N, i0=i0, run_id="c", rng=rng).absorbed_type == "A" for _ in range(runs))
+    rho = rho_i(i0, N, r)
+    assert abs(fixed / runs - rho) < 4 * (rho * (1 - rho) / runs) ** 0.5
@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import gzip
+import json
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("openai")
+
+from evaluation.fetch_batch_estimation import fetch_estimation_batches
+from evaluation.fetch_batch_fixation_probability import fetch_classify_batches
+
+
+class StubClient:
+    """Just enough of the OpenAI client for the fetchers: every batch is completed."""
+
+    def __init__(self) -> None:
+        self.retrieved: list[str] = []
+        self.batches = SimpleNamespace(retrieve=self._retrieve)
+        self.files = SimpleNamespace(content=lambda file_id: SimpleNamespace(content=f"{file_id}\n".encode()))
+
+    def _retrieve(self, batch_id: str) -> SimpleNamespace:
+        self.retrieved.append(batch_id)
+        return SimpleNamespace(status="completed", output_file_id=f"file-{batch_id}", error_file_id=None)
+
+
+@pytest.mark.parametrize("fetch, kind", [(fetch_classify_batches, "classify"), (fetch_estimation_batches, "estimation")])
+def test_output_stored_under_another_compression_is_not_downloaded_again(tmp_path, fetch, kind):
+    ids = tmp_path / "ids.jsonl"
+    ids.write_text("".join(json.dumps({"batch_job_id": b}) + "\n" for b in ("b1", "b2")))
+    outputs = tmp_path / "outputs"
+    outputs.mkdir()
+    with gzip.open(outputs / f"b1_{kind}_output.jsonl.gz", "wt") as handle:
+        handle.write("earlier\n")
+
+    client = StubClient()
+    paths = fetch(ids, outputs, verbose=False, compression="none", client=client)
+    assert client.retrieved == ["b2"]
+    assert [p.name for p in paths] == [f"b1_{kind}_output.jsonl.gz", f"b2_{kind}_output.jsonl"]
+    assert (outputs / f"b2_{kind}_output.jsonl").read_text() == "file-b2\n"
+
+    # Nothing new to fetch under either compression, and no second copy appears.
+    again = StubClient()
+    assert fetch(ids, outputs, verbose=False, compression="gzip", client=again) == paths
+    assert again.retrieved == []
+    assert sorted(p.name for p in outputs.iterdir()) == sorted(p.name for p in paths)
@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import csv
+from pathlib import Path
+
+import pytest
+
+from simulation.generate_dataset import generate_dataset
+
+
+def _traces(base: Path) -> dict[str, bytes]:
+    return {p.name: p.read_bytes() for p in sorted((base / "data" / "raw").glob("*.csv"))}
+
+
+def _rows(base: Path) -> list[dict[str, str]]:
+    """Summary rows without the path columns."""
+    with (base / "data" / "results" / "dataset_summary.csv").open(newline="", encoding="utf-8") as handle:
+        return [{k: v for k, v in row.items() if k not in ("trace_csv", "meta_json")} for row in csv.DictReader(handle)]
+
+
+@pytest.mark.parametrize("engine", ["reference", "indexed", "skip"])
+def test_streamed_traces_match_in_memory_traces(tmp_path, engine):
+    kwargs = dict(num_experiments=2, replicates=3, seed=5, fixed_N=12, engine=engine)
+    generate_dataset(base_dir=tmp_path / "memory", **kwargs)
+    generate_dataset(base_dir=tmp_path / "stream", stream=True, **kwargs)
+    memory, streamed = _traces(tmp_path / "memory"), _traces(tmp_path / "stream")
+    assert len(memory) == 6
+    assert memory == streamed
+    assert _rows(tmp_path / "memory") == _rows(tmp_path / "stream")
+
+
+def test_output_does_not_depend_on_the_worker_count(tmp_path):
+    kwargs = dict(num_experiments=3, replicates=2, seed=11, engine="indexed")
+    generate_dataset(base_dir=tmp_path / "one", workers=1, **kwargs)
+    generate_dataset(base_dir=tmp_path / "three", workers=3, **kwargs)
+    assert len(_traces(tmp_path / "one")) == 6
+    assert _traces(tmp_path / "one") == _traces(tmp_path / "three")
+    assert _rows(tmp_path / "one") == _rows(tmp_path / "three")
@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+import json
+import random
+
+from simulation.generate_dataset import generate_dataset
+from simulation.graph import make_graph, simulate_moran_run_graph
+
+
+def test_large_graph_runs_stay_on_the_graph_engine(tmp_path):
+    generate_dataset(
+        num_experiments=1, replicates=2, seed=4, base_dir=tmp_path, fixed_r=3.0, fixed_N=25, fixed_i0=20,
+        engine="graph", graph="cycle", exact_max_N=20,
+    )
+    raw = tmp_path / "data" / "raw"
+    assert not list(raw.glob("*.leaps.csv"))
+    meta = json.loads((raw / "exp001_run01.meta.json").read_text(encoding="utf-8"))
+    assert meta["engine"] == "graph"
+    assert meta["graph_id"] == "cycle_N25"
+    assert "approximate" not in meta
+
+
+def test_cycle_events_only_replace_neighbours():
+    graph = make_graph("cycle", 12)
+    run = simulate_moran_run_graph(graph=graph, r=1.5, i0=6, run_id="g", rng=random.Random(2))
+    assert run.absorbed_type in ("A", "B")
+    for ev in run.steps:
+        assert ev.death_index in graph.neighbours(ev.birth_index)
@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import csv
+import json
+import multiprocessing
+import os
+from pathlib import Path
+
+import pytest
+
+
+def _traces(run_grid, group):
+    traces = {}
+    for summary in sorted(run_grid.group_paths(group)["summaries"].glob("summary_*.csv")):
+        with summary.open(newline="", encoding="utf-8") as handle:
+            for row in csv.DictReader(handle):
+                traces[summary.name, row["run_id"]] = row["trace_csv"]
+    return traces
+
+
+@pytest.mark.skipif(multiprocessing.get_start_method() != "fork", reason="workers must inherit the patched grid")
+def test_parallel_points_match_sequential_ones(small_grid, fake_openai, monkeypatch, tmp_path):
+    grid = [(1.5, 2), (0.7, 3), (1.1, 1), (2.0, 4)]
+    monkeypatch.setattr(small_grid, "GRID", grid)
+    # Separate stores, so the parallel group simulates instead of linking
+    for group, jobs in (("seq", 1), ("par", 3)):
+        monkeypatch.setattr(small_grid, "STORE_DIR", tmp_path / f"store_{group}")
+        small_grid.simulate_and_send(group, jobs=jobs)
+
+    seq, par = _traces(small_grid, "seq"), _traces(small_grid, "par")
+    assert seq.keys() == par.keys() and len(seq) == len(grid) * 3
+    for key, trace in seq.items():
+        assert not os.path.samefile(trace, par[key])
+        assert Path(trace).read_bytes() == Path(par[key]).read_bytes()
+
+    for group in ("seq", "par"):
+        base = small_grid.group_paths(group)["base"]
+        points = json.loads((base / "group.json").read_text())["points"]
+        assert [(p["r"], p["i0"]) for p in points] == grid
+        # Private workspaces are gone once their point is stored
+        assert not list(base.glob("r*_i*_*"))
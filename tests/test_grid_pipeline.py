@@ -0,0 +1,23 @@
+from __future__ import annotations
+
+import csv
+
+
+def test_grid_runs_in_process_with_one_client_and_stage_timing(small_grid, fake_openai, capsys):
+    small_grid.simulate_and_send("g")
+    out = capsys.readouterr().out
+    assert fake_openai.clients_made == 1
+    assert len(fake_openai.batches_by_id) == 2
+    for stage in ("simulate", "store", "send", "total"):
+        assert f"\n{stage:<12}" in out
+
+    fake_openai.finish()
+    small_grid.fetch_parse_vote("g")
+    out = capsys.readouterr().out
+    assert fake_openai.clients_made == 2
+    for stage in ("fetch", "parse", "vote"):
+        assert f"\n{stage:<12}" in out
+
+    with small_grid.group_paths("g")["voted_csv"].open(newline="", encoding="utf-8") as handle:
+        voted = list(csv.DictReader(handle))
+    assert sorted((float(row["true_r"]), int(row["true_i0"])) for row in voted) == [(0.7, 3), (1.5, 2)]
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import pytest
+
+from main import build_parser
+from simulation.engines import resolve_engine
+from simulation.kernel import kernel_chunks
+from simulation.moran import MoranTrace
+
+CASES = [
+    (1.0, 2, 1),
+    (1.75, 15, 13),
+    (0.6, 25, 3),
+    (1.25, 100, 50),
+]
+
+
+def _columns(r: float, N: int, i0: int, key: int, jit: bool, chunk_steps: int = 4096) -> list[list]:
+    columns: list[list] = [[], [], [], [], []]
+    last = i0
+    for *chunk, last in kernel_chunks(r, N, i0, key, jit=jit, chunk_steps=chunk_steps):
+        for col, part in zip(columns, chunk):
+            col.extend(int(v) for v in part)
+    columns.append([int(last)])
+    return columns
+
+
+@pytest.mark.parametrize("r, N, i0", CASES)
+def test_pure_kernel_matches_numba(r, N, i0):
+    pytest.importorskip("numba")
+    for key in range(5):
+        key = (key * 0x9E3779B1) & 0xFFFFFFFF
+        assert _columns(r, N, i0, key, jit=False) == _columns(r, N, i0, key, jit=True)
+
+
+def test_pure_kernel_resumes_across_chunks():
+    assert _columns(1.1, 30, 10, 0x1234567, jit=False) == _columns(1.1, 30, 10, 0x1234567, jit=False, chunk_steps=7)
+
+
+def test_pure_kernel_trace_replays_on_the_population():
+    birth, birth_mut, death, death_mut, before, (last,) = _columns(1.3, 12, 5, 99, jit=False)
+    population = ["A"] * 5 + ["B"] * 7
+    for ev in MoranTrace.from_columns(12, birth, birth_mut, death, death_mut, before):
+        assert population[ev.birth_index] == ev.birth_type
+        assert population[ev.death_index] == ev.death_type
+        population[ev.death_index] = ev.birth_type
+    assert population.count("A") == last and last in (0, 12)
+
+
+def test_auto_engine_does_not_depend_on_numba():
+    assert resolve_engine("auto") == "compiled"
+    assert resolve_engine("indexed") == "indexed"
+    assert build_parser().parse_args(["simulate"]).engine == "reference"
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from moran_grid import rho_i
+from simulation.grids import CLASSIFY_GRID, CLASSIFY_N
+from simulation.mc_rho import _p_up_dB, estimate_rho, estimate_rho_points, run_mc_rho
+
+
+def _exact_dB(r: float, N: int, i0: int) -> float:
+    # Birth-death chain formula with gamma_j = P(down) / P(up) at count j
+    up = _p_up_dB(np.arange(1, N, dtype=np.float64), r, N)
+    products = np.concatenate([[1.0], np.cumprod((1.0 - up) / up)])
+    return products[:i0].sum() / products.sum()
+
+
+def test_bd_estimates_cover_the_analytic_rho():
+    points = [(1.25, 4), (0.9, 10), (1.6666, 1)]
+    estimates = estimate_rho_points(points, N=20, replicates=40_000, rng=3)
+    for (r, i0), est in zip(points, estimates):
+        assert (est.r, est.i0, est.replicates) == (r, i0, 40_000)
+        assert est.rho_exact == pytest.approx(rho_i(i0, 20, r))
+        assert abs(est.rho - est.rho_exact) < 4 * est.stderr
+        # Antithetic pairs are negatively correlated
+        assert est.variance_reduction > 1.0
+
+
+def test_db_control_variate_covers_the_exact_value():
+    est = estimate_rho(r=1.1, N=20, i0=5, replicates=40_000, model="dB", rng=1)
+    assert est.rho_exact is None
+    assert abs(est.rho - _exact_dB(1.1, 20, 5)) < 4 * est.stderr
+    assert est.variance_reduction > 5.0
+
+
+def test_points_run_together_match_points_run_alone():
+    together = estimate_rho_points([(1.2, 3), (0.8, 15)], N=20, replicates=20_000, model="dB", rng=5)
+    alone = estimate_rho(r=0.8, N=20, i0=15, replicates=20_000, model="dB", rng=6)
+    assert abs(together[1].rho - alone.rho) < 4 * np.hypot(together[1].stderr, alone.stderr)
+
+
+def test_grid_sweep_reads_the_shared_grid(tmp_path):
+    estimates = run_mc_rho(
+        r=None, N=None, i0=None, grid="classify", model="Bd", replicates=400, seed=1,
+        output_csv=tmp_path / "mc.csv",
+    )
+    assert [(est.r, est.i0) for est in estimates] == CLASSIFY_GRID
+    assert {est.N for est in estimates} == {CLASSIFY_N}
+    assert len((tmp_path / "mc.csv").read_text(encoding="utf-8").splitlines()) == len(CLASSIFY_GRID) + 1
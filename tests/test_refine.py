@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+from moran_grid import rho_i, solve_r_for_target
+
+from evaluation.refine import coarse_grid, refine_points
+from simulation.registry import Registry
+
+N = 20
+
+
+def _votes(points, vote):
+    return {(r, i0): (vote, "X" if rho_i(i0, N, r) > 0.5 else "O") for r, i0 in points}
+
+
+def _column(i0, targets):
+    return [(round(solve_r_for_target(i0, N, rho), 4), i0) for rho in targets]
+
+
+def test_edge_extension_is_clamped_to_grid_span():
+    # Every vote is O, so the top of each column extends outward (rho 0.9 at i0=1 is r ~ 10)
+    points = _column(1, (0.3, 0.5, 0.7)) + _column(19, (0.1, 0.3, 0.5))
+    votes = _votes(points, "O")
+    unclamped = refine_points(votes, N, set(points), r_range=(0.0, 100.0))
+    assert any(r > 5.0 for r, _ in unclamped)
+
+    low, high = min(r for r, _ in points), max(r for r, _ in points)
+    clamped = refine_points(votes, N, set(points))
+    assert all(low <= r <= high for r, _ in clamped)
+
+
+def test_explicit_r_range_clamps_proposals():
+    grid = coarse_grid(N, delta=0.2, i0_step=6)
+    clamped = refine_points(_votes(grid, "X"), N, set(grid), r_range=(0.9, 1.2))
+    assert clamped
+    assert all(0.9 <= r <= 1.2 for r, _ in clamped)
+    assert {i0 for _, i0 in clamped} <= {i0 for _, i0 in grid}
+
+
+def test_disagreeing_neighbours_get_their_rho_midpoint():
+    settled = _column(3, (0.6, 0.8))
+    assert refine_points(_votes(settled, "X"), N, set(settled)) == []
+
+    points = _column(3, (0.3, 0.7))
+    midpoint = _column(3, (0.5,))[0]
+    for votes in (_votes(points, "X"), {points[0]: ("O", "O"), points[1]: ("X", "X")}):
+        assert midpoint in refine_points(votes, N, set(points))
+    # Brackets narrower than min_gap are left alone
+    assert midpoint not in refine_points(_votes(points, "X"), N, set(points), min_gap=0.3)
+
+
+def test_refine_grid_adds_points_within_budget_and_replays(small_grid, fake_openai):
+    fake_openai.auto_finish = True   # every batch is answered X as soon as it is fetched
+    coarse = coarse_grid(small_grid.N)
+    budget = (len(coarse) + 2) * small_grid.REPLICATES
+    small_grid.refine_grid("g", rounds=1, request_budget=budget)
+
+    with Registry.for_group(small_grid.group_paths("g")["base"]) as reg:
+        points = [(p["r"], p["i0"]) for p in reg.points()]
+    assert points[:len(coarse)] == coarse and len(points) == len(coarse) + 2
+    low, high = min(r for r, _ in coarse), max(r for r, _ in coarse)
+    assert all(low <= r <= high for r, _ in points)
+
+    # Re-running replays the rounds from the votes instead of sending again
+    sent = len(fake_openai.batches_by_id)
+    small_grid.refine_grid("g", rounds=1, request_budget=budget)
+    assert len(fake_openai.batches_by_id) == sent
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import csv
+import json
+
+import pytest
+
+from simulation.registry import Registry
+
+
+def write_summary(path, r, i0, N=10, runs=3):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", newline="", encoding="utf-8") as handle:
+        writer = csv.DictWriter(handle, fieldnames=["run_id", "trace_csv", "true_r", "true_N", "true_i0", "num_events_full"])
+        writer.writeheader()
+        for k in range(1, runs + 1):
+            writer.writerow({"run_id": f"exp001_run{k:02d}", "trace_csv": f"raw/r{r}_i{i0}/exp001_run{k:02d}.csv",
+                             "true_r": r, "true_N": N, "true_i0": i0, "num_events_full": ""})
+    return path
+
+
+def test_truth_batches_and_outputs(tmp_path):
+    a = write_summary(tmp_path / "summaries" / "a.csv", 1.5, 2)
+    b = write_summary(tmp_path / "summaries" / "b.csv", 0.8, 4)
+
+    with Registry.for_group(tmp_path) as reg:
+        # Points are imported from their summary on first use
+        truth = reg.truth(a)
+        assert sorted(truth) == ["exp001_run01", "exp001_run02", "exp001_run03"]
+        assert truth["exp001_run02"]["true_r"] == "1.5"
+        assert truth["exp001_run02"]["num_events_full"] == ""
+
+        reg.add_batch("batch_a", kind="classify", model="m", summary_csv=a)
+        reg.add_batch("batch_ab", kind="classify", model="m", points={"p0": a, "p1": b})
+        assert reg.summaries_for_batch("batch_a") == {"": a}
+        assert reg.summaries_for_batch("batch_ab") == {"p0": a, "p1": b}
+        assert reg.points() == [{"r": 1.5, "i0": 2}, {"r": 0.8, "i0": 4}]
+
+        reg.add_output(tmp_path / "out_a.jsonl", "batch_a")
+        assert sorted(reg.unprocessed_batches()) == ["batch_a", "batch_ab"]
+        reg.mark_processed(tmp_path / "out_a.jsonl", tmp_path / "parsed_a.csv")
+        assert reg.is_processed(tmp_path / "out_a.jsonl")
+        assert reg.unprocessed_batches() == ["batch_ab"]
+        assert reg.parsed_outputs() == [(tmp_path / "parsed_a.csv", "batch_a")]
+
+    # Everything survives reopening the group's registry file
+    with Registry.for_group(tmp_path) as reg:
+        assert reg.unprocessed_batches() == ["batch_ab"]
+
+
+def test_import_batch_ids_registers_each_batch_once(tmp_path):
+    a = write_summary(tmp_path / "a.csv", 1.1, 1)
+    ids = tmp_path / "ids.jsonl"
+    ids.write_text(
+        json.dumps({"batch_job_id": "b1", "model": "m", "summary_csv": str(a)}) + "\n\n"
+        + json.dumps({"batch_job_id": "b2", "model": "m", "points": {"p0": str(a)}}) + "\n"
+    )
+    with Registry(tmp_path / "reg.sqlite") as reg:
+        assert reg.import_batch_ids(ids, kind="classify") == 2
+        assert reg.import_batch_ids(ids, kind="classify") == 0
+        assert reg.import_batch_ids(tmp_path / "missing.jsonl", kind="classify") == 0
+        assert reg.summary_for_batch("b1") == a
+        assert reg.summaries_for_batch("b2") == {"p0": a}
+
+
+def test_empty_summary_is_rejected(tmp_path):
+    empty = write_summary(tmp_path / "empty.csv", 1.0, 1, runs=0)
+    with Registry(tmp_path / "reg.sqlite") as reg, pytest.raises(ValueError):
+        reg.import_summary(empty)
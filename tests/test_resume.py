@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import pytest
+
+from simulation.registry import STAGES, Registry
+
+
+def _stages(run_grid, group):
+    with Registry.for_group(run_grid.group_paths(group)["base"]) as reg:
+        return {(p["r"], p["i0"]): reg.point_stage(reg.add_point(p["r"], p["i0"], run_grid.N)) for p in reg.points()}
+
+
+def test_checkpoints_stay_a_prefix_of_the_stages(tmp_path):
+    with Registry(tmp_path / "reg.sqlite") as reg:
+        point = reg.add_point(1.5, 2, 6)
+        for stage in STAGES[:3]:
+            reg.mark_stage(point, stage, f"{stage}-detail")
+        assert reg.point_stage(point) == "uploaded"
+        # Redoing a stage forgets every later one
+        reg.mark_stage(point, "simulated")
+        assert reg.stages(point) == {"simulated": None}
+        assert reg.points(submitted=True) == []
+        # A stage without the ones before it does not count yet
+        reg.mark_stage(point, "batch_created", "b1")
+        assert reg.point_stage(point) == "simulated"
+        for stage in STAGES[1:]:
+            reg.mark_stage(point, stage)
+        assert reg.points(submitted=True) == [{"r": 1.5, "i0": 2}]
+
+
+def test_rerun_resumes_a_failed_upload_without_resimulating(small_grid, fake_openai, monkeypatch):
+    fake_openai.fail_uploads = 1
+    small_grid.simulate_and_send("g")
+    assert _stages(small_grid, "g") == {(1.5, 2): "prompts_built", (0.7, 3): "batch_created"}
+    assert len(fake_openai.batches_by_id) == 1
+
+    prompts = small_grid.group_paths("g")["batches"] / "classify_batch_r1.5_i2.jsonl"
+    built = prompts.stat().st_mtime_ns
+    monkeypatch.setattr(small_grid, "generate_dataset", lambda **kwargs: pytest.fail("point was simulated again"))
+    small_grid.simulate_and_send("g")
+    assert _stages(small_grid, "g") == {(1.5, 2): "batch_created", (0.7, 3): "batch_created"}
+    # Only the failed point was sent again, from the prompts built the first time
+    assert len(fake_openai.batches_by_id) == 2
+    assert prompts.stat().st_mtime_ns == built
+
+    small_grid.simulate_and_send("g")
+    assert len(fake_openai.batches_by_id) == 2
+
+
+def test_packed_rerun_sends_only_the_points_of_a_failed_shard(small_grid, fake_openai, monkeypatch):
+    monkeypatch.setattr(small_grid, "GRID", [(1.5, 2), (0.7, 3), (1.1, 1)])
+    fake_openai.fail_uploads = 1
+    small_grid.simulate_and_send("g", pack=True, max_requests=3)
+    stages = _stages(small_grid, "g")
+    assert stages[(1.5, 2)] == "simulated"
+    assert stages[(0.7, 3)] == stages[(1.1, 1)] == "batch_created"
+
+    small_grid.simulate_and_send("g", pack=True, max_requests=3)
+    assert set(_stages(small_grid, "g").values()) == {"batch_created"}
+    resent = list(fake_openai.batches_by_id)[-1]
+    assert {req["custom_id"].split("__")[1] for req in fake_openai.requests(resent)} == {"g.r1.5_i2"}
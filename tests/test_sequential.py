@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import csv
+import json
+
+import pytest
+
+from evaluation.vote_fixation_probability import majority_vote, sprt_decision, sprt_lead
+
+
+def test_sprt_settles_once_one_label_leads():
+    lead = sprt_lead(0.05, 0.25)
+    assert lead == 3
+    assert sprt_decision(3, 0) == "X" and sprt_decision(1, 4) == "O"
+    assert sprt_decision(4, 2) is None
+    # A settled test always agrees with the majority
+    for x in range(8):
+        for o in range(8):
+            decision = sprt_decision(x, o)
+            assert decision is None or decision == majority_vote(["X"] * x + ["O"] * o)
+    with pytest.raises(ValueError):
+        sprt_lead(0.5, 0.25)
+
+
+def test_batch_completed_without_output_is_resent(small_grid, fake_openai, monkeypatch):
+    paths = small_grid.group_paths("g")
+    small_grid.sequential_grid("g", wave=1)
+    (first,) = fake_openai.batches_by_id
+    fake_openai.set_status(first, "completed", errors=b'{"error": "all requests failed"}\n')
+
+    # Polling must stop at the dead batch instead of waiting for an output that never comes
+    monkeypatch.setattr(small_grid.time, "sleep", lambda seconds: pytest.fail("polled a batch that ended"))
+    small_grid.sequential_grid("g", wave=1, poll_seconds=60)
+    with (paths["batches"] / "sequential_waves.jsonl").open(encoding="utf-8") as handle:
+        waves = [json.loads(line) for line in handle]
+    assert waves[-1] == {"failed": [first]}
+    assert (paths["outputs"] / f"{first}_classify_errors.jsonl").exists()
+
+    # The next run sends the lost runs again, then waves until every point is settled
+    fake_openai.auto_finish = True
+    small_grid.sequential_grid("g", wave=1)
+    with paths["voted_csv"].open(newline="", encoding="utf-8") as handle:
+        voted = list(csv.DictReader(handle))
+    assert sorted((float(row["true_r"]), int(row["true_i0"])) for row in voted) == sorted(small_grid.GRID)
+    with (paths["results"] / "sequential_report.csv").open(newline="", encoding="utf-8") as handle:
+        report = list(csv.DictReader(handle))
+    assert {(row["replicates"], row["x_count"], row["settled"]) for row in report} == {("3", "3", "1")}
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from pathlib import Path
+import shutil
+
+import pytest
+
+import run_grid
+from simulation.generate_dataset import generate_dataset
+from simulation.store import TraceStore, group_trace_files, group_trace_points, point_key
+
+
+def test_put_and_link_ignore_stale_tmp_files(tmp_path):
+    trace = tmp_path / "exp001_run01.csv"
+    trace.write_text("step,event\n0,1A:2B\n", encoding="utf-8")
+    digest = hashlib.sha256(trace.read_bytes()).hexdigest()
+    store = TraceStore(tmp_path / "store")
+
+    # A crashed (or still running) writer's temporary file in the object's shard
+    shard = store.objects_dir / digest[:2]
+    shard.mkdir(parents=True)
+    (shard / f"{digest}.csv.12345.tmp").write_text("partial", encoding="utf-8")
+
+    assert store.find_object(digest) is None
+    obj = store.put(trace)
+    assert obj == store.object_path(digest, ".csv")
+    assert store.find_object(digest) == obj
+
+    linked = store.link(obj, tmp_path / "group" / "raw", "exp001_run01")
+    assert linked.name == "exp001_run01.csv"
+    assert linked.read_text(encoding="utf-8") == trace.read_text(encoding="utf-8")
+
+    index = store.record_point("key", {"exp001_run01": obj})
+    assert ".tmp" not in index.read_text(encoding="utf-8")
+    assert not list(shard.glob(f".{digest}.*.tmp"))
+
+
+def _legacy_group(groups_dir, r, i0, replicates):
+    """A group laid out like the runners made them before the store: copied CSVs, no engine or seed in group.json."""
+    group = groups_dir / "legacy"
+    work = groups_dir.parent / "work"
+    generate_dataset(num_experiments=1, replicates=replicates, seed=17, base_dir=work,
+                     fixed_r=r, fixed_N=6, fixed_i0=i0, engine="reference")
+    point_dir = group / "raw" / f"r{r}_i{i0}"
+    point_dir.mkdir(parents=True)
+    for trace in (work / "data" / "raw").glob("*.csv"):
+        shutil.copy(trace, point_dir / trace.name)
+    (group / "group.json").write_text(json.dumps({"group": "legacy", "N": 6, "replicates": replicates, "points": []}))
+    return point_dir
+
+
+def test_deduped_legacy_point_is_reused_by_the_runner(tmp_path, monkeypatch):
+    groups_dir = tmp_path / "groups"
+    point_dir = _legacy_group(groups_dir, 1.2, 2, 3)
+    store = TraceStore(tmp_path / "store")
+
+    points = group_trace_points(groups_dir)
+    stats = store.dedupe(group_trace_files(groups_dir), points=points, dry_run=True)
+    assert (stats.linked, stats.points) == (3, 1)
+    assert not store.points_dir.exists()
+
+    stats = store.dedupe(group_trace_files(groups_dir), points=points)
+    assert (stats.linked, stats.points) == (3, 1)
+    key = point_key(engine="reference", r=1.2, N=6, i0=2, seed=17)
+    stored = store.lookup_point(key)
+    assert sorted(stored) == ["exp001_run01", "exp001_run02", "exp001_run03"]
+
+    # A grid run of the same point links the migrated traces instead of simulating.
+    monkeypatch.setattr(run_grid, "GROUPS_DIR", groups_dir)
+    monkeypatch.setattr(run_grid, "STORE_DIR", store.root)
+    monkeypatch.setattr(run_grid, "N", 6)
+    monkeypatch.setattr(run_grid, "REPLICATES", 3)
+    monkeypatch.setattr(run_grid, "generate_dataset", lambda **kwargs: pytest.fail("point was simulated again"))
+    run_grid.init_group("fresh")
+    _, rows, _ = run_grid.prepare_point("fresh", 1.2, 2)
+    for row in rows:
+        assert os.path.samefile(row["trace_csv"], stored[row["run_id"]])
+        assert Path(row["trace_csv"]).read_bytes() == (point_dir / f"{row['run_id']}.csv").read_bytes()
@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+import random
+
+import pytest
+
+from simulation.io import event_row, read_run_trace_csv, write_run_trace_csv
+from simulation.moran import MoranTrace, simulate_moran_run
+
+
+def _run():
+    return simulate_moran_run(r=1.3, N=10, i0=4, run_id="exp001_run01", rng=random.Random(8))
+
+
+def test_trace_rows_round_trip_through_events():
+    run = _run()
+    events = list(run.steps)
+    rebuilt = MoranTrace.from_events(run.true_N, events)
+    assert list(rebuilt) == events
+    assert rebuilt[-1] == events[-1] and rebuilt[1:4] == events[1:4]
+    assert [list(map(str, row)) for row in run.steps.csv_rows()] == [list(map(str, event_row(ev))) for ev in events]
+    with pytest.raises(IndexError):
+        run.steps[len(events)]
+    # Three int32 columns plus one flag byte per event
+    columns = (run.steps.birth_index, run.steps.death_index, run.steps.mutants_before, run.steps.flags)
+    assert sum(col.itemsize * len(col) for col in columns) == 13 * len(events)
+
+
+def test_trace_csv_round_trip(tmp_path):
+    run = _run()
+    path = write_run_trace_csv(run, tmp_path / "exp001_run01.csv")
+    assert list(read_run_trace_csv(path)) == list(run.steps)
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import random
+
+import pytest
+
+from simulation.io import archive_ref, write_trace_archive
+from simulation.moran import simulate_moran_run_indexed
+from simulation.trace_index import TraceIndex
+
+
+@pytest.fixture
+def group(tmp_path):
+    rng = random.Random(4)
+    points = {}
+    for r, i0 in ((1.05, 5), (0.95, 4)):
+        runs = [
+            simulate_moran_run_indexed(r=r, N=10, i0=i0, run_id=f"exp001_run{k:02d}", rng=rng) for k in (1, 2)
+        ]
+        assert min(run.num_events for run in runs) > 5
+        path = write_trace_archive(runs, tmp_path / "archive" / f"r{r}_i{i0}.mtrace")
+        points[str(path)] = runs
+    return tmp_path, points
+
+
+def test_slices_match_the_runs(group):
+    group_dir, points = group
+    index = TraceIndex.from_group(group_dir)
+    assert len(index) == 4
+    for path, runs in points.items():
+        for run in runs:
+            ref = archive_ref(path, run.run_id)
+            assert index.num_events(ref) == run.num_events
+            events = list(run.steps)
+            part = index.get_events(ref, 1, 5)
+            assert list(part.step) == [1, 2, 3, 4]
+            assert list(part.csv_rows()) == [list(row) for row in run.steps.csv_rows()][1:5]
+            tail = index.get_events(ref, -3)
+            assert list(tail.mutants_after) == [ev.mutants_after for ev in events[-3:]]
+            assert index.state_at(ref, run.num_events) == (10 if run.absorbed_type == "A" else 0)
+            assert index.state_at(ref, 2) == events[2].mutants_before
+            first = index.find_state(ref, events[0].mutants_before)
+            assert first == 0
+            assert index.find_state(ref, 10) is None
+
+
+def test_bare_run_ids_must_be_unique(group):
+    group_dir, points = group
+    index = TraceIndex.from_group(group_dir)
+    with pytest.raises(KeyError):
+        index.num_events("exp001_run01")
+
+    only = TraceIndex([next(iter(points))])
+    assert only.num_events("exp001_run01") == next(iter(points.values()))[0].num_events
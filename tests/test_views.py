@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import random
+
+import pytest
+
+from evaluation.prompts_estimation import build_user_prompt_from_csv as estimation_prompt
+from evaluation.prompts_fixation_probability import build_user_prompt_from_csv as classify_prompt
+from simulation.crop import make_crop_variants
+from simulation.io import archive_ref, pack_trace_csvs, read_trace_rows, write_run_trace_csv
+from simulation.moran import simulate_moran_run
+from simulation.views import parse_view, read_view_rows, split_view_ref, view_display_name, view_ref
+
+R, N, I0 = 1.1, 10, 3
+
+
+@pytest.fixture
+def trace_csv(tmp_path):
+    run = simulate_moran_run(r=R, N=N, i0=I0, run_id="exp001_run01", rng=random.Random(1))
+    assert run.num_events > 30
+    return write_run_trace_csv(run, tmp_path / "raw" / "exp001_run01.csv")
+
+
+@pytest.mark.parametrize("build_prompt", [classify_prompt, estimation_prompt])
+def test_view_prompts_match_materialized_crops(tmp_path, trace_csv, build_prompt):
+    crops = make_crop_variants(trace_csv, tmp_path / "cropped", prefix_k=10, suffix_k=10, stride=3)
+    archive = pack_trace_csvs([trace_csv], tmp_path / "point.mtrace", r=R, N=N, i0=I0)
+    for base in (str(trace_csv), archive_ref(archive, "exp001_run01")):
+        for name, crop_path in crops.items():
+            ref = view_ref(base, name)
+            assert view_display_name(ref) == (crop_path.name if name != "full" else "exp001_run01.csv")
+            assert build_prompt(ref).replace(view_display_name(ref), "") == build_prompt(crop_path).replace(crop_path.name, "")
+            if name != "full":
+                assert build_prompt(ref) == build_prompt(crop_path)
+
+
+def test_window_and_state_views(trace_csv):
+    _, rows = read_trace_rows(trace_csv)
+    ref = view_ref(str(trace_csv), "window5s9")
+    _, window = read_view_rows(ref)
+    assert len(window) == 5
+    # The same window on every read, and a contiguous run of the trace
+    assert read_view_rows(ref)[1] == window
+    start = int(window[0]["step"])
+    assert window == rows[start:start + 5]
+
+    _, state = read_view_rows(view_ref(str(trace_csv), f"state{I0 + 1}w4"))
+    first = next(i for i, row in enumerate(rows) if int(row["mutants_before"]) == I0 + 1)
+    assert state == rows[first:first + 4]
+    assert read_view_rows(view_ref(str(trace_csv), f"state{N}w4"))[1] == []
+
+
+def test_view_refs_parse_and_reject_unknown_views():
+    assert view_ref("a.csv", "full") == "a.csv"
+    assert split_view_ref("a.csv@prefix10") == ("a.csv", parse_view("prefix10"))
+    assert split_view_ref("odd@name.csv") == ("odd@name.csv", None)
+    assert parse_view("window20s3").name == "window20s3"
+    for bad in ("prefix", "stride0", "tail5"):
+        with pytest.raises(ValueError):
+            parse_view(bad)